@@ -19,12 +19,15 @@ from __future__ import unicode_literals
 import sys
 import os
 import re
+import mmap
+import codecs
 import threading
 import shutil
 
 from PyQt4 import QtCore
 
 from ninja_ide.core import settings
+from ninja_ide.core.file_handling import project_snapshot
 
 if sys.version_info.major == 3:
     python3 = True
@@ -35,6 +38,9 @@ else:
 #Lock to protect the file's writing operation
 file_store_content_lock = threading.Lock()
 
+#Bytes of a large file loaded in the editor at once
+LARGE_FILE_CHUNK_SIZE = 4 * 1024 * 1024
+
 
 class NinjaIOException(Exception):
     """
@@ -171,6 +177,47 @@ def read_file_content(fileName):
     return content
 
 
+def is_large_file(fileName):
+    """Return True if the file has to be opened in large file mode."""
+    if not settings.LARGE_FILE_SIZE:
+        return False
+    try:
+        return os.path.getsize(fileName) >= settings.LARGE_FILE_SIZE
+    except OSError:
+        return False
+
+
+def read_file_chunks(fileName, chunk_size=LARGE_FILE_CHUNK_SIZE):
+    """Return an iterator over the content of a file decoded in pieces of
+    about chunk_size bytes, the file is memory mapped instead of read."""
+    try:
+        with open(fileName, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                # Empty files can't be mapped
+                buf = b''
+    except (IOError, OSError) as reason:
+        raise NinjaIOException(reason)
+    encoding = get_file_encoding(buf[:1024].decode('latin-1'))
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = 'UTF-8'
+    return _decode_chunks(buf, encoding, chunk_size)
+
+
+def _decode_chunks(buf, encoding, chunk_size):
+    decoder = codecs.getincrementaldecoder(encoding)('replace')
+    try:
+        for start in range(0, len(buf), chunk_size):
+            yield decoder.decode(buf[start:start + chunk_size])
+        yield decoder.decode(b'', True)
+    finally:
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+
+
 def get_basename(fileName):
     """Get the name of a file or folder specified in a path."""
     if fileName.endswith(os.path.sep):
@@ -217,26 +264,23 @@ def store_file_content(fileName, content, addExtension=True, newFile=False):
 
 def open_project(path):
     """Return a dict structure containing the info inside a folder."""
-    return open_project_with_extensions(settings.SUPPORTED_EXTENSIONS)
+    return open_project_with_extensions(path, settings.SUPPORTED_EXTENSIONS)
 
 
-def open_project_with_extensions(path, extensions):
-    """Return a dict structure containing the info inside a folder.
+def open_project_with_extensions(path, extensions, snapshot_path=None,
+                                 excludes=None):
+    """Return a dict structure containing the info inside a folder:
+    {folder: [files, folders]} for every folder, with the files matching
+    extensions (the ones specified by each project) and not matching the
+    excludes rules of the project.
 
-    This function uses the extensions specified by each project."""
+    If snapshot_path is given the snapshot saved there is refreshed
+    instead of scanning the whole folder (see project_snapshot)."""
     if not os.path.exists(path):
         raise NinjaIOException("The folder does not exist")
-    valid_extensions = [ext.lower() for ext in extensions
-                        if not ext.startswith('-')]
-    d = {}
-    for root, dirs, files in os.walk(path, followlinks=True):
-        for f in files:
-            ext = os.path.splitext(f.lower())[-1]
-            if ext in valid_extensions or '.*' in valid_extensions:
-                d[root] = [f, dirs]
-            elif ext == '' and '*' in valid_extensions:
-                d[root] = [f, dirs]
-    return d
+    snapshot = project_snapshot.scan_project(path, extensions, excludes,
+                                             path=snapshot_path)
+    return snapshot.structure()
 
 
 def delete_file(path, fileName=None):
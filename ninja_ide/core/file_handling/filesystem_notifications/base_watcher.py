@@ -15,8 +15,11 @@
 # You should have received a copy of the GNU General Public License
 # along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>. #
 import os
+import threading
+from collections import OrderedDict
+
 from PyQt4.QtCore import QObject
-from PyQt4.QtCore import SIGNAL, QThread
+from PyQt4.QtCore import SIGNAL, QThread, QTimer
 
 from ninja_ide.tools.logger import NinjaLogger
 logger = NinjaLogger('ninja_ide.core.file_handling.filesystem_notifications.Watcher')
@@ -28,6 +31,12 @@ DELETED = 3
 RENAME = 4
 REMOVE = 5
 
+# Milliseconds between two checks of the files watched by polling
+POLL_INTERVAL = 2000
+# Milliseconds the events are collected before being emitted, a burst of
+# events on a path (a save, a checkout) ends up as one event
+DEBOUNCE_INTERVAL = 200
+
 
 def do_stat(file_path):
     status = None
@@ -38,9 +47,48 @@ def do_stat(file_path):
     return status
 
 
+def _signature(status):
+    if status is None:
+        return None
+    return (status.st_mtime, status.st_size)
+
+
+def coalesce(previous, event):
+    """Return the event that sums up the event previous followed by event
+    on the same path, or None if they cancel each other."""
+    if previous == ADDED:
+        if event == DELETED:
+            # Created and removed, a temporary file
+            return None
+        if event == MODIFIED:
+            return ADDED
+    elif previous == DELETED and event == ADDED:
+        # Replaced, as many editors save
+        return MODIFIED
+    return event
+
+
+def _subscribe(subscribers, path, callback):
+    if callback is not None:
+        subscribers.setdefault(path, []).append(callback)
+
+
+def _unsubscribe(subscribers, path, callback):
+    callbacks = subscribers.get(path)
+    if callback is not None and callbacks and callback in callbacks:
+        callbacks.remove(callback)
+        if not callbacks:
+            del subscribers[path]
+
+
 class SingleFileWatcher(QThread):
-    def __init__(self, callback):
+    """Watch files polling them, all the files are checked in a single
+    pass every interval milliseconds."""
+
+    def __init__(self, callback, interval=POLL_INTERVAL):
         self._watches = dict()
+        self._lock = threading.Lock()
+        self._interval = interval
         self._do_run = True
         self._emit_call = callback
         super(SingleFileWatcher, self).__init__()
@@ -49,39 +97,59 @@ class SingleFileWatcher(QThread):
         self._do_run = False
 
     def add_watch(self, file_to_watch):
+        # Files that don't exist yet are reported when they are created
         status = do_stat(file_to_watch)
-        #only add if the file still exists
-        if (file_to_watch not in self._watches) and status:
-            self._watches[file_to_watch] = do_stat(file_to_watch)
-        elif not status:
-            self._emit_call(DELETED, file_to_watch)
+        with self._lock:
+            if file_to_watch not in self._watches:
+                self._watches[file_to_watch] = _signature(status)
 
     def is_empty(self):
         return len(self._watches) == 0
 
     def del_watch(self, file_to_unwatch):
-        if file_to_unwatch in self._watches:
-            self._watches.pop(file_to_unwatch)
+        with self._lock:
+            self._watches.pop(file_to_unwatch, None)
 
     def tick(self):
-        keys = list(self._watches.keys())
-        for each_file in keys:
-            status = do_stat(each_file)
-            if not status:
+        with self._lock:
+            watches = list(self._watches.items())
+        for each_file, signature in watches:
+            current = _signature(do_stat(each_file))
+            if current == signature:
+                continue
+            with self._lock:
+                if each_file not in self._watches:
+                    continue
+                self._watches[each_file] = current
+            if current is None:
                 self._emit_call(DELETED, each_file)
-                self.del_watch(each_file)
-            if status.st_mtime > self._watches[each_file].st_mtime:
+            elif signature is None:
+                self._emit_call(ADDED, each_file)
+            else:
                 self._emit_call(MODIFIED, each_file)
-                self._watches[each_file] = status
 
     def run(self):
         while self._do_run:
             self.tick()
-            QThread.msleep(1000)
+            QThread.msleep(self._interval)
         self.deleteLater()
 
 
 class BaseWatcher(QObject):
+    """The file system watcher of the IDE, shared by everyone.
+
+    The folders (projects) and files to watch are subscribed with add_watch
+    and add_file_watch, and unsubscribed with remove_watch and
+    remove_file_watch: a path is watched once while it has subscriptions.
+    The callback of a subscription is called with the event and the path
+    only for the changes of its file, or of anything inside its folder.
+    The platforms watch the folders and files with the notifications of the
+    system overriding _watch_folder, _unwatch_folder, _watch_file and
+    _unwatch_file, by default the files are polled.
+
+    The events can be reported from any thread to _emit_signal_on_change,
+    they are coalesced by path and emitted in the main thread after
+    DEBOUNCE_INTERVAL."""
 
 ###############################################################################
 # SIGNALS
@@ -93,8 +161,64 @@ class BaseWatcher(QObject):
         super(BaseWatcher, self).__init__()
         self._single_file_watcher = None
         self.allow_kill = True
+        # Subscriptions of each path, and the callbacks subscribed
+        self._folder_watches = {}
+        self._file_watches = {}
+        self._folder_subscribers = {}
+        self._file_subscribers = {}
+        self._pending_events = OrderedDict()
+        self._pending_lock = threading.Lock()
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(DEBOUNCE_INTERVAL)
+        self.connect(self._debounce_timer, SIGNAL("timeout()"),
+                     self._emit_pending_events)
+        # Emitted from the thread of the event, the timer is started in
+        # the main thread
+        self.connect(self, SIGNAL("eventsPending()"),
+                     self._start_debounce)
+
+    def add_watch(self, path, callback=None):
+        """Watch the folder path and everything inside it."""
+        _subscribe(self._folder_subscribers, path, callback)
+        subscriptions = self._folder_watches.get(path, 0)
+        self._folder_watches[path] = subscriptions + 1
+        if not subscriptions:
+            self._watch_folder(path)
+
+    def remove_watch(self, path, callback=None):
+        _unsubscribe(self._folder_subscribers, path, callback)
+        subscriptions = self._folder_watches.get(path, 0)
+        if subscriptions > 1:
+            self._folder_watches[path] = subscriptions - 1
+        elif subscriptions:
+            del self._folder_watches[path]
+            self._unwatch_folder(path)
+
+    def add_file_watch(self, file_path, callback=None):
+        """Watch the file file_path, it can be replaced or created later."""
+        _subscribe(self._file_subscribers, file_path, callback)
+        subscriptions = self._file_watches.get(file_path, 0)
+        self._file_watches[file_path] = subscriptions + 1
+        if not subscriptions:
+            self._watch_file(file_path)
+
+    def remove_file_watch(self, file_path, callback=None):
+        _unsubscribe(self._file_subscribers, file_path, callback)
+        subscriptions = self._file_watches.get(file_path, 0)
+        if subscriptions > 1:
+            self._file_watches[file_path] = subscriptions - 1
+        elif subscriptions:
+            del self._file_watches[file_path]
+            self._unwatch_file(file_path)
+
+    def _watch_folder(self, path):
+        pass
+
+    def _unwatch_folder(self, path):
+        pass
 
-    def add_file_watch(self, file_path):
+    def _watch_file(self, file_path):
         if not self._single_file_watcher:
             self._single_file_watcher = \
                 SingleFileWatcher(self._emit_signal_on_change)
@@ -103,7 +227,7 @@ class BaseWatcher(QObject):
             self._single_file_watcher.start()
         self._single_file_watcher.add_watch(file_path)
 
-    def remove_file_watch(self, file_path):
+    def _unwatch_file(self, file_path):
         if self._single_file_watcher:
             self._single_file_watcher.del_watch(file_path)
             if self._single_file_watcher.is_empty() and self.allow_kill:
@@ -115,10 +239,42 @@ class BaseWatcher(QObject):
         self._single_file_watcher = None
 
     def shutdown_notification(self):
+        self._debounce_timer.stop()
         if hasattr(self, "_single_file_watcher") and self._single_file_watcher:
             self._single_file_watcher.stop_running()
             self._single_file_watcher.quit()
 
     def _emit_signal_on_change(self, event, path):
-        DEBUG("About to emit the signal" + repr(event))
-        #self.emit(SIGNAL("fileChanged(int, QString)"), event, path)
+        with self._pending_lock:
+            schedule = not self._pending_events
+            if path in self._pending_events:
+                event = coalesce(self._pending_events.pop(path), event)
+            if event is not None:
+                self._pending_events[path] = event
+        if schedule:
+            self.emit(SIGNAL("eventsPending()"))
+
+    def _start_debounce(self):
+        self._debounce_timer.start()
+
+    def _emit_pending_events(self):
+        with self._pending_lock:
+            events = self._pending_events
+            self._pending_events = OrderedDict()
+        for path, event in events.items():
+            DEBUG("About to emit the signal " + repr(event))
+            for callback in self._subscribers(path):
+                callback(event, path)
+            self.emit(SIGNAL("fileChanged(int, QString)"), event, path)
+
+    def _subscribers(self, path):
+        """Return the callbacks subscribed to path and to the folders
+        containing it."""
+        callbacks = list(self._file_subscribers.get(path, []))
+        folder = path
+        while True:
+            callbacks.extend(self._folder_subscribers.get(folder, []))
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                return callbacks
+            folder = parent
@@ -18,7 +18,6 @@
 from __future__ import absolute_import
 
 #import fsevents
-#from PyQt4.QtCore import SIGNAL
 
 from ninja_ide.tools.logger import NinjaLogger
 logger = NinjaLogger('ninja_ide.core.file_handling.filesystem_notifications.darwin')
@@ -46,8 +45,7 @@ class NinjaFileSystemWatcher(base_watcher.BaseWatcher):
             #fsevents.IN_MOVED_TO: ADDED}
 
     def shutdown_notification(self):
-        pass
-        #base_watcher.BaseWatcher.shutdown_notification(self)
+        base_watcher.BaseWatcher.shutdown_notification(self)
         #try:
             #for path in self.watching_paths:
                 #stream = self.watching_paths[path]
@@ -57,13 +55,13 @@ class NinjaFileSystemWatcher(base_watcher.BaseWatcher):
         #self.observer.stop()
         #self.observer.join()
 
-    def add_watch(self, path):
+    def _watch_folder(self, path):
         pass
         #if path not in self.watching_paths:
             #try:
                 #if isinstance(path, unicode):
                     #path = path.encode('utf-8')
-                #stream = fsevents.Stream(self._emit_signal_on_change,
+                #stream = fsevents.Stream(self._process_event,
                     #path, file_events=True)
                 #self.observer.schedule(stream)
                 #self.watching_paths[path] = stream
@@ -73,7 +71,7 @@ class NinjaFileSystemWatcher(base_watcher.BaseWatcher):
                 #print reason
                 #logger.debug("Path could not be added: %r" % path)
 
-    def remove_watch(self, path):
+    def _unwatch_folder(self, path):
         pass
         #try:
             #if path in self.watching_paths:
@@ -86,10 +84,10 @@ class NinjaFileSystemWatcher(base_watcher.BaseWatcher):
         #except:
             #logger.debug("Stream could not be removed for path: %r" % path)
 
-    def _emit_signal_on_change(self, event):
+    def _process_event(self, event):
         pass
         #oper = self.event_mapping.get(event.mask, None)
         #if oper is None:
             #return
         #path = event.name
-        #self.emit(SIGNAL("fileChanged(int, QString)"), oper, path)
+        #self._emit_signal_on_change(oper, path)
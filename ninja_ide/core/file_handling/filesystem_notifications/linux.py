@@ -21,7 +21,8 @@ import os
 
 from PyQt4.QtCore import QThread
 from pyinotify import ProcessEvent, IN_CREATE, IN_DELETE, IN_DELETE_SELF, \
-                        IN_MODIFY, WatchManager, Notifier, ExcludeFilter
+                        IN_MODIFY, IN_MOVED_FROM, IN_MOVED_TO, \
+                        WatchManager, Notifier, ExcludeFilter, PyinotifyError
 
 from ninja_ide.tools.logger import NinjaLogger
 logger = NinjaLogger('ninja_ide.core.file_handling.filesystem_notifications.linux')
@@ -37,7 +38,12 @@ MODIFIED = base_watcher.MODIFIED
 #from ninja_ide.core.file_handling.filesystem_notifications.base_watcher import ADDED, \
 #                                            DELETED, REMOVE, RENAME, MODIFIED
 
-mask = IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MODIFY
+mask = (IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MODIFY |
+        IN_MOVED_FROM | IN_MOVED_TO)
+
+# Milliseconds the notifier waits for events before checking if it has to
+# stop
+CHECK_TIMEOUT = 1000
 
 
 class NinjaProcessEvent(ProcessEvent):
@@ -68,72 +74,157 @@ class NinjaProcessEvent(ProcessEvent):
         self._process_callback((RENAME, event.pathname))
 
 
+def _is_inside(path, folder):
+    return path == folder or path.startswith(os.path.join(folder, ''))
+
+
 class QNotifier(QThread):
+    """Read the events of all the watches of a WatchManager."""
+
     def __init__(self, wm, processor):
-        self.event_queue = list()
         self._processor = processor
-        self.notifier = Notifier(wm,
-                            NinjaProcessEvent(self.event_queue.append))
+        self.notifier = Notifier(wm, NinjaProcessEvent(self._process))
         self.notifier.coalesce_events(True)
         self.keep_running = True
         QThread.__init__(self)
 
+    def _process(self, event):
+        self._processor(*event)
+
     def run(self):
         while self.keep_running:
             try:
-                self.notifier.process_events()
+                if self.notifier.check_events(CHECK_TIMEOUT):
+                    self.notifier.read_events()
+                    self.notifier.process_events()
             except OSError:
                 pass  # OSError: [Errno 2] No such file or directory happens
-            e_dict = {}
-            while len(self.event_queue):
-                e_type, e_path = self.event_queue.pop(0)
-                e_dict.setdefault(e_path, []).append(e_type)
-
-            keys = list(e_dict.keys())
-            while len(keys):
-                key = keys.pop(0)
-                event = e_dict.pop(key)
-                if (ADDED in event) and (DELETED in event):
-                    event = [e for e in event if e not in (ADDED, DELETED)]
-                for each_event in event:
-                    self._processor(each_event, key)
-            if self.notifier.check_events():
-                self.notifier.read_events()
 
         self.notifier.stop()
 
 
 class NinjaFileSystemWatcher(base_watcher.BaseWatcher):
+    """Watch the projects and files with one inotify instance read by one
+    thread.
+
+    The projects are watched recursively, the files are watched through
+    their folders (so they are still watched when they are replaced by a
+    save), unless they are inside a project. If inotify can't be used the
+    files are polled."""
 
     def __init__(self):
+        # Watch descriptor of each project
         self.watching_paths = {}
+        # Number of files watched in each folder, and the watch
+        # descriptors of the folders not inside a project
+        self._file_folders = {}
+        self._folder_wds = {}
+        self._polled_files = set()
         super(NinjaFileSystemWatcher, self).__init__()
         self._ignore_hidden = ('.git', '.hg', '.svn', '.bzr')
-
-    def add_watch(self, path):
-        if path not in self.watching_paths:
-            try:
-                wm = WatchManager()
-                notifier = QNotifier(wm, self._emit_signal_on_change)
-                notifier.start()
-                exclude = ExcludeFilter([os.path.join(path, folder)
-                    for folder in self._ignore_hidden])
-                wm.add_watch(path, mask, rec=True, auto_add=True,
-                    exclude_filter=exclude)
-                self.watching_paths[path] = notifier
-            except (OSError, IOError):
-                pass
-                #Shit happens, most likely temp file
-
-    def remove_watch(self, path):
-        if path in self.watching_paths:
-            notifier = self.watching_paths.pop(path)
-            notifier.keep_running = False
-            notifier.quit()
+        self._notifier = None
+        try:
+            self._wm = WatchManager()
+        except (OSError, PyinotifyError) as reason:
+            logger.error('inotify is not available, polling: %r', reason)
+            self._wm = None
+
+    def _start_notifier(self):
+        if self._notifier is None:
+            self._notifier = QNotifier(self._wm, self._process_event)
+            self._notifier.start()
+
+    def _in_project(self, path):
+        for project_path in list(self.watching_paths):
+            if _is_inside(path, project_path):
+                return True
+        return False
+
+    def _process_event(self, event, path):
+        # The folders of the files watched report their other files too
+        if path in self._file_watches or self._in_project(path):
+            self._emit_signal_on_change(event, path)
+
+    def _watch_folder(self, path):
+        if self._wm is None:
+            return
+        try:
+            exclude = ExcludeFilter([os.path.join(path, folder)
+                for folder in self._ignore_hidden])
+            wds = self._wm.add_watch(path, mask, rec=True, auto_add=True,
+                exclude_filter=exclude)
+        except (OSError, IOError):
+            #Shit happens, most likely temp file
+            return
+        wd = wds.get(path, -1)
+        if wd < 0:
+            logger.error('The folder %s could not be watched', path)
+            return
+        self.watching_paths[path] = wd
+        self._start_notifier()
+        self._sync_file_folders()
+
+    def _unwatch_folder(self, path):
+        wd = self.watching_paths.pop(path, None)
+        if wd is None:
+            return
+        # The folders inside a project watched are shared with it
+        if not self._in_project(path):
+            self._wm.rm_watch(wd, rec=True)
+            for project_path in list(self.watching_paths):
+                if _is_inside(project_path, path):
+                    del self.watching_paths[project_path]
+                    self._watch_folder(project_path)
+        self._sync_file_folders()
+
+    def _watch_file_folder(self, folder):
+        if self._in_project(folder) or folder in self._folder_wds:
+            return True
+        if self._wm is None:
+            return False
+        try:
+            wds = self._wm.add_watch(folder, mask)
+        except (OSError, IOError):
+            return False
+        wd = wds.get(folder, -1)
+        if wd < 0:
+            return False
+        self._folder_wds[folder] = wd
+        self._start_notifier()
+        return True
+
+    def _sync_file_folders(self):
+        """Watch the folders of the files that are no longer inside a
+        project, and forget the ones now watched by a project."""
+        for folder in self._file_folders:
+            if self._in_project(folder):
+                self._folder_wds.pop(folder, None)
+            else:
+                self._watch_file_folder(folder)
+
+    def _watch_file(self, file_path):
+        folder = os.path.dirname(file_path)
+        self._file_folders[folder] = self._file_folders.get(folder, 0) + 1
+        if not self._watch_file_folder(folder):
+            self._polled_files.add(file_path)
+            base_watcher.BaseWatcher._watch_file(self, file_path)
+
+    def _unwatch_file(self, file_path):
+        if file_path in self._polled_files:
+            self._polled_files.remove(file_path)
+            base_watcher.BaseWatcher._unwatch_file(self, file_path)
+        folder = os.path.dirname(file_path)
+        files = self._file_folders.get(folder, 0) - 1
+        if files > 0:
+            self._file_folders[folder] = files
+            return
+        self._file_folders.pop(folder, None)
+        wd = self._folder_wds.pop(folder, None)
+        if wd is not None:
+            self._wm.rm_watch(wd)
 
     def shutdown_notification(self):
         base_watcher.BaseWatcher.shutdown_notification(self)
-        for each_path in self.watching_paths:
-            notifier = self.watching_paths[each_path]
-            notifier.keep_running = False
-            notifier.quit()
+        if self._notifier is not None:
+            self._notifier.keep_running = False
+            self._notifier.quit()
@@ -220,7 +220,7 @@ class ThreadedFSWatcher(Thread):
                 noticed = []
                 for each_event in event:
                     if each_event not in noticed:
-                        self._callback(each_event, full_filename)
+                        self._callback(each_event, key)
                         noticed.append(each_event)
 
 
@@ -231,14 +231,14 @@ class NinjaFileSystemWatcher(base_watcher.BaseWatcher):
         # do stuff
         self.watching_paths = {}
 
-    def add_watch(self, path):
+    def _watch_folder(self, path):
         if path not in self.watching_paths:
             watch = ThreadedFSWatcher(path, self._emit_signal_on_change)
             watch.start()
             self.watching_paths[path] = watch
             # Add real watcher using platform specific things
 
-    def remove_watch(self, path):
+    def _unwatch_folder(self, path):
         if path in self.watching_paths:
             self.watching_paths[path].stop()
             self.watching_paths[path].join()
@@ -17,15 +17,17 @@
 
 import os
 import shutil
-from PyQt4.QtCore import (QObject, QFile, QFileSystemWatcher,
-                          QIODevice, QTextStream, SIGNAL)
+from PyQt4.QtCore import QObject, QFile, QIODevice, QTextStream, SIGNAL, Qt
 
 from ninja_ide import translations
 #FIXME: Obtain these form a getter
 from ninja_ide.core import settings
 from ninja_ide.tools.utils import SignalFlowControl
+from ninja_ide.core.file_handling import filesystem_notifications
 from .file_manager import NinjaIOException, NinjaNoFileNameException, \
-    get_file_encoding, get_basename, get_file_extension
+    get_file_encoding, get_basename, get_file_extension, is_large_file, \
+    read_file_chunks
+from .save_pool import SaveJob, SavePool, swap_path
 
 from ninja_ide.tools.logger import NinjaLogger
 logger = NinjaLogger('ninja_ide.core.file_handling.nfile')
@@ -54,6 +56,7 @@ class NFile(QObject):
     @willOverWrite(PyQt_PyObject, QString, QString)
     @willMove(Qt_PyQtObject, QString, QString)
     @willSave(QString, QString)
+    @savedInBackground(QString)
     @savedAsNewFile(PyQt_PyObject, QString, QString)
     @gotAPath(PyQt_PyObject)
     @willAttachToExistingFile(PyQt_PyObject, QString)
@@ -64,8 +67,11 @@ class NFile(QObject):
         """
         self._file_path = path
         self.__created = False
-        self.__watcher = None
+        # Path subscribed to the file system watcher
+        self.__watched_path = None
         self.__mtime = None
+        # Saves queued in the background saver and not written yet
+        self.__saving = 0
         super(NFile, self).__init__()
         if not self._exists():
             self.__created = True
@@ -104,19 +110,28 @@ class NFile(QObject):
         return self._file_path
 
     def start_watching(self):
-        """Create a file system watcher and connect its fileChanged
-        SIGNAL to our _file_changed SLOT"""
-        if not self.__watcher:
-            self.__watcher = QFileSystemWatcher(self)
-            self.connect(self.__watcher,
-                         SIGNAL("fileChanged(const QString&)"),
-                         self._file_changed)
-        if self._file_path is not None:
-            self.__mtime = os.path.getmtime(self._file_path)
-            self.__watcher.addPath(self._file_path)
-
-    def _file_changed(self, path):
-        current_mtime = os.path.getmtime(self._file_path)
+        """Subscribe our _file_changed SLOT to the changes of our file path
+        in the file system watcher shared by the IDE"""
+        if self._file_path is None:
+            return
+        self.__mtime = os.path.getmtime(self._file_path)
+        if self.__watched_path == self._file_path:
+            return
+        watcher = filesystem_notifications.NinjaFileSystemWatcher
+        if self.__watched_path is not None:
+            watcher.remove_file_watch(self.__watched_path,
+                                      self._file_changed)
+        self.__watched_path = self._file_path
+        watcher.add_file_watch(self._file_path, self._file_changed)
+
+    def _file_changed(self, event, path):
+        if self.__saving:
+            return
+        try:
+            current_mtime = os.path.getmtime(self._file_path)
+        except OSError:
+            # Deleted, or being replaced
+            return
         if current_mtime != self.__mtime:
             self.__mtime = current_mtime
             self.emit(SIGNAL("fileChanged()"))
@@ -173,11 +188,6 @@ class NFile(QObject):
                                            "file but no one told me where")
         swap_save_path = "%s.nsp" % save_path
 
-        # If we have a file system watcher, remove the file path
-        # from its watch list until we are done making changes.
-        if self.__watcher:
-            self.__watcher.removePath(save_path)
-
         flags = QIODevice.WriteOnly | QIODevice.Truncate
         f = QFile(swap_save_path)
         if settings.use_platform_specific_eol():
@@ -202,19 +212,46 @@ class NFile(QObject):
         shutil.move(swap_save_path, save_path)
         self.reset_state()
 
-        # If we have a file system watcher, add the saved path back
-        # to its watch list, otherwise create a watcher and start
-        # watching
-        if self.__watcher:
-            if new_path:
-                self.__watcher.removePath(self.__watcher.files()[0])
-                self.__watcher.addPath(self._file_path)
-            else:
-                self.__watcher.addPath(save_path)
-        else:
-            self.start_watching()
+        # The changes of the save are ignored by _file_changed since the
+        # mtime is the one of the save, a new path is subscribed instead
+        # of the old one
+        self.start_watching()
         return self
 
+    def save_in_background(self, content, path=None):
+        """
+        Queue content to be written by the background saver, out of the UI
+        thread. savedInBackground is emitted once it was written, with the
+        reason of the failure or an empty string.
+        """
+        if path:
+            self.attach_to_path(path)
+        save_path = self._file_path
+        if not save_path:
+            raise NinjaNoFileNameException("I am asked to write a "
+                                           "file but no one told me where")
+        newline = '\n'
+        if settings.use_platform_specific_eol():
+            newline = os.linesep
+        job = SaveJob(save_path, content, get_file_encoding(content),
+                      newline, settings.SAVE_FSYNC)
+        #SIGNAL: Will save (temp, definitive) to warn folder to do something
+        self.emit(SIGNAL("willSave(QString, QString)"),
+                  swap_path(save_path), save_path)
+        # The changes of the file are ignored by _file_changed until the
+        # save is written
+        self.__saving += 1
+        NinjaFileSaver.save(self, job)
+        return self
+
+    def finish_save(self, job):
+        """Called by the background saver once job was written."""
+        self.__saving -= 1
+        if job.error is None and job.path == self._file_path:
+            self.reset_state()
+            self.start_watching()
+        self.emit(SIGNAL("savedInBackground(QString)"), job.error or '')
+
     def reset_state(self):
         """
         #FIXE: to have a ref to changed I need to have the doc here
@@ -237,6 +274,20 @@ class NFile(QObject):
             raise NinjaIOException(reason)
         return content
 
+    def is_large(self):
+        """Return True if the file has to be opened in large file mode."""
+        return self._exists() and is_large_file(self._file_path)
+
+    def read_chunks(self):
+        """
+        Return an iterator over the content of the file in pieces, to load
+        large files without reading them at once
+        """
+        if not self._file_path:
+            raise NinjaNoFileNameException("I am asked to read a "
+                                           "file but no one told me from where")
+        return read_file_chunks(self._file_path)
+
     def move(self, new_path):
         """
         Phisically move the file
@@ -257,12 +308,10 @@ class NFile(QObject):
                     signal_handler, self._file_path, new_path)
                 if signal_handler.stopped():
                     return
-            if self.__watcher:
-                self.__watcher.removePath(self._file_path)
             shutil.move(self._file_path, new_path)
-            if self.__watcher:
-                self.__watcher.addPath(new_path)
         self._file_path = new_path
+        if self.__watched_path is not None and self._exists():
+            self.start_watching()
         return
 
     def copy(self, new_path):
@@ -298,8 +347,7 @@ class NFile(QObject):
             self.emit(SIGNAL("willDelete(PyQt_PyObject, PyQt_PyObject)"),
                       signal_handler, self)
             if not signal_handler.stopped():
-                if self.__watcher:
-                    self.__watcher.removePath(self._file_path)
+                self.remove_watcher()
                 os.remove(self._file_path)
 
     def close(self, force_close=False):
@@ -313,5 +361,48 @@ class NFile(QObject):
                   self._file_path, force_close)
 
     def remove_watcher(self):
-        if self.__watcher:
-            self.__watcher.removePath(self._file_path)
+        if self.__watched_path is not None:
+            watcher = filesystem_notifications.NinjaFileSystemWatcher
+            watcher.remove_file_watch(self.__watched_path,
+                                      self._file_changed)
+            self.__watched_path = None
+
+
+class BackgroundSaver(QObject):
+    """
+    Write the content saved by the NFiles in the threads of a SavePool,
+    the NFiles are notified in the UI thread once it was written.
+    SIGNALS:
+    @jobWritten(PyQt_PyObject)
+    """
+
+    def __init__(self):
+        super(BackgroundSaver, self).__init__()
+        self.__nfiles = {}
+        self.__pool = SavePool(self._job_written)
+        self.connect(self, SIGNAL("jobWritten(PyQt_PyObject)"),
+                     self._notify, Qt.QueuedConnection)
+
+    def save(self, nfile, job):
+        self.__nfiles[job] = nfile
+        self.__pool.save(job)
+
+    def batch(self):
+        """Context manager to write the saves inside it as one batch."""
+        return self.__pool.batch()
+
+    def wait(self):
+        """Block until the saves queued were written."""
+        self.__pool.wait()
+
+    def _job_written(self, job):
+        # Called from the threads of the pool
+        self.emit(SIGNAL("jobWritten(PyQt_PyObject)"), job)
+
+    def _notify(self, job):
+        nfile = self.__nfiles.pop(job, None)
+        if nfile is not None:
+            nfile.finish_save(job)
+
+
+NinjaFileSaver = BackgroundSaver()
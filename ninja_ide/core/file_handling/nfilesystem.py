@@ -19,6 +19,10 @@ import os
 from PyQt4.QtCore import QObject, QDir, SIGNAL
 from PyQt4.QtGui import QFileSystemModel
 from ninja_ide.core.file_handling.nfile import NFile
+from ninja_ide.core.file_handling import filesystem_notifications
+from ninja_ide.core.file_handling.filesystem_notifications import (
+    base_watcher)
+from ninja_ide.core.file_handling.path_trie import PathTrie
 from ninja_ide.tools.logger import NinjaLogger
 logger = NinjaLogger('ninja_ide.core.file_handling.nfilesystem')
 
@@ -28,8 +32,10 @@ class NVirtualFileSystem(QObject):
         self.__tree = {}
         self.__watchables = {}
         self.__projects = {}
-        # bc maps are cheap but my patience is not
-        self.__reverse_project_map = {}
+        # The projects and the files by the components of their paths, the
+        # project of a file is the deepest project containing it
+        self.__project_trie = PathTrie()
+        self.__file_trie = PathTrie()
         super(NVirtualFileSystem, self).__init__(*args, **kwargs)
 
     def list_projects(self):
@@ -49,12 +55,28 @@ class NVirtualFileSystem(QObject):
             logger.debug(pext)
             qfsm.setNameFilters(pext)
             self.__projects[project_path] = project
-            self.__check_files_for(project_path)
+            self.__project_trie.add(project_path, project)
+            filesystem_notifications.NinjaFileSystemWatcher.add_watch(
+                project_path, self.__project_changed)
             self.emit(SIGNAL("projectOpened(QString)"), project_path)
         else:
             qfsm = self.__projects[project_path]
         return qfsm
 
+    def __project_changed(self, event, path):
+        """Show in the tree of the project the files added to it."""
+        if event != base_watcher.ADDED:
+            return
+        project = self.__project_trie.closest(path)
+        qfsm = getattr(project, 'model', None)
+        if qfsm is None:
+            return
+        # Looking the file up adds it to its folder if it was listed, the
+        # folders not listed yet show their files once expanded
+        folder = qfsm.index(os.path.dirname(path))
+        if folder.isValid() and not qfsm.canFetchMore(folder):
+            qfsm.index(path)
+
     def refresh_name_filters(self, project):
         qfsm = project.model
         if qfsm:
@@ -65,41 +87,33 @@ class NVirtualFileSystem(QObject):
     def close_project(self, project_path):
         if project_path in self.__projects:
             project_root = self.__projects[project_path]
-            nfiles = list(self.__tree.values())
-            for nfile in nfiles:
-                if self.__reverse_project_map[nfile] == project_root:
-                    del self.__tree[nfile.file_path]
+            for file_path, nfile in list(self.__file_trie.items(project_path)):
+                # The files of a project inside this one are kept
+                if self.__project_trie.closest(file_path) is project_root:
+                    self.__file_trie.remove(file_path)
+                    self.__tree.pop(file_path, None)
                     nfile.close()
+            self.__project_trie.remove(project_path)
             #This might not be needed just being extra cautious
             del self.__projects[project_path].model
             del self.__projects[project_path]
+            filesystem_notifications.NinjaFileSystemWatcher.remove_watch(
+                project_path, self.__project_changed)
             self.emit(SIGNAL("projectClosed(QString)"), project_path)
 
-    def __check_files_for(self, project_path):
-        project = self.__projects[project_path]
-        for each_file_path in list(self.__tree.keys()):
-            nfile = self.__tree[each_file_path]
-            if nfile.file_path.startswith(project_path):
-                self.__reverse_project_map[nfile] = project
-
     def __closed_file(self, nfile_path):
         if nfile_path in self.__tree:
             del self.__tree[nfile_path]
-        if nfile_path in self.__reverse_project_map:
-            del self.__reverse_project_map[nfile_path]
+            self.__file_trie.remove(nfile_path)
         if nfile_path in self.__watchables:
             del self.__watchables[nfile_path]
 
     def __add_file(self, nfile):
         self.connect(nfile, SIGNAL("fileClosing(QString, bool)"),
                      self.__closed_file)
-        existing_paths = sorted(list(self.__projects.keys()), reverse=True)
         self.__tree[nfile.file_path] = nfile
-        for each_path in existing_paths:
-            if nfile.file_path.startswith(each_path):
-                project = self.__projects[each_path]
-                self.__reverse_project_map[nfile] = project
-                return project
+        self.__file_trie.add(nfile.file_path, nfile)
+        return self.__project_trie.closest(nfile.file_path)
 
     def get_file(self, nfile_path=None):
         if nfile_path is None:
@@ -126,9 +140,9 @@ class NVirtualFileSystem(QObject):
         return self.__projects
 
     def get_project_for_file(self, filename):
-        nfile = self.get_file(filename)
-        project = self.__reverse_project_map.get(nfile, None)
-        return project
+        if not filename:
+            return None
+        return self.__project_trie.closest(filename)
 
     def get_files(self):
         return self.__tree
\ No newline at end of file
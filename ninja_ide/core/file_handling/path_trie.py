@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Map of paths to values organized by the components of the paths.
+
+Finding the value of the deepest path containing another one (the project
+of a file) and the values of the paths inside a folder (the opened files
+of a project) cost as much as the depth of the path, whatever the number
+of paths stored.
+
+This module doesn't depend on Qt."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+
+
+def split_path(path):
+    """Return the components of path, the separators are ignored."""
+    if os.altsep:
+        path = path.replace(os.altsep, os.sep)
+    return [part for part in path.split(os.sep) if part]
+
+
+class _Node(object):
+    __slots__ = ('children', 'item')
+
+    def __init__(self):
+        self.children = {}
+        # (path, value) when a path ends in this node
+        self.item = None
+
+
+class PathTrie(object):
+    """Paths (with the components of a folder as prefix) to values."""
+
+    def __init__(self):
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, path):
+        node = self._find(path)
+        return node is not None and node.item is not None
+
+    def _find(self, path):
+        node = self._root
+        for part in split_path(path):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def add(self, path, value):
+        """Set the value of path, replacing the previous one."""
+        node = self._root
+        for part in split_path(path):
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _Node()
+            node = child
+        if node.item is None:
+            self._size += 1
+        node.item = (path, value)
+
+    def get(self, path, default=None):
+        node = self._find(path)
+        if node is None or node.item is None:
+            return default
+        return node.item[1]
+
+    def remove(self, path):
+        """Remove path and return its value, or None if it isn't stored."""
+        node = self._root
+        visited = []
+        for part in split_path(path):
+            visited.append((node, part))
+            node = node.children.get(part)
+            if node is None:
+                return None
+        if node.item is None:
+            return None
+        value = node.item[1]
+        node.item = None
+        self._size -= 1
+        # Prune the branch left empty
+        for parent, part in reversed(visited):
+            child = parent.children[part]
+            if child.children or child.item is not None:
+                break
+            del parent.children[part]
+        return value
+
+    def closest(self, path, default=None):
+        """Return the value of path or of the deepest path containing it."""
+        node = self._root
+        value = default
+        if node.item is not None:
+            value = node.item[1]
+        for part in split_path(path):
+            node = node.children.get(part)
+            if node is None:
+                break
+            if node.item is not None:
+                value = node.item[1]
+        return value
+
+    def items(self, path=''):
+        """Yield the (path, value) of path and of the paths inside it."""
+        node = self._find(path)
+        if node is None:
+            return
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if node.item is not None:
+                yield node.item
+            pending.extend(node.children.values())
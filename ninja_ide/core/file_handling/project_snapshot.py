@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Snapshot of the folders of a project and of the files with the
+extensions of the project.
+
+A project is scanned with scandir (see project_walker, whose rules it
+follows besides including the hidden entries), keeping the modification
+time of each folder and the (mtime, size) of each file. The snapshot is
+saved per project and refreshed incrementally when the project is opened
+again: only the folders whose modification time changed (entries added,
+removed or renamed) are listed again, the rest and their files are only
+stat (with their .gitignore, a folder whose .gitignore changed is listed
+again with all its subfolders), so the (mtime, size) of every file is
+current after a refresh. The excludes of the project are saved
+with the snapshot, which is discarded when they change.
+
+This module doesn't depend on Qt."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import json
+import time
+import hashlib
+
+from ninja_ide.core.file_handling import project_walker
+
+
+SNAPSHOT_VERSION = 2
+# Folders modified this recently (seconds) are listed again on refresh,
+# a change in the same tick of their mtime wouldn't be noticed
+RACY_INTERVAL = 2
+
+
+def snapshot_path(folder, project_path):
+    """Return the path of the saved snapshot of project_path."""
+    key = hashlib.sha1(project_path.encode('utf-8')).hexdigest()
+    return os.path.join(folder, key + '.json')
+
+
+def matches_extensions(name, extensions):
+    """Check if the file name has one of extensions ('.*' for any of them,
+    '*' for no extension, the ones starting with '-' are ignored)."""
+    extension = os.path.splitext(name.lower())[-1]
+    if extension:
+        return extension in extensions or '.*' in extensions
+    return '*' in extensions
+
+
+def ignore_stamp(folder):
+    """Return the (mtime, size) of the .gitignore of folder, () if it has
+    none."""
+    try:
+        file_stat = os.stat(os.path.join(folder, project_walker.IGNORE_FILE))
+    except OSError:
+        return ()
+    return (file_stat.st_mtime, file_stat.st_size)
+
+
+class FolderSnapshot(object):
+    """The subfolders and the files (name -> (mtime, size)) of a folder,
+    and the ignore_stamp of the folder when it was listed."""
+
+    __slots__ = ('mtime', 'folders', 'files', 'ignore')
+
+    def __init__(self, mtime, folders, files, ignore=None):
+        # None when the folder has to be listed again
+        self.mtime = mtime
+        self.folders = folders
+        self.files = files
+        # None when the rules of the subfolders have to be checked again
+        self.ignore = ignore
+
+
+class ProjectSnapshot(object):
+    """The folders (relative to root, '' for root, '/' separated) of a
+    project with the files matching its extensions."""
+
+    def __init__(self, root, extensions, excludes=()):
+        self.root = root
+        self.extensions = sorted(set(
+            extension.lower() for extension in extensions
+            if not extension.startswith('-')))
+        self.excludes = list(excludes or ())
+        self.folders = {}
+
+    def refresh(self, cancelled=None):
+        """Scan the project again, listing only the folders changed.
+        Return True if anything changed, the snapshot is kept as it was
+        if the scan is cancelled (cancelled() returns True)."""
+        rules = project_walker.IgnoreRules(self.root, self.excludes)
+        now = time.time()
+        folders = {}
+        visited = set()
+        # (folder, True if the rules of its folders changed)
+        pending = [('', False)]
+        changed = False
+        while pending:
+            if cancelled is not None and cancelled():
+                return False
+            relative, rules_changed = pending.pop()
+            folder = os.path.join(self.root, *relative.split('/'))
+            try:
+                folder_stat = os.stat(folder)
+            except OSError:
+                continue
+            # Each folder is visited once, links can make cycles
+            identity = project_walker.folder_identity(folder,
+                                                     folder_stat)
+            if identity in visited:
+                continue
+            visited.add(identity)
+            snapshot = self.folders.get(relative)
+            ignore = ignore_stamp(folder)
+            if snapshot is not None and snapshot.ignore != ignore:
+                # The .gitignore rules apply to all the subfolders
+                rules_changed = True
+            if (snapshot is None or rules_changed or
+                    snapshot.mtime != folder_stat.st_mtime):
+                try:
+                    snapshot = self._scan_folder(folder, relative, rules)
+                except OSError:
+                    continue
+                if now - folder_stat.st_mtime >= RACY_INTERVAL:
+                    snapshot.mtime = folder_stat.st_mtime
+                if not ignore or now - ignore[0] >= RACY_INTERVAL:
+                    snapshot.ignore = ignore
+                old_snapshot = self.folders.get(relative)
+                changed = changed or old_snapshot is None or (
+                    old_snapshot.folders != snapshot.folders or
+                    old_snapshot.files != snapshot.files)
+            else:
+                # The files written in place don't change the folder
+                files = self._stat_files(folder, snapshot.files)
+                if files != snapshot.files:
+                    changed = True
+                    snapshot = FolderSnapshot(snapshot.mtime,
+                                              snapshot.folders, files,
+                                              snapshot.ignore)
+            folders[relative] = snapshot
+            for name in reversed(snapshot.folders):
+                if relative:
+                    name = relative + '/' + name
+                pending.append((name, rules_changed))
+        changed = changed or len(folders) != len(self.folders)
+        self.folders = folders
+        return changed
+
+    def _scan_folder(self, folder, relative, rules):
+        folder_entries, file_entries = project_walker.filter_entries(
+            project_walker.list_folder(folder), relative, rules, hidden=True)
+        files = {}
+        for entry in file_entries:
+            if not matches_extensions(entry.name, self.extensions):
+                continue
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                continue
+            files[entry.name] = (file_stat.st_mtime, file_stat.st_size)
+        return FolderSnapshot(None, [entry.name for entry in folder_entries],
+                              files)
+
+    def _stat_files(self, folder, files):
+        stats = {}
+        for name in files:
+            try:
+                file_stat = os.stat(os.path.join(folder, name))
+            except OSError:
+                continue
+            stats[name] = (file_stat.st_mtime, file_stat.st_size)
+        return stats
+
+    def iter_files(self, hidden=False, max_size=None):
+        """Yield the (path, (mtime, size)) of the files of the snapshot,
+        like project_walker.iter_files with the same arguments."""
+        for relative in sorted(self.folders):
+            if not hidden and any(name.startswith('.')
+                                  for name in relative.split('/')):
+                continue
+            folder = self.root
+            if relative:
+                folder = os.path.join(self.root, *relative.split('/'))
+            files = self.folders[relative].files
+            for name in sorted(files):
+                if not hidden and name.startswith('.'):
+                    continue
+                if max_size is not None and files[name][1] > max_size:
+                    continue
+                yield os.path.join(folder, name), files[name]
+
+    def structure(self):
+        """Return {folder path: [file names, folder names]}, sorted."""
+        structure = {}
+        for relative, snapshot in self.folders.items():
+            folder = self.root
+            if relative:
+                folder = os.path.join(self.root, *relative.split('/'))
+            structure[folder] = [sorted(snapshot.files),
+                                 list(snapshot.folders)]
+        return structure
+
+    def save(self, path):
+        """Write the snapshot to path (replaced when it is written)."""
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'root': self.root,
+            'extensions': self.extensions,
+            'excludes': self.excludes,
+            'folders': dict(
+                (relative, [snapshot.mtime, snapshot.folders,
+                            snapshot.files, snapshot.ignore])
+                for relative, snapshot in self.folders.items())}
+        folder = os.path.dirname(path)
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(data, f)
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)
+        os.rename(temporary, path)
+
+
+def load_snapshot(path, root, extensions, excludes=()):
+    """Return the ProjectSnapshot saved in path, empty if it can't be read
+    or was taken with other extensions or excludes."""
+    snapshot = ProjectSnapshot(root, extensions, excludes)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (IOError, OSError, ValueError):
+        return snapshot
+    if (data.get('version') != SNAPSHOT_VERSION or
+            data.get('root') != root or
+            data.get('extensions') != snapshot.extensions or
+            data.get('excludes') != snapshot.excludes):
+        return snapshot
+    for relative, (mtime, folders, files, ignore) in data['folders'].items():
+        files = dict((name, tuple(stat)) for name, stat in files.items())
+        if ignore is not None:
+            ignore = tuple(ignore)
+        snapshot.folders[relative] = FolderSnapshot(mtime, folders, files,
+                                                    ignore)
+    return snapshot
+
+
+def scan_project(root, extensions, excludes=(), path=None, cancelled=None):
+    """Return the ProjectSnapshot of root, refreshing (and saving again)
+    the one saved in path if given."""
+    if path is None:
+        snapshot = ProjectSnapshot(root, extensions, excludes)
+        snapshot.refresh(cancelled)
+        return snapshot
+    snapshot = load_snapshot(path, root, extensions, excludes)
+    if snapshot.refresh(cancelled) or not os.path.exists(path):
+        try:
+            snapshot.save(path)
+        except (IOError, OSError):
+            # Just a cache, the project is scanned again next time
+            pass
+    return snapshot
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Walk the files of a project skipping the ones nobody wants indexed.
+
+The walker is shared by find in files, the locator, the completion daemon
+and the project tree. It honors .gitignore files, the excludes of the
+project (the 'excludes' list of the .nja file, with the same syntax) and
+EXCLUDED_BY_DEFAULT, skips virtualenvs, follows symbolic links to folders
+only once (avoiding cycles) and can skip binary and big files.
+
+This module doesn't depend on Qt."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import re
+import stat
+import fnmatch
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # Python 2 with the scandir package installed
+        from scandir import scandir  # lint:ok
+    except ImportError:
+        scandir = None
+
+
+IGNORE_FILE = '.gitignore'
+# Rules (.gitignore syntax) applied to every project, the build outputs
+# are excluded by the projects (see settings.PROJECT_EXCLUDES)
+EXCLUDED_BY_DEFAULT = [
+    '.git/', '.hg/', '.svn/', '.bzr/', '__pycache__/', 'node_modules/',
+    '.tox/', '*.egg-info/', '*.pyc', '*.pyo']
+# Entries of a folder that make it a virtualenv
+VIRTUALENV_MARKERS = [
+    'pyvenv.cfg', os.path.join('bin', 'activate'),
+    os.path.join('Scripts', 'activate')]
+# Bytes read at the start of a file to know if it is binary
+BINARY_CHECK_SIZE = 8192
+# Biggest file searched or indexed (the consumers pass it as max_size)
+MAX_FILE_SIZE = 5 * 1024 * 1024
+
+
+def _translate(pattern):
+    """Translate a glob of a rule into a regex matching relative paths."""
+    result = []
+    index = 0
+    length = len(pattern)
+    while index < length:
+        char = pattern[index]
+        if pattern.startswith('**/', index):
+            result.append('(?:.*/)?')
+            index += 3
+            continue
+        if pattern.startswith('/**', index) and index + 3 == length:
+            result.append('(?:/.*)?')
+            index += 3
+            continue
+        if pattern.startswith('**', index):
+            result.append('.*')
+            index += 2
+            continue
+        if char == '*':
+            result.append('[^/]*')
+        elif char == '?':
+            result.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', index + 1)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                group = pattern[index + 1:end]
+                if group.startswith('!'):
+                    group = '^' + group[1:]
+                result.append('[%s]' % group.replace('\\', '\\\\'))
+                index = end
+        elif char == '\\' and index + 1 < length:
+            index += 1
+            result.append(re.escape(pattern[index]))
+        else:
+            result.append(re.escape(char))
+        index += 1
+    return '^%s$' % ''.join(result)
+
+
+class IgnoreRule(object):
+    """A line of a .gitignore file."""
+
+    def __init__(self, pattern):
+        self.negated = pattern.startswith('!')
+        if self.negated:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # With a slash (besides the trailing one) the pattern is relative
+        # to the folder of the rule, otherwise it matches names
+        self.anchored = '/' in pattern
+        self.regex = re.compile(_translate(pattern.lstrip('/')))
+
+    def matches(self, relative_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if self.anchored:
+            return self.regex.match(relative_path) is not None
+        name = relative_path.rsplit('/', 1)[-1]
+        return self.regex.match(name) is not None
+
+
+def parse_rules(lines):
+    """Return the IgnoreRules of the lines of a .gitignore file."""
+    rules = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        rules.append(IgnoreRule(line))
+    return rules
+
+
+class IgnoreRules(object):
+    """The rules applied to the files of the folder root.
+
+    The .gitignore files are read as the folders are checked, a path is
+    checked against the rules of root and then of each of its folders,
+    the last rule matching decides."""
+
+    def __init__(self, root, excludes=(), use_gitignore=True):
+        self.root = root
+        self.use_gitignore = use_gitignore
+        self._root_rules = parse_rules(list(EXCLUDED_BY_DEFAULT) +
+                                       list(excludes or ()))
+        # relative folder -> rules of its .gitignore
+        self._folders_rules = {}
+
+    def _rules_for(self, relative_folder):
+        rules = self._folders_rules.get(relative_folder)
+        if rules is None:
+            rules = []
+            if self.use_gitignore:
+                ignore_file = os.path.join(self.root, relative_folder,
+                                           IGNORE_FILE)
+                try:
+                    with open(ignore_file, 'rb') as f:
+                        rules = parse_rules(
+                            f.read().decode('utf-8', 'replace').splitlines())
+                except (IOError, OSError):
+                    pass
+            self._folders_rules[relative_folder] = rules
+        return rules
+
+    def is_ignored(self, relative_path, is_dir):
+        """Check relative_path ('/' separated, relative to root), its
+        folders are supposed not to be ignored (as while walking)."""
+        ignored = False
+        for rule in self._root_rules:
+            if rule.matches(relative_path, is_dir):
+                ignored = not rule.negated
+        parts = relative_path.split('/')
+        for depth in range(len(parts)):
+            folder = '/'.join(parts[:depth])
+            rules = self._rules_for(folder.replace('/', os.sep))
+            if not rules:
+                continue
+            path = '/'.join(parts[depth:])
+            for rule in rules:
+                if rule.matches(path, is_dir):
+                    ignored = not rule.negated
+        return ignored
+
+    def is_excluded(self, path):
+        """Check if path (inside root) or any of its folders is ignored."""
+        relative = os.path.relpath(path, self.root)
+        if relative == os.curdir or relative.startswith(os.pardir):
+            return False
+        parts = relative.split(os.sep)
+        for depth in range(1, len(parts) + 1):
+            current = os.path.join(self.root, *parts[:depth])
+            is_dir = depth < len(parts) or os.path.isdir(current)
+            if self.is_ignored('/'.join(parts[:depth]), is_dir):
+                return True
+            if is_dir and is_virtualenv(current):
+                return True
+        return False
+
+
+class _Entry(object):
+    """Minimal os.DirEntry for the platforms without scandir."""
+
+    def __init__(self, folder, name):
+        self.name = name
+        self.path = os.path.join(folder, name)
+
+    def is_dir(self):
+        return os.path.isdir(self.path)
+
+    def is_file(self):
+        return os.path.isfile(self.path)
+
+    def is_symlink(self):
+        return os.path.islink(self.path)
+
+    def stat(self):
+        return os.stat(self.path)
+
+
+def list_folder(folder):
+    """Return the entries of folder (os.DirEntry or alike)."""
+    if scandir is not None:
+        return list(scandir(folder))
+    return [_Entry(folder, name) for name in os.listdir(folder)]
+
+
+def is_virtualenv(folder):
+    for marker in VIRTUALENV_MARKERS:
+        if os.path.exists(os.path.join(folder, marker)):
+            return True
+    return False
+
+
+def is_binary(file_path):
+    """Check if file_path has a NUL byte in its first bytes."""
+    try:
+        with open(file_path, 'rb') as f:
+            return b'\0' in f.read(BINARY_CHECK_SIZE)
+    except (IOError, OSError):
+        return True
+
+
+def match_filters(name, filters):
+    """Check if name matches any of filters (lowercase glob patterns)."""
+    if not filters:
+        return True
+    name = name.lower()
+    for name_filter in filters:
+        if fnmatch.fnmatch(name, name_filter):
+            return True
+    return False
+
+
+def filter_entries(entries, relative_folder, rules, filters=None,
+                   recursive=True, hidden=False, max_size=None,
+                   skip_binary=False, visited=None):
+    """Return the (folders, files) entries of a folder walk() keeps,
+    sorted by name. relative_folder is the folder relative to the root of
+    rules ('/' separated), filters are lowercase glob patterns and visited
+    the identities of the folders already listed (None to keep them)."""
+    folders = []
+    files = []
+    for entry in sorted(entries, key=lambda entry: entry.name):
+        name = entry.name
+        if not hidden and name.startswith('.'):
+            continue
+        relative = name
+        if relative_folder:
+            relative = relative_folder + '/' + name
+        try:
+            is_dir = entry.is_dir()
+            if is_dir:
+                if not recursive or rules.is_ignored(relative, True):
+                    continue
+                if is_virtualenv(entry.path):
+                    continue
+                if visited is not None:
+                    # Each folder is visited once, links can make cycles
+                    identity = folder_identity(entry.path, entry.stat())
+                    if identity in visited:
+                        continue
+                    visited.add(identity)
+                folders.append(entry)
+            elif entry.is_file():
+                if (not match_filters(name, filters) or
+                        rules.is_ignored(relative, False)):
+                    continue
+                if (max_size is not None and
+                        entry.stat().st_size > max_size):
+                    continue
+                if skip_binary and is_binary(entry.path):
+                    continue
+                files.append(entry)
+        except OSError:
+            # Broken link or removed while walking
+            continue
+    return folders, files
+
+
+def walk(root, filters=None, excludes=(), recursive=True, hidden=False,
+         max_size=None, skip_binary=False, use_gitignore=True,
+         cancelled=None, rules=None):
+    """Yield (folder, folders, files) for root and its folders, top down
+    and sorted by name like os.walk, with the entries to skip removed.
+
+    filters: glob patterns (case insensitive) the file names must match.
+    excludes: .gitignore like rules (for example the project excludes).
+    hidden: include the files and folders starting with a dot.
+    max_size: skip the files bigger than max_size bytes.
+    skip_binary: skip the files that look binary (reads their start).
+    cancelled: callable, the walk stops when it returns True.
+    rules: IgnoreRules of root or of a folder containing it (its project),
+    used instead of excludes and use_gitignore."""
+    if rules is None:
+        rules = IgnoreRules(root, excludes, use_gitignore)
+    relative_root = os.path.relpath(root, rules.root)
+    if relative_root == os.curdir or relative_root.startswith(os.pardir):
+        relative_root = ''
+    filters = [name_filter.lower() for name_filter in (filters or ())
+               if name_filter]
+    try:
+        visited = set([folder_identity(root, os.stat(root))])
+    except OSError:
+        return
+    pending = [(root, relative_root.replace(os.sep, '/'))]
+    while pending:
+        if cancelled is not None and cancelled():
+            return
+        folder, relative_folder = pending.pop()
+        try:
+            entries = list_folder(folder)
+        except OSError:
+            continue
+        folder_entries, file_entries = filter_entries(
+            entries, relative_folder, rules, filters, recursive, hidden,
+            max_size, skip_binary, visited)
+        folders = [entry.name for entry in folder_entries]
+        files = [entry.name for entry in file_entries]
+        yield folder, folders, files
+        for name in reversed(folders):
+            relative = name
+            if relative_folder:
+                relative = relative_folder + '/' + name
+            pending.append((os.path.join(folder, name), relative))
+
+
+def folder_identity(path, file_stat=None):
+    """Return what identifies the folder at path, to find cycles.
+    file_stat is the stat of path if it was already taken."""
+    if file_stat is None or not file_stat.st_ino:
+        # The stat of a Windows DirEntry has no inode, os.stat fills it
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            file_stat = None
+    if (file_stat is not None and stat.S_ISDIR(file_stat.st_mode) and
+            file_stat.st_ino):
+        return (file_stat.st_dev, file_stat.st_ino)
+    # Without inodes (some file systems) the real path identifies it
+    return os.path.normcase(os.path.realpath(path))
+
+
+def iter_files(root, filters=None, **kwargs):
+    """Yield the paths of the files walk() would list."""
+    for folder, _, files in walk(root, filters, **kwargs):
+        for name in files:
+            yield os.path.join(folder, name)
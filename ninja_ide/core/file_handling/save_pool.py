@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Write of the saved files out of the UI thread.
+
+The editor takes a snapshot of its content in a SaveJob and a SavePool
+thread encodes and writes it: to a swap file next to the original
+(.nsp), flushed to the disk if requested, and then renamed over the
+original, so a failed save never leaves a file half written. The jobs
+queued together (a save all) are written as a batch: all the swap files
+first, then flushed, then renamed.
+
+The jobs of a file always go to the same thread, so the saves of a file
+are written in the order they were made.
+
+This module doesn't depend on Qt."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import codecs
+import shutil
+import threading
+import contextlib
+from collections import OrderedDict
+
+try:
+    from queue import Queue, Empty
+except ImportError:
+    # Python 2
+    from Queue import Queue, Empty  # lint:ok
+
+
+# Threads writing files
+SAVE_WORKERS = 2
+
+
+class SaveJob(object):
+    """The content of a file to write, mtime and error are set once
+    the job was written."""
+
+    def __init__(self, path, content, encoding='utf-8', newline='\n',
+                 fsync=False):
+        self.path = path
+        self.content = content
+        self.encoding = encoding
+        self.newline = newline
+        self.fsync = fsync
+        # mtime of the written file, or the reason of the failure
+        self.mtime = None
+        self.error = None
+
+
+def swap_path(file_path):
+    """Return the path of the swap file (Ninja Swap File) of file_path."""
+    return "%s.nsp" % file_path
+
+
+def encode_content(content, encoding='utf-8', newline='\n'):
+    """Return content encoded to write it, with newline as line ending.
+    Unknown encodings fall back to UTF-8."""
+    if newline != '\n':
+        content = content.replace('\n', newline)
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = 'utf-8'
+    return content.encode(encoding, 'replace')
+
+
+def _rename(source, target):
+    """Rename source to target replacing target atomically."""
+    if hasattr(os, 'replace'):
+        os.replace(source, target)
+        return
+    # Python 2, rename only replaces an existing file on POSIX
+    if os.name == 'nt' and os.path.exists(target):
+        os.remove(target)
+    os.rename(source, target)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_swap(job):
+    swap = swap_path(job.path)
+    with open(swap, 'wb') as f:
+        f.write(encode_content(job.content, job.encoding, job.newline))
+    if os.path.exists(job.path):
+        shutil.copymode(job.path, swap)
+    return swap
+
+
+def _fsync(path):
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_folder(folder):
+    """Flush the renames of folder, where the system allows it."""
+    if os.name == 'nt':
+        return
+    try:
+        descriptor = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def write_files(jobs):
+    """Write the SaveJobs, setting their mtime or error.
+
+    The swap files are written first, then flushed (the jobs with fsync)
+    and then renamed over the originals. If a path was saved more than
+    once only its last content is written."""
+    latest = OrderedDict()
+    for job in jobs:
+        latest[job.path] = job
+    written = []
+    for job in latest.values():
+        swap = swap_path(job.path)
+        try:
+            _write_swap(job)
+            if job.fsync:
+                _fsync(swap)
+        except (IOError, OSError) as reason:
+            job.error = '%s' % reason
+            _remove(swap)
+            continue
+        written.append(job)
+    folders = set()
+    for job in written:
+        try:
+            _rename(swap_path(job.path), job.path)
+            job.mtime = os.path.getmtime(job.path)
+        except (IOError, OSError) as reason:
+            job.error = '%s' % reason
+            _remove(swap_path(job.path))
+            continue
+        if job.fsync:
+            folders.add(os.path.dirname(job.path))
+    for folder in folders:
+        _fsync_folder(folder)
+    for job in jobs:
+        last = latest[job.path]
+        job.mtime, job.error = last.mtime, last.error
+    return jobs
+
+
+class SavePool(object):
+    """Threads writing SaveJobs, callback(job) is called from the thread
+    of the job once it was written."""
+
+    def __init__(self, callback, workers=SAVE_WORKERS):
+        self._callback = callback
+        self._queues = [Queue() for _ in range(workers)]
+        self._threads = []
+        # Jobs held by batch
+        self._batch = None
+
+    def _start(self):
+        if self._threads:
+            return
+        for queue in self._queues:
+            thread = threading.Thread(target=self._work, args=(queue,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def save(self, job):
+        """Queue job to be written."""
+        if self._batch is not None:
+            self._batch.append(job)
+        else:
+            self._put([job])
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Hold the jobs saved inside the block to write them together."""
+        if self._batch is not None:
+            yield
+            return
+        self._batch = []
+        try:
+            yield
+        finally:
+            jobs, self._batch = self._batch, None
+            if jobs:
+                self._put(jobs)
+
+    def _put(self, jobs):
+        self._start()
+        groups = {}
+        for job in jobs:
+            index = hash(os.path.normcase(job.path)) % len(self._queues)
+            groups.setdefault(index, []).append(job)
+        for index, group in groups.items():
+            self._queues[index].put(group)
+
+    def wait(self):
+        """Block until all the jobs queued were written."""
+        for queue in self._queues:
+            queue.join()
+
+    def stop(self):
+        """Write the jobs queued and stop the threads."""
+        for queue in self._queues:
+            if self._threads:
+                queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _work(self, queue):
+        stop = False
+        while not stop:
+            # The groups queued while writing are written as one batch
+            groups = [queue.get()]
+            while True:
+                try:
+                    groups.append(queue.get_nowait())
+                except Empty:
+                    break
+            stop = None in groups
+            jobs = [job for group in groups if group is not None
+                    for job in group]
+            try:
+                if jobs:
+                    write_files(jobs)
+                for job in jobs:
+                    try:
+                        self._callback(job)
+                    except Exception:
+                        # A failing callback must not stop the thread
+                        continue
+            finally:
+                for _ in groups:
+                    queue.task_done()
@@ -18,7 +18,6 @@
 
 import os
 import sys
-import datetime
 
 from PyQt4.QtGui import QFont
 from PyQt4.QtCore import QSettings
@@ -148,8 +147,6 @@ LAST_OPENED_FILES = []
 
 NOTIFICATION_POSITION = 0
 
-LAST_CLEAN_LOCATOR = None
-
 
 ###############################################################################
 # EDITOR
@@ -177,6 +174,15 @@ CODE_COMPLETION = COMPLETE_DECLARATIONS = SHOW_MIGRATION_TIPS = True
 UNDERLINE_NOT_BACKGROUND = VALID_2TO3 = CENTER_ON_SCROLL = True
 SHOW_LINE_NUMBERS = True
 
+# Files of this size (in bytes) or bigger are opened in large file mode:
+# loaded by chunks, read only, without highlighting, folding, checkers or
+# symbols (0: never)
+LARGE_FILE_SIZE = 10 * 1024 * 1024
+
+# Flush the saved files to the disk (fsync) before replacing the originals,
+# once for all the files of a save all
+SAVE_FSYNC = True
+
 SYNTAX = {}
 EXTENSIONS = {}
 BREAKPOINTS = {}
@@ -216,6 +222,28 @@ SUPPORTED_EXTENSIONS = [
     '.js',
     '.ini']
 
+# Excludes (.gitignore syntax) of the projects that don't set theirs
+PROJECT_EXCLUDES = ['build/', 'dist/']
+
+
+###############################################################################
+# LOCATOR
+###############################################################################
+
+# Worker processes used to index the projects symbols (0: one per CPU)
+LOCATOR_PROCESSES = 0
+
+
+###############################################################################
+# FIND IN FILES
+###############################################################################
+
+# Keep a trigram index of the content of each project (in the knowledge
+# folder) to search only the files that can match
+CONTENT_INDEX = False
+# Lines found shown before asking to show more (0: all of them)
+FIND_IN_FILES_MAX_RESULTS = 5000
+
 
 ###############################################################################
 # PROJECTS DATA
@@ -337,27 +365,6 @@ def pep8mod_update_margin_line_length(new_margin_line):
 ###############################################################################
 
 
-def should_clean_locator_knowledge():
-    value = None
-    if LAST_CLEAN_LOCATOR is not None:
-        delta = datetime.date.today() - LAST_CLEAN_LOCATOR
-        if delta.days >= 10:
-            value = datetime.date.today()
-    elif LAST_CLEAN_LOCATOR is None:
-        value = datetime.date.today()
-    return value
-
-
-#Clean Locator Knowledge
-def clean_locator_db(qsettings):
-    last_clean = should_clean_locator_knowledge()
-    if last_clean is not None:
-        file_path = os.path.join(resources.NINJA_KNOWLEDGE_PATH, 'locator.db')
-        if os.path.isfile(file_path):
-            os.remove(file_path)
-        qsettings.setValue("preferences/general/cleanLocator", last_clean)
-
-
 def load_settings():
     qsettings = QSettings(resources.SETTINGS_PATH, QSettings.IniFormat)
     data_qsettings = QSettings(resources.DATA_SETTINGS_PATH,
@@ -374,6 +381,7 @@ def load_settings():
     global NINJA_SKIN
     global EXECUTION_OPTIONS
     global SUPPORTED_EXTENSIONS
+    global PROJECT_EXCLUDES
     global WORKSPACE
     global INDENT
     global USE_PLATFORM_END_OF_LINE
@@ -411,7 +419,11 @@ def load_settings():
     global SIZE_PROPORTION
     global NOTIFICATION_POSITION
     global NOTIFICATION_COLOR
-    global LAST_CLEAN_LOCATOR
+    global LOCATOR_PROCESSES
+    global CONTENT_INDEX
+    global FIND_IN_FILES_MAX_RESULTS
+    global LARGE_FILE_SIZE
+    global SAVE_FSYNC
     global SHOW_LINE_NUMBERS
     #General
     HIDE_TOOLBAR = qsettings.value("window/hide_toolbar", False, type=bool)
@@ -463,6 +475,8 @@ def load_settings():
         'preferences/general/supportedExtensions', []))]
     if extensions:
         SUPPORTED_EXTENSIONS = extensions
+    PROJECT_EXCLUDES = [item for item in tuple(qsettings.value(
+        'preferences/general/projectExcludes', PROJECT_EXCLUDES) or [])]
     WORKSPACE = qsettings.value(
         'preferences/general/workspace', "", type='QString')
     #Editor
@@ -562,8 +576,15 @@ def load_settings():
         'preferences/general/notification_position', 0, type=int)
     NOTIFICATION_COLOR = qsettings.value(
         'preferences/general/notification_color', "#000", type='QString')
-    LAST_CLEAN_LOCATOR = qsettings.value(
-        'preferences/general/cleanLocator', None)
+    LOCATOR_PROCESSES = qsettings.value(
+        'preferences/general/locatorProcesses', 0, type=int)
+    CONTENT_INDEX = qsettings.value(
+        'preferences/general/contentIndex', False, type=bool)
+    FIND_IN_FILES_MAX_RESULTS = qsettings.value(
+        'preferences/general/findInFilesMaxResults', 5000, type=int)
+    LARGE_FILE_SIZE = qsettings.value(
+        'preferences/editor/largeFileSize', 10 * 1024 * 1024, type=int)
+    SAVE_FSYNC = qsettings.value(
+        'preferences/general/saveFsync', True, type=bool)
     from ninja_ide.extensions import handlers
     handlers.init_basic_handlers()
-    clean_locator_db(qsettings)
@@ -38,6 +38,7 @@ from PyQt4.QtGui import QColor
 from PyQt4.QtGui import QKeySequence
 from PyQt4.QtCore import SIGNAL
 from PyQt4.QtCore import QMimeData
+from PyQt4.QtCore import QTimer
 from PyQt4.QtCore import Qt
 
 from ninja_ide import resources
@@ -182,7 +183,10 @@ class Editor(QsciScintilla):
         # Configure key bindings
         self._configure_keybindings()
 
-        self.lexer = highlighter.get_lexer(self._neditable.extension())
+        # Large files aren't highlighted
+        self.lexer = None
+        if not self._neditable.large_file:
+            self.lexer = highlighter.get_lexer(self._neditable.extension())
 
         if self.lexer is not None:
             self.setLexer(self.lexer)
@@ -192,6 +196,13 @@ class Editor(QsciScintilla):
         if settings.SHOW_MINIMAP:
             self._load_minimap(settings.SHOW_MINIMAP)
         self._last_block_position = 0
+        # Chunks of the large file being loaded, it is read only meanwhile
+        self._chunks = None
+        self._read_only_after_load = False
+        self._load_timer = QTimer(self)
+        self._load_timer.setSingleShot(True)
+        self.connect(self._load_timer, SIGNAL("timeout()"),
+                     self._load_next_chunk)
         self.set_flags()
         #FIXME this lang should be guessed in the same form as lexer.
         self.lang = highlighter.get_lang(self._neditable.extension())
@@ -318,6 +329,11 @@ class Editor(QsciScintilla):
     def is_modified(self):
         return self.isModified()
 
+    @property
+    def is_loading(self):
+        """True while the chunks of a large file are being loaded."""
+        return self._chunks is not None
+
     def _configure_keybindings(self):
         #commands = self.standardCommands()
         #command = commands.find(QsciCommand.LineDuplicate)
@@ -443,6 +459,8 @@ class Editor(QsciScintilla):
 
         # Fold
         self.foldable_lines = []
+        if self._neditable.large_file:
+            return
         lines = self.lines()
         for line in range(lines):
             text = self.text(line)
@@ -504,7 +522,7 @@ class Editor(QsciScintilla):
 
     def set_flags(self):
         """Set some configuration flags for the Editor."""
-        if settings.ALLOW_WORD_WRAP:
+        if settings.ALLOW_WORD_WRAP and not self._neditable.large_file:
             self.setWrapMode(QsciScintilla.WrapWord)
         else:
             self.setWrapMode(QsciScintilla.WrapNone)
@@ -513,6 +531,40 @@ class Editor(QsciScintilla):
             self.setWhitespaceVisibility(QsciScintilla.WsVisible)
         self.setIndentationGuides(settings.SHOW_INDENTATION_GUIDE)
 
+    def load_chunks(self, chunks):
+        """Load the text from the iterator chunks one piece at a time,
+        letting the IDE process its events between them.
+
+        SIGNAL: @chunksLoaded()"""
+        self._load_timer.stop()
+        if not self.is_loading:
+            self._read_only_after_load = self.isReadOnly()
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 0)
+        self.setReadOnly(False)
+        self.setText('')
+        # A partial text can't be edited, it would be saved truncated
+        self.setReadOnly(True)
+        self._chunks = chunks
+        self._load_timer.start(0)
+
+    def _load_next_chunk(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._chunks = None
+            self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 1)
+            self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+            # Only the loading modified the document, it was read only
+            self.setModified(False)
+            self.setReadOnly(self._read_only_after_load)
+            self.emit(SIGNAL("chunksLoaded()"))
+            return
+        # The read only documents can't be modified even by us
+        self.setReadOnly(False)
+        self.append(chunk)
+        self.setReadOnly(True)
+        self._load_timer.start(0)
+
     def _update_file_metadata(self):
         """Update the info of bookmarks, breakpoint and checkers."""
         new_count = self.lines()
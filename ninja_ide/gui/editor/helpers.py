@@ -174,6 +174,19 @@ def replace_tabs_with_spaces(editorWidget):
     editorWidget.replaceSelectedText(text)
 
 
+def replace_all_text(editorWidget, text):
+    """Replace the content of the editor with text as a single undo
+    action, keeping the cursor position."""
+    line, index = editorWidget.getCursorPosition()
+    editorWidget.SendScintilla(editorWidget.SCI_BEGINUNDOACTION, 1)
+    editorWidget.selectAll(True)
+    editorWidget.replaceSelectedText(text)
+    editorWidget.SendScintilla(editorWidget.SCI_ENDUNDOACTION, 1)
+    line = min(line, editorWidget.lines() - 1)
+    editorWidget.setCursorPosition(line, min(
+        index, editorWidget.lineLength(line)))
+
+
 def lint_ignore_line(editorWidget):
     if not editorWidget.hasSelectedText():
         line, index = editorWidget.getCursorPosition()
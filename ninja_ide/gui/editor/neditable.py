@@ -34,6 +34,7 @@ class NEditable(QObject):
     @askForSaveFileClosing(PyQt_PyObject)
     @fileClosing(PyQt_PyObject)
     @fileSaved(PyQt_PyObject)
+    @fileSaveFailed(PyQt_PyObject, QString)
     """
 
     def __init__(self, nfile=None):
@@ -44,6 +45,10 @@ class NEditable(QObject):
         self.text_modified = False
         self._has_checkers = False
         self.ignore_checkers = False
+        # Large files are loaded by chunks, without checkers nor symbols
+        self.large_file = (self._nfile is not None and
+                           not self._nfile.is_new_file and
+                           self._nfile.is_large())
 
         #Checkers:
         self.registered_checkers = []
@@ -56,6 +61,8 @@ class NEditable(QObject):
             self.connect(
                 self._nfile, SIGNAL("fileChanged()"),
                 lambda: self.emit(SIGNAL("fileChanged(PyQt_PyObject)"), self))
+            self.connect(self._nfile, SIGNAL("savedInBackground(QString)"),
+                         self._content_saved)
 
     def extension(self):
         #FIXME This sucks, we should have a way to define lang
@@ -79,6 +86,11 @@ class NEditable(QObject):
         # If we have an editor, let's include the checkers:
         self.include_checkers()
         content = ''
+        if self.large_file:
+            # Read only until the user decides to edit it anyway
+            self.__editor.setReadOnly(True)
+            self._load_large_file()
+            return
         if not self._nfile.is_new_file:
             content = self._nfile.read()
             self._nfile.start_watching()
@@ -95,8 +107,14 @@ class NEditable(QObject):
         if not content:
             helpers.insert_coding_line(self.__editor)
 
+    def _load_large_file(self):
+        self.__editor.load_chunks(self._nfile.read_chunks())
+        self._nfile.start_watching()
+
     def reload_file(self):
-        if self._nfile:
+        if self._nfile and self.large_file:
+            self._load_large_file()
+        elif self._nfile:
             content = self._nfile.read()
             self._nfile.start_watching()
             self.__editor.setText(content)
@@ -155,20 +173,36 @@ class NEditable(QObject):
         return dirty
 
     def save_content(self, path=None):
-        """Save the content of the UI to a file."""
-        if self.__editor.is_modified:
+        """Save the content of the UI to a file.
+
+        The file is written in background from a snapshot of the content,
+        fileSaved (or fileSaveFailed) is emitted once it was written.
+        Nothing is saved while a large file is being loaded."""
+        if self.__editor.is_modified and not self.__editor.is_loading:
             content = self.__editor.text()
-            nfile = self._nfile.save(content, path)
-            self._nfile = nfile
-            if not self.ignore_checkers:
-                self.run_checkers(content)
-            else:
-                self.ignore_checkers = False
+            self._nfile.save_in_background(content, path)
+            # The edits made while the file is written modify it again
             self.__editor.setModified(False)
-            self.emit(SIGNAL("fileSaved(PyQt_PyObject)"), self)
+
+    def _content_saved(self, error):
+        if error:
+            if self.__editor is not None:
+                self.__editor.setModified(True)
+            self.emit(SIGNAL("fileSaveFailed(PyQt_PyObject, QString)"),
+                      self, error)
+            return
+        if self.ignore_checkers:
+            self.ignore_checkers = False
+        elif self._has_checkers and self.__editor is not None:
+            self.run_checkers(self.__editor.text())
+        self.emit(SIGNAL("fileSaved(PyQt_PyObject)"), self)
 
     def include_checkers(self, lang='python'):
         """Initialize the Checkers, should be refreshed on checkers change."""
+        if self.large_file:
+            self.registered_checkers = []
+            self._has_checkers = False
+            return
         self.registered_checkers = sorted(checkers.get_checkers_for(lang),
                                           key=lambda x: x[2])
         self._has_checkers = len(self.registered_checkers) > 0
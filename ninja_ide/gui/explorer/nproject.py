@@ -44,6 +44,9 @@ class NProject(QObject):
         self.program_params = project.get('programParams', '')
         self.venv = project.get('venv', '')
         self.related_projects = project.get('relatedProjects', [])
+        # .gitignore like rules of the files to skip (search, locator...)
+        self.excludes = project.get('excludes',
+                                    list(settings.PROJECT_EXCLUDES))
         self.added_to_console = False
         self.is_current = False
         #Model is a QFileSystemModel to be set on runtime
@@ -81,6 +84,7 @@ class NProject(QObject):
         project['venv'] = self.venv
         project['programParams'] = self.program_params
         project['relatedProjects'] = self.related_projects
+        project['excludes'] = self.excludes
         if file_manager.file_exists(self.path, self._name + '.nja'):
             file_manager.delete_file(self.path, self._name + '.nja')
         json_manager.create_ninja_project(self.path, self._name, project)
@@ -39,6 +39,7 @@ from ninja_ide import resources
 from ninja_ide import translations
 from ninja_ide.core import plugin_manager
 from ninja_ide.core.file_handling import file_manager
+from ninja_ide.core.file_handling import nfile
 from ninja_ide.core.file_handling import nfilesystem
 #from ninja_ide.core import plugin_services
 from ninja_ide.core import settings
@@ -365,6 +366,13 @@ class IDE(QMainWindow):
             self.__neditables[nfile] = editable
         return editable
 
+    def get_opened_editable(self, filename):
+        """Return the NEditable of filename if it is opened, or None."""
+        for nfile, editable in self.__neditables.items():
+            if nfile.file_path == filename and editable.editor is not None:
+                return editable
+        return None
+
     def _unload_neditable(self, editable):
         self.__neditables.pop(editable.nfile)
         editable.nfile.deleteLater()
@@ -683,10 +691,13 @@ class IDE(QMainWindow):
 
     def _save_unsaved_files(self, files):
         """Save the files from the paths in the array."""
-        for f in files:
-            editable = self.get_or_create_editable(f)
-            editable.ignore_checkers = True
-            editable.save_content()
+        with nfile.NinjaFileSaver.batch():
+            for f in files:
+                editable = self.get_or_create_editable(nfile=f)
+                editable.ignore_checkers = True
+                editable.save_content()
+        # The IDE is closing, the files have to be written before
+        nfile.NinjaFileSaver.wait()
 
     def closeEvent(self, event):
         """Saves some global settings before closing."""
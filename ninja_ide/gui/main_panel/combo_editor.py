@@ -69,6 +69,10 @@ class ComboEditor(QDialog):
         self.bar = ActionBar(main_combo=original)
         vbox.addWidget(self.bar)
 
+        self.large_file_bar = LargeFileBar()
+        self.large_file_bar.hide()
+        vbox.addWidget(self.large_file_bar)
+
         self.stacked = QStackedLayout()
         vbox.addLayout(self.stacked)
 
@@ -104,6 +108,8 @@ class ComboEditor(QDialog):
                      lambda: self._navigate_code(False))
         self.connect(self.bar.code_navigator.btnNext, SIGNAL("clicked()"),
                      lambda: self._navigate_code(True))
+        self.connect(self.large_file_bar, SIGNAL("editAnyway()"),
+                     self._edit_anyway)
 
     def _navigate_code(self, val):
         op = self.bar.code_navigator.operation
@@ -149,6 +155,8 @@ class ComboEditor(QDialog):
                          self._set_current_symbol)
             self.connect(editor, SIGNAL("modificationChanged(bool)"),
                          self._editor_modified)
+            self.connect(editor, SIGNAL("chunksLoaded()"),
+                         lambda: self._update_large_file_bar(neditable))
             self.connect(neditable, SIGNAL("checkersUpdated(PyQt_PyObject)"),
                          self._show_notification_icon)
             self.connect(neditable, SIGNAL("fileSaved(PyQt_PyObject)"),
@@ -276,6 +284,7 @@ class ComboEditor(QDialog):
         if neditable:
             self.stacked.setCurrentIndex(index)
             editor = self.stacked.currentWidget()
+            self._update_large_file_bar(neditable)
             self._update_cursor_position(ignore_sender=True)
             editor.setFocus()
             self._main_container.current_editor_changed(
@@ -334,7 +343,30 @@ class ComboEditor(QDialog):
         self.bar.update_item_text(neditable, neditable.display_name)
         self._main_container.current_editor_changed(neditable.file_path)
 
+    def _update_large_file_bar(self, neditable):
+        editor = self.stacked.currentWidget()
+        if editor is None or editor.neditable is not neditable:
+            return
+        self.large_file_bar.setVisible(
+            neditable.large_file and editor.isReadOnly())
+        # The file can be edited once it is loaded completely
+        self.large_file_bar.set_loading(neditable.editor.is_loading)
+
+    def _edit_anyway(self):
+        editor = self.stacked.currentWidget()
+        if editor.neditable.editor.is_loading:
+            return
+        editor.setReadOnly(False)
+        self.large_file_bar.hide()
+
     def _load_symbols(self, neditable):
+        tree_symbols = IDE.get_service('symbols_explorer')
+        if neditable.large_file:
+            # The symbols of large files aren't extracted
+            self._symbols_index = []
+            self.bar.add_symbols([])
+            tree_symbols.update_symbols_tree({}, neditable.file_path)
+            return
         symbols_handler = handlers.get_symbols_handler('py')
         source = neditable.editor.text()
         source = source.encode(neditable.editor.encoding)
@@ -346,7 +378,6 @@ class ComboEditor(QDialog):
         self.bar.add_symbols(symbols_simplified)
         line, _ = neditable.editor.getCursorPosition()
         self._set_current_symbol(line, True)
-        tree_symbols = IDE.get_service('symbols_explorer')
         tree_symbols.update_symbols_tree(symbols, neditable.file_path)
 
     def _show_notification_icon(self, neditable):
@@ -644,6 +675,29 @@ class ActionBar(QFrame):
                 self.about_to_close_file(i)
 
 
+class LargeFileBar(QFrame):
+    """
+    SIGNALS:
+    @editAnyway()
+    """
+
+    def __init__(self):
+        super(LargeFileBar, self).__init__()
+        self.setObjectName("largefilebar")
+        hbox = QHBoxLayout(self)
+        hbox.setContentsMargins(5, 1, 1, 1)
+        label = QLabel(translations.TR_LARGE_FILE_MODE)
+        label.setWordWrap(True)
+        hbox.addWidget(label)
+        self._btn_edit = QPushButton(translations.TR_EDIT_ANYWAY)
+        hbox.addWidget(self._btn_edit)
+        self.connect(self._btn_edit, SIGNAL("clicked()"),
+                     lambda: self.emit(SIGNAL("editAnyway()")))
+
+    def set_loading(self, loading):
+        self._btn_edit.setEnabled(not loading)
+
+
 class ComboFiles(QComboBox):
 
     def showPopup(self):
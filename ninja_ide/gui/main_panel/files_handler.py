@@ -18,7 +18,6 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import os
-import re
 import uuid
 
 from ninja_ide.tools.logger import NinjaLogger
@@ -56,6 +55,7 @@ class FilesHandler(QFrame):
         self._model = {}
         self._temp_files = {}
         self._max_index = 0
+        self._fuzzy_text = ''
 
         self.connect(self._root, SIGNAL("open(QString, QString, QString)"),
                      self._open)
@@ -90,21 +90,16 @@ class FilesHandler(QFrame):
             nfile.close()
 
     def _fuzzy_search(self, search):
-        search = '.+'.join(re.escape(search).split('\\ '))
-        pattern = re.compile(search, re.IGNORECASE)
-
-        model = []
-        for project_path in locator.files_paths:
-            files_in_project = locator.files_paths[project_path]
-            base_project = os.path.basename(project_path)
-            for file_path in files_in_project:
-                file_path = os.path.join(
-                    base_project, os.path.relpath(file_path, project_path))
-                if pattern.search(file_path):
-                    model.append([os.path.basename(file_path), file_path,
-                                  project_path])
+        self._fuzzy_text = search
+        model = [[entry.name, entry.relative, entry.project]
+                 for entry in locator.paths_index.search(search)]
         self._root.set_fuzzy_model(model)
 
+    def locator_updated(self):
+        """Search again in the files indexed by the locator so far."""
+        if self.isVisible() and self._fuzzy_text:
+            self._fuzzy_search(self._fuzzy_text)
+
     def _add_model(self):
         ninjaide = IDE.get_service("ide")
         files = ninjaide.opened_files
@@ -173,6 +168,7 @@ class FilesHandler(QFrame):
     def hideEvent(self, event):
         super(FilesHandler, self).hideEvent(event)
         self._temp_files = {}
+        self._fuzzy_text = ''
         self._root.clear_model()
 
     def next_item(self):
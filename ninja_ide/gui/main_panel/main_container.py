@@ -35,6 +35,7 @@ from PyQt4.QtCore import SIGNAL
 from ninja_ide import resources
 from ninja_ide import translations
 from ninja_ide.core.file_handling import file_manager
+from ninja_ide.core.file_handling import nfile
 from ninja_ide.core import settings
 from ninja_ide.gui import dynamic_splitter
 from ninja_ide.gui.ide import IDE
@@ -137,6 +138,9 @@ class _MainContainer(QWidget):
             {'target': 'explorer_container',
              'signal_name': 'lintActivated(bool)',
              'slot': self.reset_lint_warnings},
+            {'target': 'status_bar',
+             'signal_name': 'locatorUpdated()',
+             'slot': self._files_handler.locator_updated},
             )
 
         IDE.register_signals('main_container', connections)
@@ -685,6 +689,9 @@ class _MainContainer(QWidget):
         #Connect signals
         self.connect(editable, SIGNAL("fileSaved(PyQt_PyObject)"),
                      self._editor_tab_was_saved)
+        self.connect(editable,
+                     SIGNAL("fileSaveFailed(PyQt_PyObject, QString)"),
+                     self._editor_tab_save_failed)
         self.connect(editorWidget, SIGNAL("openDropFile(QString)"),
                      self.open_file)
         self.connect(editorWidget, SIGNAL("addBackItemNavigation()"),
@@ -736,6 +743,13 @@ class _MainContainer(QWidget):
 
     def _editor_tab_was_saved(self, editable=None):
         self.emit(SIGNAL("updateLocator(QString)"), editable.file_path)
+        self.emit(SIGNAL("fileSaved(QString)"),
+                  (self.tr("File Saved: %s") % editable.file_path))
+
+    def _editor_tab_save_failed(self, editable, reason):
+        logger.error('save_file: %s', reason)
+        QMessageBox.information(self, self.tr("Save Error"),
+                                self.tr("The file couldn't be saved!"))
 
     def get_current_widget(self):
         return self.current_widget.currentWidget()
@@ -872,7 +886,8 @@ class _MainContainer(QWidget):
         #FIXME: check how we handle this
         if not editorWidget:
             editorWidget = self.get_current_editor()
-        if not editorWidget:
+        if not editorWidget or editorWidget.neditable.editor.is_loading:
+            # A large file can't be saved until it is loaded completely
             return False
         try:
             #editorWidget.just_saved = True
@@ -889,8 +904,6 @@ class _MainContainer(QWidget):
                 #fileName, content, addExtension=False)
             encoding = file_manager.get_file_encoding(editorWidget.text())
             editorWidget.encoding = encoding
-            self.emit(SIGNAL("fileSaved(QString)"),
-                      (self.tr("File Saved: %s") % editorWidget.file_path))
             return True
         except Exception as reason:
             logger.error('save_file: %s', reason)
@@ -900,7 +913,7 @@ class _MainContainer(QWidget):
 
     def save_file_as(self):
         editorWidget = self.get_current_editor()
-        if not editorWidget:
+        if not editorWidget or editorWidget.neditable.editor.is_loading:
             return False
         try:
             filters = '(*.py);;(*.*)'
@@ -921,8 +934,6 @@ class _MainContainer(QWidget):
             editorWidget.register_syntax(
                 file_manager.get_file_extension(fileName))
 
-            self.emit(SIGNAL("fileSaved(QString)"),
-                            (self.tr("File Saved: %s") % fileName))
             self.emit(SIGNAL("currentEditorChanged(QString)"), fileName)
             return True
         except file_manager.NinjaFileExistsException as ex:
@@ -969,23 +980,18 @@ class _MainContainer(QWidget):
                     #self.save_file(editorWidget)
 
     def save_all(self):
-        pass
-        #FIXME: check how we handle this
-        #for i in range(self._tabMain.count()):
-            #editorWidget = self._tabMain.widget(i)
-            #if type(editorWidget) is editor.Editor:
-                #reloaded = self._tabMain.check_for_external_modifications(
-                    #editorWidget)
-                #if not reloaded:
-                    #self.save_file(editorWidget)
-        #for i in range(self.tabsecondary.count()):
-            #editorWidget = self.tabsecondary.widget(i)
-            #self.tabsecondary.check_for_external_modifications(editorWidget)
-            #if type(editorWidget) is editor.Editor:
-                #reloaded = self.tabsecondary.check_for_external_modifications(
-                    #editorWidget)
-                #if not reloaded:
-                    #self.save_file(editorWidget)
+        """Save the modified files, they are written in background as one
+        batch."""
+        ninjaide = IDE.get_service('ide')
+        with nfile.NinjaFileSaver.batch():
+            for opened_file in ninjaide.opened_files:
+                editable = ninjaide.get_or_create_editable(nfile=opened_file)
+                editorWidget = editable.editor
+                if (editorWidget is None or not editorWidget.is_modified or
+                        opened_file.is_new_file or
+                        not opened_file.has_write_permission()):
+                    continue
+                self.save_file(editorWidget)
 
     def call_editors_function(self, call_function, *arguments):
         pass
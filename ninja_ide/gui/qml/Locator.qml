@@ -41,6 +41,15 @@ Rectangle {
         }
     }
 
+    function viewState() {
+        return [listResults.currentIndex, listResults.contentY];
+    }
+
+    function restoreView(index, contentY) {
+        listResults.currentIndex = Math.min(index, itemsModel.count - 1);
+        listResults.contentY = contentY;
+    }
+
     function openCurrent() {
         if (listResults.currentIndex > -1) {
             var item = itemsModel.get(listResults.currentIndex);
@@ -114,6 +114,8 @@ class _StatusBar(QWidget):
         self.hide()
         ide = IDE.get_service('ide')
         self._codeLocator = locator_widget.LocatorWidget(ide)
+        self.connect(self._codeLocator, SIGNAL("locatorUpdated()"),
+                     lambda: self.emit(SIGNAL("locatorUpdated()")))
 
         ui_tools.install_shortcuts(self, actions.ACTIONS_STATUS, ide)
 
@@ -19,15 +19,16 @@ from __future__ import unicode_literals
 
 import os
 import re
-try:
-    import Queue
-except:
-    import queue as Queue  # lint:ok
+import array
+import sqlite3
+import itertools
+import collections
+import threading
+import multiprocessing
 
 from PyQt4.QtCore import Qt
-from PyQt4.QtCore import QDir
-from PyQt4.QtCore import QFile
-from PyQt4.QtCore import QTextStream
+from PyQt4.QtCore import QModelIndex
+from PyQt4.QtCore import QAbstractItemModel
 from PyQt4.QtCore import QRegExp
 from PyQt4.QtCore import QThread
 from PyQt4.QtCore import SIGNAL
@@ -44,8 +45,7 @@ from PyQt4.QtGui import QAbstractItemView
 from PyQt4.QtGui import QHeaderView
 from PyQt4.QtGui import QDialog
 from PyQt4.QtGui import QWidget
-from PyQt4.QtGui import QTreeWidget
-from PyQt4.QtGui import QTreeWidgetItem
+from PyQt4.QtGui import QTreeView
 from PyQt4.QtGui import QLineEdit
 from PyQt4.QtGui import QComboBox
 from PyQt4.QtGui import QCheckBox
@@ -55,18 +55,164 @@ from PyQt4.QtGui import QIcon
 from PyQt4.QtGui import QFileDialog
 from PyQt4.QtGui import QCompleter
 
+from ninja_ide import resources
 from ninja_ide.gui.ide import IDE
+from ninja_ide.gui.editor import helpers
 from ninja_ide.core.file_handling import file_manager
+from ninja_ide.core.file_handling import filesystem_notifications
 from ninja_ide.core import settings
+from ninja_ide.tools import search_engine
+from ninja_ide.tools import content_index
+from ninja_ide.tools import replace_engine
 from ninja_ide import translations
 
+from ninja_ide.tools.logger import NinjaLogger
+
+
+logger = NinjaLogger('ninja_ide.gui.tools_dock.find_in_files')
+
+# Lines of a file added to the results each time the view needs more
+FETCH_STEP = 256
+
+
+class ContentIndexThread(QThread):
+    '''
+    Keep the content index (see content_index) of the opened projects
+    updated when settings.CONTENT_INDEX is enabled: each project is
+    refreshed when it is opened and then the files changed are indexed
+    again as the file system watcher notifies them.
+    '''
+
+    def __init__(self):
+        super(ContentIndexThread, self).__init__()
+        self._lock = threading.Lock()
+        # project path -> ContentIndex
+        self._indexes = {}
+        self._pending_refresh = []
+        # project path -> paths changed
+        self._changed = {}
+        # (project path, paths) being indexed again
+        self._updating = (None, ())
+        self._cancel = False
+        self.connect(self, SIGNAL("finished()"), self._restart_if_pending)
+
+    def project_opened(self, project_path):
+        if not settings.CONTENT_INDEX:
+            return
+        excludes = []
+        ninjaide = IDE.get_service('ide')
+        nproject = ninjaide.filesystem.get_projects().get(project_path)
+        if nproject is not None:
+            excludes = nproject.excludes
+        folder = os.path.join(resources.NINJA_KNOWLEDGE_PATH, 'content_index')
+        try:
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            index = content_index.ContentIndex(
+                content_index.index_path(folder, project_path), project_path,
+                excludes)
+        except (OSError, sqlite3.Error) as reason:
+            logger.error('The content index of %s could not be opened: %r',
+                         project_path, reason)
+            return
+        with self._lock:
+            self._indexes[project_path] = index
+            self._pending_refresh.append(index)
+        self.start()
+
+    def project_closed(self, project_path):
+        with self._lock:
+            index = self._indexes.pop(project_path, None)
+            self._changed.pop(project_path, None)
+            if index in self._pending_refresh:
+                self._pending_refresh.remove(index)
+
+    def file_changed(self, event, path):
+        with self._lock:
+            for project_path in self._indexes:
+                if path.startswith(os.path.join(project_path, '')):
+                    self._changed.setdefault(project_path, set()).add(path)
+            if not self._changed:
+                return
+        self.start()
+
+    def candidates(self, root_dir, grams):
+        """Return the files of the project in root_dir that can contain
+        the trigrams grams (see content_index.query_trigrams), or None if
+        root_dir is not a project with its index ready."""
+        with self._lock:
+            index = self._indexes.get(root_dir)
+            changed = set(self._changed.get(root_dir, ()))
+            if self._updating[0] == root_dir:
+                changed.update(self._updating[1])
+        if index is None:
+            return None
+        try:
+            paths = index.candidates(grams)
+        except sqlite3.Error as reason:
+            logger.error('The content index of %s could not be read: %r',
+                         root_dir, reason)
+            return None
+        if paths is None:
+            return None
+        # The files changed are searched until they are indexed again
+        changed = [path for path in changed if os.path.isfile(path) and
+                   index.is_indexed_path(path)]
+        return sorted(set(paths).union(changed))
+
+    def run(self):
+        """Refresh the indexes of the projects opened, then index again
+        the files changed."""
+        while not self._cancel:
+            with self._lock:
+                if self._pending_refresh:
+                    index = self._pending_refresh.pop(0)
+                    paths = None
+                elif self._changed:
+                    project_path, paths = self._changed.popitem()
+                    index = self._indexes[project_path]
+                    self._updating = (project_path, paths)
+                else:
+                    return
+            try:
+                if paths is None:
+                    index.refresh(lambda: self._is_closed(index))
+                else:
+                    index.update_paths(paths)
+            except sqlite3.Error as reason:
+                logger.error('The content index of %s could not be '
+                             'updated: %r', index.root, reason)
+            finally:
+                with self._lock:
+                    self._updating = (None, ())
+
+    def _is_closed(self, index):
+        return self._cancel or self._indexes.get(index.root) is not index
+
+    def _restart_if_pending(self):
+        """A change could be added while the thread was finishing."""
+        if not self._cancel and (self._pending_refresh or self._changed):
+            self.start()
+
+    def stop(self):
+        """Cancel the indexing and wait for the thread."""
+        self._cancel = True
+        self.wait()
+
 
 class FindInFilesThread(QThread):
     '''
     Emit the signal
     found_pattern(PyQt_PyObject)
+    with a list of (relative file name, lines) for each batch of files.
+    When the root folder is a project with a content index only the files
+    the index returns are searched.
     '''
 
+    def __init__(self, content_indexer=None):
+        super(FindInFilesThread, self).__init__()
+        self.content_indexer = content_indexer
+
     def find_in_files(self, dir_name, filters, reg_exp, recursive, by_phrase):
         """Trigger the find in files thread and return the lines found."""
         self._cancel = False
@@ -74,116 +220,427 @@ class FindInFilesThread(QThread):
         self.search_pattern = reg_exp
         self.by_phrase = by_phrase
         self.filters = filters
-        self.queue = Queue.Queue()
-        self.queue.put(dir_name)
         self.root_dir = dir_name
         #Start!
         self.start()
 
+    def search_parameters(self):
+        """Return the (pattern, case sensitive, fixed string, words) of
+        the last search, as search_engine.FileScanner receives them."""
+        pattern = self.search_pattern.pattern()
+        case_sensitive = (self.search_pattern.caseSensitivity() ==
+                          Qt.CaseSensitive)
+        fixed_string = (self.search_pattern.patternSyntax() ==
+                        QRegExp.FixedString)
+        words = None
+        if not self.by_phrase:
+            words = pattern.split('|')
+        return pattern, case_sensitive, fixed_string, words
+
     def run(self):
         """Start the thread."""
-        file_filter = QDir.Files | QDir.NoDotAndDotDot | QDir.Readable
-        dir_filter = QDir.Dirs | QDir.NoDotAndDotDot | QDir.Readable
-        while not self._cancel and not self.queue.empty():
-            current_dir = QDir(self.queue.get())
-            #Skip not readable dirs!
-            if not current_dir.isReadable():
-                continue
+        pattern, case_sensitive, fixed_string, words = \
+            self.search_parameters()
+        files = self._indexed_files(pattern, case_sensitive, fixed_string,
+                                    words)
+        if files is None:
+            files = search_engine.walk_files(
+                self.root_dir, self.filters, self.recursive,
+                self._is_cancelled, self._get_excludes())
+        # The workers are started only if there are enough files to search
+        files = iter(files)
+        first_files = list(itertools.islice(
+            files, search_engine.PARALLEL_THRESHOLD))
+        parallel = len(first_files) == search_engine.PARALLEL_THRESHOLD
+        files = itertools.chain(first_files, files)
+        processes = multiprocessing.cpu_count()
+        if processes > 1 and parallel:
+            self._search_in_pool(files, processes,
+                                 (pattern, case_sensitive, fixed_string,
+                                  words))
+        else:
+            scanner = search_engine.FileScanner(pattern, case_sensitive,
+                                                fixed_string, words)
+            for batch in search_engine.batches(files):
+                results = []
+                for file_path in batch:
+                    if self._cancel:
+                        break
+                    try:
+                        lines = scanner.scan(file_path)
+                    except (IOError, OSError):
+                        continue
+                    if lines:
+                        results.append((file_path, lines))
+                self._emit_results(results)
 
-            #Collect all sub dirs!
-            if self.recursive:
-                current_sub_dirs = current_dir.entryInfoList(dir_filter)
-                for one_dir in current_sub_dirs:
-                    self.queue.put(one_dir.absoluteFilePath())
-
-            #all files in sub_dir first apply the filters
-            current_files = current_dir.entryInfoList(
-                self.filters, file_filter)
-            #process all files in current dir!
-            for one_file in current_files:
-                self._grep_file(one_file.absoluteFilePath(),
-                    one_file.fileName())
-
-    def _grep_file(self, file_path, file_name):
-        """Search for each line inside the file."""
-        if not self.by_phrase:
-            with open(file_path, 'r') as f:
-                content = f.read()
-            words = [word for word in
-                self.search_pattern.pattern().split('|')]
-            words.insert(0, True)
-
-            def check_whole_words(result, word):
-                return result and content.find(word) != -1
-            if not reduce(check_whole_words, words):
-                return
-        file_object = QFile(file_path)
-        if not file_object.open(QFile.ReadOnly):
-            return
+    def _search_in_pool(self, files, processes, search):
+        """Search the files yielded by the walker in worker processes,
+        the walker is consumed by the pool while the workers search."""
+        pool = multiprocessing.Pool(processes,
+                                    search_engine.init_search_worker, search)
+        try:
+            results = pool.imap_unordered(
+                search_engine.search_files_worker,
+                search_engine.batches(files))
+            while not self._cancel:
+                try:
+                    # Wake up periodically to notice a cancellation
+                    batch_results = results.next(0.1)
+                except multiprocessing.TimeoutError:
+                    continue
+                except StopIteration:
+                    break
+                self._emit_results(batch_results)
+        finally:
+            # Stop the workers right away if it was cancelled
+            pool.terminate()
+            pool.join()
 
-        stream = QTextStream(file_object)
-        lines = []
-        line_index = 0
-        line = stream.readLine()
-        while not self._cancel and not (stream.atEnd() and not line):
-            column = self.search_pattern.indexIn(line)
-            if column != -1:
-                lines.append((line_index, line))
-            #take the next line!
-            line = stream.readLine()
-            line_index += 1
+    def _emit_results(self, results):
+        if self._cancel or not results:
+            return
         #emit a signal!
-        relative_file_name = file_manager.convert_to_relative(
-            self.root_dir, file_path)
         self.emit(SIGNAL("found_pattern(PyQt_PyObject)"),
-            (relative_file_name, lines))
+            [(file_manager.convert_to_relative(self.root_dir, file_path),
+              lines) for file_path, lines in results])
+
+    def _indexed_files(self, pattern, case_sensitive, fixed_string, words):
+        """Return the files to search narrowed by the content index, or
+        None if they have to be walked."""
+        if self.content_indexer is None:
+            return None
+        grams = content_index.query_trigrams(pattern, case_sensitive,
+                                             fixed_string, words)
+        paths = self.content_indexer.candidates(self.root_dir, grams)
+        if paths is None:
+            return None
+        return search_engine.filter_files(paths, self.root_dir, self.filters,
+                                          self.recursive)
+
+    def _get_excludes(self):
+        """Return the excludes of the project searched, if it is one."""
+        ninjaide = IDE.get_service('ide')
+        if ninjaide is None:
+            return []
+        nproject = ninjaide.filesystem.get_projects().get(self.root_dir)
+        if nproject is None:
+            return []
+        return nproject.excludes
+
+    def _is_cancelled(self):
+        return self._cancel
 
     def cancel(self):
         """Cancel the thread execution."""
         self._cancel = True
 
 
-class FindInFilesResult(QTreeWidget):
+class ReplaceInFilesThread(QThread):
+    '''
+    Compute the edits of a replace in worker processes and emit
+    replaceComputed(PyQt_PyObject) with (edits, failures), or write the
+    edits as a transaction and emit replaceApplied(PyQt_PyObject) with
+    the ReplaceError raised or None.
+    '''
+
+    def compute(self, file_paths, search, replacement):
+        """Compute the FileEdits of file_paths, search is (pattern, case
+        sensitive, fixed string)."""
+        self._cancel = False
+        self._edits = None
+        self._file_paths = file_paths
+        self._replace = tuple(search) + (replacement, True)
+        self.start()
+
+    def apply(self, edits):
+        """Write the FileEdits."""
+        self._cancel = False
+        self._edits = edits
+        self.start()
+
+    def run(self):
+        if self._edits is not None:
+            error = None
+            try:
+                replace_engine.apply_edits(self._edits)
+            except replace_engine.ReplaceError as reason:
+                error = reason
+            self.emit(SIGNAL("replaceApplied(PyQt_PyObject)"), error)
+            return
+        processes = min(multiprocessing.cpu_count(), len(self._file_paths))
+        if (processes > 1 and
+                len(self._file_paths) >= search_engine.PARALLEL_THRESHOLD):
+            results = self._compute_in_pool(processes)
+        else:
+            replace_engine.init_replace_worker(*self._replace)
+            results = [replace_engine.replace_file_worker(file_path)
+                       for file_path in self._file_paths]
+        if self._cancel:
+            return
+        edits = []
+        failures = []
+        for file_path, edit, error in results:
+            if error is not None:
+                failures.append((file_path, error))
+            elif edit is not None:
+                edits.append(edit)
+        edits.sort(key=lambda edit: edit.path)
+        self.emit(SIGNAL("replaceComputed(PyQt_PyObject)"),
+                  (edits, failures))
+
+    def _compute_in_pool(self, processes):
+        pool = multiprocessing.Pool(processes,
+                                    replace_engine.init_replace_worker,
+                                    self._replace)
+        results = []
+        try:
+            pending = pool.imap_unordered(replace_engine.replace_file_worker,
+                                          self._file_paths,
+                                          search_engine.BATCH_SIZE)
+            while not self._cancel:
+                try:
+                    results.append(pending.next(0.1))
+                except multiprocessing.TimeoutError:
+                    continue
+                except StopIteration:
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+        return results
+
+    def cancel(self):
+        self._cancel = True
+
+
+class _FileResults(object):
+    """The lines found in a file, kept compact until they are shown."""
+
+    __slots__ = ('root', 'name', 'linenos', 'lines', 'row', 'fetched')
+
+    def __init__(self, root, name, items):
+        self.root = root
+        self.name = name
+        self.linenos = array.array(str('i'), [line for line, _ in items])
+        self.lines = tuple([content for _, content in items])
+        # Row in the model (-1 while hidden by the results cap) and lines
+        # already fetched by the view
+        self.row = -1
+        self.fetched = 0
+
+
+class FindInFilesModel(QAbstractItemModel):
+
+    """Results of a search: a row per file, with a child row per line.
+
+    The lines of a file are only added to the model when the view
+    expands it (a chunk at a time) and the files after the first
+    settings.FIND_IN_FILES_MAX_RESULTS lines are kept hidden until
+    show_more() is called."""
+
+    def __init__(self, parent=None):
+        super(FindInFilesModel, self).__init__(parent)
+        self._files = []
+        self._hidden = collections.deque()
+        self._shown_lines = 0
+        self._hidden_lines = 0
+        self._limit = settings.FIND_IN_FILES_MAX_RESULTS
+
+    def clear(self):
+        self.beginResetModel()
+        self._files = []
+        self._hidden = collections.deque()
+        self._shown_lines = 0
+        self._hidden_lines = 0
+        self._limit = settings.FIND_IN_FILES_MAX_RESULTS
+        self.endResetModel()
+
+    def add_results(self, dir_name_root, results):
+        """Add the (relative file name, lines) found in dir_name_root."""
+        for file_name, items in results:
+            if items:
+                self._hidden.append(_FileResults(dir_name_root, file_name,
+                                                 items))
+                self._hidden_lines += len(items)
+        self._show_hidden()
+
+    def show_more(self):
+        """Raise the results cap to show more hidden files."""
+        self._limit += settings.FIND_IN_FILES_MAX_RESULTS
+        self._show_hidden()
+
+    def _show_hidden(self):
+        shown = []
+        while self._hidden and (not self._limit or
+                                self._shown_lines < self._limit):
+            file_results = self._hidden.popleft()
+            self._hidden_lines -= len(file_results.lines)
+            self._shown_lines += len(file_results.lines)
+            shown.append(file_results)
+        if not shown:
+            return
+        first = len(self._files)
+        self.beginInsertRows(QModelIndex(), first, first + len(shown) - 1)
+        for row, file_results in enumerate(shown, first):
+            file_results.row = row
+            self._files.append(file_results)
+        self.endInsertRows()
+
+    @property
+    def hidden_lines(self):
+        return self._hidden_lines
+
+    def files_count(self):
+        """Return the files with results, shown or hidden."""
+        return len(self._files) + len(self._hidden)
+
+    def file_paths(self):
+        """Return the paths of the files with results, shown or hidden."""
+        return [file_manager.create_path(file_results.root,
+                                         file_results.name)
+                for file_results in list(self._files) + list(self._hidden)]
+
+    def location(self, index):
+        """Return the (file path, line index) of a line row, or None."""
+        file_results = index.internalPointer() if index.isValid() else None
+        if file_results is None:
+            return None
+        return (file_manager.create_path(file_results.root,
+                                         file_results.name),
+                file_results.linenos[index.row()])
+
+    def _file_for(self, parent):
+        """Return the _FileResults of a file row, or None."""
+        if (not parent.isValid() or parent.internalPointer() is not None or
+                parent.column() != 0):
+            return None
+        return self._files[parent.row()]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column)
+        # The lines point to their file
+        return self.createIndex(row, column, self._files[parent.row()])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        file_results = index.internalPointer()
+        if file_results is None:
+            return QModelIndex()
+        return self.createIndex(file_results.row, 0)
 
-    """Display the results."""
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._files)
+        file_results = self._file_for(parent)
+        if file_results is None:
+            return 0
+        return file_results.fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 2
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._files)
+        return self._file_for(parent) is not None
+
+    def canFetchMore(self, parent):
+        file_results = self._file_for(parent)
+        return (file_results is not None and
+                file_results.fetched < len(file_results.lines))
+
+    def fetchMore(self, parent):
+        file_results = self._file_for(parent)
+        if file_results is None:
+            return
+        first = file_results.fetched
+        last = min(first + FETCH_STEP, len(file_results.lines)) - 1
+        if last < first:
+            return
+        self.beginInsertRows(parent, first, last)
+        file_results.fetched = last + 1
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        file_results = index.internalPointer()
+        if file_results is None:
+            file_results = self._files[index.row()]
+            if role == Qt.DisplayRole:
+                if index.column() == 0:
+                    return file_results.name
+                return str(len(file_results.lines))
+            elif role == Qt.ToolTipRole:
+                return "Found {} on {}".format(
+                    len(file_results.lines),
+                    os.path.basename(file_results.name))
+            return None
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return file_results.lines[index.row()]
+            return str(file_results.linenos[index.row()] + 1)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return (translations.TR_FILE, translations.TR_LINE)[section]
+        return None
+
+
+class FindInFilesResult(QTreeView):
+
+    """Display the results.
+
+    SIGNALS:
+    @resultsHidden(int)
+    """
 
     def __init__(self):
         super(FindInFilesResult, self).__init__()
-        self.setHeaderLabels((translations.TR_FILE, translations.TR_LINE))
+        self._model = FindInFilesModel(self)
+        self.setModel(self._model)
+        self.setUniformRowHeights(True)
         self.header().setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
         self.header().setResizeMode(0, QHeaderView.ResizeToContents)
         self.header().setResizeMode(1, QHeaderView.ResizeToContents)
         self.header().setStretchLastSection(False)
-        self.sortByColumn(0, Qt.AscendingOrder)
 
-    def update_result(self, dir_name_root, file_name, items):
-        """Update the results in the tree."""
-        if items:
-            root_item = FindInFilesRootItem(self, (file_name, ''),
-                dir_name_root)
-            root_item.setExpanded(True)
-            root_item.setToolTip(0, "Found {} on {}".format(
-                len(items), os.path.basename(file_name)))
-            for line, content in items:
-                QTreeWidgetItem(root_item, (content, str(line + 1)))
+    def clear(self):
+        self._model.clear()
+        self.emit(SIGNAL("resultsHidden(int)"), 0)
+
+    def update_results(self, dir_name_root, results):
+        """Add the (relative file name, lines) of a batch of results."""
+        self._model.add_results(dir_name_root, results)
+        self.emit(SIGNAL("resultsHidden(int)"), self._model.hidden_lines)
 
+    def show_more(self):
+        self._model.show_more()
+        self.emit(SIGNAL("resultsHidden(int)"), self._model.hidden_lines)
 
-class FindInFilesRootItem(QTreeWidgetItem):
+    def files_count(self):
+        return self._model.files_count()
 
-    """Each Tree item with the proper metadata."""
+    def file_paths(self):
+        return self._model.file_paths()
 
-    def __init__(self, parent, names, dir_name_root):
-        super(FindInFilesRootItem, self).__init__(parent, names)
-        self.dir_name_root = dir_name_root
+    def location(self, index):
+        return self._model.location(index)
 
 
 class FindInFilesDialog(QDialog):
 
     """Dialog to configure and trigger the search in the files."""
 
-    def __init__(self, result_widget, parent):
+    def __init__(self, result_widget, parent, content_indexer=None):
         super(FindInFilesDialog, self).__init__(parent)
-        self._find_thread = FindInFilesThread()
+        self._find_thread = FindInFilesThread(content_indexer)
         self.setWindowTitle(translations.TR_FIND_IN_FILES)
         self.resize(400, 300)
         #MAIN LAYOUT
@@ -332,12 +789,15 @@ class FindInFilesDialog(QDialog):
             self.dir_combo.insertItem(0, dir_name)
             self.dir_combo.setCurrentIndex(0)
 
-    def _found_match(self, result):
-        """Update the tree for each match found."""
-        file_name = result[0]
-        items = result[1]
-        self.result_widget.update_result(
-            self.dir_combo.currentText(), file_name, items)
+    def _found_match(self, results):
+        """Update the tree for each file with matches found."""
+        self.result_widget.update_results(self.dir_combo.currentText(),
+                                          results)
+
+    def search_parameters(self):
+        """Return the parameters of the last search (see
+        FindInFilesThread.search_parameters)."""
+        return self._find_thread.search_parameters()
 
     def _kill_thread(self):
         """Kill the thread."""
@@ -388,8 +848,15 @@ class FindInFilesWidget(QWidget):
         self._open_find_button = QPushButton(translations.TR_FIND + "!")
         self._stop_button = QPushButton(translations.TR_STOP + "!")
         self._clear_button = QPushButton(translations.TR_CLEAR + "!")
+        self._show_more_button = QPushButton(translations.TR_SHOW_MORE)
+        self._show_more_button.setVisible(False)
         self._replace_button = QPushButton(translations.TR_REPLACE)
-        self._find_widget = FindInFilesDialog(self._result_widget, self)
+        self._content_indexer = ContentIndexThread()
+        self._replace_thread = ReplaceInFilesThread()
+        # Edits of the files opened, applied after the ones of the disk
+        self._buffer_edits = []
+        self._find_widget = FindInFilesDialog(self._result_widget, self,
+                                              self._content_indexer)
         self._error_label = QLabel(translations.TR_NO_RESULTS)
         self._error_label.setVisible(False)
         #Replace Area
@@ -416,6 +883,7 @@ class FindInFilesWidget(QWidget):
         vbox.addWidget(self._open_find_button)
         vbox.addWidget(self._stop_button)
         vbox.addWidget(self._clear_button)
+        vbox.addWidget(self._show_more_button)
         vbox.addSpacerItem(QSpacerItem(0, 50,
             QSizePolicy.Fixed, QSizePolicy.Expanding))
         vbox.addWidget(self._replace_button)
@@ -428,23 +896,49 @@ class FindInFilesWidget(QWidget):
         self.connect(self._stop_button, SIGNAL("clicked()"), self._find_stop)
         self.connect(self._clear_button, SIGNAL("clicked()"),
             self._clear_results)
-        self.connect(self._result_widget, SIGNAL(
-            "itemActivated(QTreeWidgetItem *, int)"), self._go_to)
-        self.connect(self._result_widget, SIGNAL(
-            "itemClicked(QTreeWidgetItem *, int)"), self._go_to)
+        self.connect(self._show_more_button, SIGNAL("clicked()"),
+                     self._result_widget.show_more)
+        self.connect(self._result_widget, SIGNAL("resultsHidden(int)"),
+                     self._results_hidden)
+        self.connect(self._result_widget, SIGNAL("activated(QModelIndex)"),
+                     self._go_to)
+        self.connect(self._result_widget, SIGNAL("clicked(QModelIndex)"),
+                     self._go_to)
         self.connect(self._find_widget, SIGNAL("finished()"),
             self._find_finished)
         self.connect(self._find_widget, SIGNAL("findStarted()"),
             self._find_started)
         self.connect(self._replace_button, SIGNAL("clicked()"),
             self._replace_results)
+        self.connect(self._replace_thread,
+                     SIGNAL("replaceComputed(PyQt_PyObject)"),
+                     self._replace_computed)
+        self.connect(self._replace_thread,
+                     SIGNAL("replaceApplied(PyQt_PyObject)"),
+                     self._replace_applied)
+        self.connect(filesystem_notifications.NinjaFileSystemWatcher,
+                     SIGNAL("fileChanged(int, QString)"),
+                     self._content_indexer.file_changed)
+        self.connect(IDE.get_service('ide'), SIGNAL("goingDown()"),
+                     self._content_indexer.stop)
+
+        #Register signals connections
+        connections = (
+            {'target': 'filesystem',
+             'signal_name': 'projectOpened(QString)',
+             'slot': self._content_indexer.project_opened},
+            {'target': 'filesystem',
+             'signal_name': 'projectClosed(QString)',
+             'slot': self._content_indexer.project_closed},
+            )
+        IDE.register_signals('find_in_files', connections)
 
     def _find_finished(self):
         """Search has finished."""
         self._stop_button.setEnabled(False)
         self._open_find_button.setEnabled(True)
         self._error_label.setVisible(False)
-        if not self._result_widget.topLevelItemCount():
+        if not self._result_widget.files_count():
             self._error_label.setVisible(True)
         if self._find_widget.check_replace.isChecked():
             self.replace_widget.setVisible(True)
@@ -468,16 +962,19 @@ class FindInFilesWidget(QWidget):
         """Clear the results displayed."""
         self._result_widget.clear()
 
-    def _go_to(self, item, val):
+    def _results_hidden(self, hidden_lines):
+        """Offer to show the results hidden by the results cap."""
+        self._show_more_button.setVisible(hidden_lines > 0)
+        self._show_more_button.setToolTip(
+            translations.TR_RESULTS_HIDDEN % {'count': hidden_lines})
+
+    def _go_to(self, index):
         """Open the proper file in the proper line from the results."""
-        if item.text(1):
-            parent = item.parent()
-            file_name = parent.text(0)
-            lineno = item.text(1)
-            root_dir_name = parent.dir_name_root
-            file_path = file_manager.create_path(root_dir_name, file_name)
+        location = self._result_widget.location(index)
+        if location is not None:
+            file_path, lineno = location
             #open the file and jump_to_line
-            self._main_container.open_file(file_path, line=int(lineno) - 1)
+            self._main_container.open_file(file_path, line=lineno)
             self._main_container.get_current_editor().setFocus()
 
     def open(self):
@@ -507,31 +1004,78 @@ class FindInFilesWidget(QWidget):
         self._find_widget._find_in_files()
 
     def _replace_results(self):
-        """Replace the search with the proper text in all the files."""
-        result = QMessageBox.question(self,
-            translations.TR_REPLACE_FILES_CONTENTS,
-            translations.TR_ARE_YOU_SURE_WANT_TO_REPLACE,
-            buttons=QMessageBox.Yes | QMessageBox.No)
-        if result == QMessageBox.Yes:
-            for index in range(self._result_widget.topLevelItemCount()):
-                parent = self._result_widget.topLevelItem(index)
-                root_dir_name = parent.dir_name_root
-                file_name = parent.text(0)
-                file_path = file_manager.create_path(root_dir_name, file_name)
-                try:
-                    content = file_manager.read_file_content(file_path)
-                    pattern = self._find_widget.pattern_line_edit.text()
-                    flags = 0
-                    if not self._find_widget.case_checkbox.isChecked():
-                        flags |= re.IGNORECASE
-                    if self._find_widget.type_checkbox.isChecked():
-                        pattern = r'\b%s\b' % pattern
-
-                    new_content = re.sub(pattern,
-                        self._find_widget.replace_line.text(),
-                        content, flags=flags)
-                    file_manager.store_file_content(file_path,
-                        new_content, False)
-                except:
-                    print(('File: {} content, could not be replaced'.format(
-                           file_path)))
\ No newline at end of file
+        """Compute the replace of the search in the files of the results,
+        the replace is confirmed with the diff of the changes."""
+        if self._replace_thread.isRunning():
+            return
+        ninjaide = IDE.get_service('ide')
+        pattern, case_sensitive, fixed_string, _ = \
+            self._find_widget.search_parameters()
+        regex = search_engine.compile_pattern(pattern, case_sensitive,
+                                              fixed_string)
+        replacement = self.replace_edit.text()
+        self._buffer_edits = []
+        file_paths = []
+        for file_path in self._result_widget.file_paths():
+            editable = ninjaide.get_opened_editable(file_path)
+            if editable is None:
+                file_paths.append(file_path)
+                continue
+            # The unsaved changes of the opened files are replaced too
+            content = editable.editor.text()
+            new_content, count = replace_engine.replace_content(
+                content, regex, replacement, fixed_string)
+            if count and new_content != content:
+                self._buffer_edits.append((editable, replace_engine.FileEdit(
+                    file_path, new_content, count,
+                    diff=replace_engine.content_diff(file_path, content,
+                                                     new_content))))
+        self._replace_button.setEnabled(False)
+        self._replace_thread.compute(
+            file_paths, (pattern, case_sensitive, fixed_string), replacement)
+
+    def _replace_computed(self, result):
+        """Ask to confirm the replace showing the diff of the changes."""
+        edits, failures = result
+        self._replace_button.setEnabled(True)
+        all_edits = sorted([edit for _, edit in self._buffer_edits] + edits,
+                           key=lambda edit: edit.path)
+        if not all_edits:
+            QMessageBox.information(self,
+                                    translations.TR_REPLACE_FILES_CONTENTS,
+                                    translations.TR_REPLACE_NOTHING)
+            return
+        message = translations.TR_REPLACE_OCCURRENCES % {
+            'count': sum(edit.count for edit in all_edits),
+            'files': len(all_edits)}
+        details = ''.join(edit.diff for edit in all_edits)
+        if failures:
+            details += '\n%s\n%s' % (
+                translations.TR_REPLACE_NOT_COMPUTED,
+                '\n'.join('%s: %s' % failure for failure in failures))
+        dialog = QMessageBox(QMessageBox.Question,
+                             translations.TR_REPLACE_FILES_CONTENTS, message,
+                             QMessageBox.Yes | QMessageBox.No, self)
+        dialog.setDetailedText(details)
+        if dialog.exec_() != QMessageBox.Yes:
+            self._buffer_edits = []
+            return
+        if edits:
+            self._replace_button.setEnabled(False)
+            self._replace_thread.apply(edits)
+        else:
+            self._replace_applied(None)
+
+    def _replace_applied(self, error):
+        """Edit the opened files once the files on disk were replaced."""
+        self._replace_button.setEnabled(True)
+        buffer_edits, self._buffer_edits = self._buffer_edits, []
+        if error is not None:
+            QMessageBox.critical(
+                self, translations.TR_REPLACE_FILES_CONTENTS,
+                '%s\n\n%s' % (translations.TR_REPLACE_FAILED, '\n'.join(
+                    '%s: %s' % failure for failure in error.failures)))
+            return
+        for editable, edit in buffer_edits:
+            if editable.editor is not None:
+                helpers.replace_all_text(editable.editor, edit.content)
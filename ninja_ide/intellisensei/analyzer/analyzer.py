@@ -22,6 +22,11 @@
 import re
 import ast
 import _ast
+import tokenize
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO  # lint:ok
 
 from ninja_ide.tools.logger import NinjaLogger
 from ninja_ide.intellisensei.analyzer import model
@@ -31,6 +36,193 @@ logger = NinjaLogger('ninja_ide.tools.completion.analyzer')
 
 MAX_THRESHOLD = 3
 
+# Lines without indentation that continue the statement before them
+BLOCK_CONTINUATION = re.compile(r'(else|elif|except|finally)\b|[)\]}]')
+
+# Lines without indentation that can only start a statement, a block
+# followed by one of them is never joined with it
+STATEMENT_START = re.compile(r'@|(def|class)\s+\w+\s*[(:]|'
+                             r'from\s+[\w.]+\s+import\b|import\s+[\w.]+')
+
+def split_blocks(lines):
+    """Return the (first line, last line + 1) of the top level blocks of
+    lines: a block starts at each line without indentation, except the
+    comments, the continuations of the statement before (else, except,
+    closing brackets...) and the definitions after their decorators.
+
+    A string or brackets with lines without indentation are split in
+    several blocks, the Analyzer joins them again."""
+    blocks = []
+    start = 0
+    decorated = False
+    for index, line in enumerate(lines):
+        if (not line or line[0] in ' \t\r#' or
+                BLOCK_CONTINUATION.match(line) or
+                (index and lines[index - 1].rstrip('\r').endswith('\\'))):
+            continue
+        if index > start and not decorated:
+            blocks.append((start, index))
+            start = index
+        decorated = line.startswith('@')
+    blocks.append((start, len(lines)))
+    return blocks
+
+
+# Replacement of the broken headers of compound statements, that keeps
+# the body of the statement valid
+HEADER_REPLACEMENT = {
+    'elif': 'elif True:',
+    'else': 'else:',
+    'except': 'except:',
+    'finally': 'finally:',
+    'try': 'try:',
+}
+
+# Sources to check a header alone: (prefix, suffix)
+HEADER_CHECK = {
+    'elif': ('if True:\n pass\n', '\n pass'),
+    'else': ('if True:\n pass\n', '\n pass'),
+    'except': ('try:\n pass\n', '\n pass'),
+    'finally': ('try:\n pass\n', '\n pass'),
+    'try': ('', '\n pass\nfinally:\n pass'),
+}
+
+COMPOUND_KEYWORDS = ('if', 'elif', 'else', 'for', 'while', 'try', 'except',
+                     'finally', 'with', 'def', 'class')
+
+DEFINITION = re.compile(r'(def|class)\s+(\w+)')
+
+# Lines that can start a statement, after a statement left unfinished
+STATEMENT_LINE = re.compile(r'[@\w]')
+
+
+def _logical_lines(source):
+    """Return the tokens of each statement (logical line) of source and
+    the first line (0 based) of the statement that source ends in the
+    middle of, or None."""
+    statements = []
+    statement = []
+    try:
+        for token in tokenize.generate_tokens(StringIO(source).readline):
+            token_type = token[0]
+            if token_type == tokenize.NEWLINE:
+                statements.append(statement)
+                statement = []
+            elif token_type not in (tokenize.COMMENT, tokenize.NL,
+                                    tokenize.INDENT, tokenize.DEDENT,
+                                    tokenize.ENDMARKER):
+                statement.append(token)
+    except tokenize.TokenError as reason:
+        if statement:
+            return (statements, statement[0][2][0] - 1)
+        # A string without end starting the statement
+        return (statements, reason.args[1][0] - 1)
+    except IndentationError:
+        return (statements, None)
+    if statement:
+        statements.append(statement)
+    return (statements, None)
+
+
+def _is_valid(text, keyword, is_header):
+    prefix = suffix = ''
+    if is_header:
+        prefix, suffix = HEADER_CHECK.get(keyword, ('', '\n pass'))
+    elif keyword in ('elif', 'else', 'except', 'finally'):
+        # Statements in the same line: "else: x = 1"
+        prefix = HEADER_CHECK[keyword][0]
+    elif keyword == 'try':
+        suffix = '\nfinally:\n pass'
+    elif text.startswith('@'):
+        suffix = '\ndef _():\n pass'
+    try:
+        ast.parse(prefix + text + suffix)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def _next_statement(lines, row, indent):
+    """Return the first line from row that can start a statement at the
+    indentation indent or lower (len(lines) if there is none)."""
+    for row in range(row, len(lines)):
+        text = lines[row].lstrip()
+        if (text and len(lines[row]) - len(text) <= indent and
+                STATEMENT_LINE.match(text)):
+            return row
+    return len(lines)
+
+
+def recover_source(source):
+    """Return source with its broken statements replaced, to parse it.
+
+    The statements are found by the tokenizer and checked one by one in a
+    single pass, the broken ones are replaced by "pass" (or by a valid
+    header for the compound statements, to keep their body) and the lines
+    are kept, so the line numbers of the statements don't change. A
+    statement left unfinished (an unclosed string or brackets) is replaced
+    up to the next line that can start a statement at its indentation."""
+    lines = source.split('\n')
+    statements, unfinished = _logical_lines(source)
+    for index, tokens in enumerate(statements):
+        first_row = tokens[0][2][0] - 1
+        last_row = tokens[-1][3][0] - 1
+        indent = tokens[0][2][1]
+        text = '\n'.join([lines[first_row][indent:]] +
+                         lines[first_row + 1:last_row + 1])
+        keyword = ''
+        if tokens[0][0] == tokenize.NAME:
+            keyword = tokens[0][1]
+        # A header without colon is followed by its indented body
+        is_header = keyword in COMPOUND_KEYWORDS and (
+            tokens[-1][1] == ':' or (index + 1 < len(statements) and
+                                     statements[index + 1][0][2][1] > indent))
+        if _is_valid(text, keyword, is_header):
+            continue
+        replacement = 'pass'
+        if is_header:
+            replacement = HEADER_REPLACEMENT.get(keyword, 'if True:')
+            definition = DEFINITION.match(text)
+            if definition is not None:
+                replacement = '%s %s():' % definition.groups()
+                if definition.group(1) == 'class':
+                    replacement = 'class %s:' % definition.group(2)
+        lines[first_row] = lines[first_row][:indent] + replacement
+        for row in range(first_row + 1, last_row + 1):
+            lines[row] = ''
+    if unfinished is not None:
+        indent = re.match(r'\s*', lines[unfinished]).group()
+        lines[unfinished] = indent + 'pass'
+        resync = _next_statement(lines, unfinished + 1, len(indent))
+        for row in range(unfinished + 1, resync):
+            lines[row] = ''
+        if resync < len(lines):
+            # The statements after the unfinished one are checked again,
+            # the source is valid until it now
+            return recover_source('\n'.join(lines))
+    return '\n'.join(lines)
+
+
+def _move_lines(structure, delta, moved):
+    """Add delta to the line numbers of the TypeData of structure (a Clazz
+    or Function) and its functions, moved holds the ids of the TypeData
+    already changed (the inherited ones are shared)."""
+    type_datas = []
+    for assign in structure.attributes.values():
+        type_datas.extend(getattr(assign, 'data', ()))
+    if structure.__class__ is model.Function:
+        for assign in structure.args.values():
+            type_datas.extend(assign.data)
+        type_datas.extend(structure.return_type)
+    for type_data in type_datas:
+        # The inherited attributes have no line (0)
+        if type_data.lineno and id(type_data) not in moved:
+            moved.add(id(type_data))
+            type_data.lineno += delta
+    for function in structure.functions.values():
+        if function.__class__ is model.Function:
+            _move_lines(function, delta, moved)
+
 
 class Analyzer(object):
 
@@ -51,15 +243,25 @@ class Analyzer(object):
     def __init__(self):
         self._fixed_line = -1
         self.content = None
+        # (first line, symbols) of the top level blocks of the last
+        # analysis by their source, the blocks that don't change reuse
+        # them, moved to their new first line
+        self._blocks = {}
 #        self._functions = {}
 
     def _get_valid_module(self, source, retry=0):
-        """Try to parse the module and fix some errors if it has some."""
+        """Try to parse the module and fix some errors if it has some.
+
+        The broken statements are replaced at once (see recover_source),
+        the errors left (of indentation...) are fixed line by line."""
         astModule = None
         try:
             astModule = ast.parse(source)
             self._fixed_line = -1
         except SyntaxError as reason:
+            if retry == 0:
+                return self._get_valid_module(recover_source(source),
+                                              retry + 1)
             line = reason.lineno - 1
             if line != self._fixed_line and reason.text is not None:
                 self._fixed_line = line
@@ -75,31 +277,122 @@ class Analyzer(object):
         return astModule
 
     def analyze(self, source, old_module=None):
-        """Analyze the source provided and create the proper structure."""
-        astModule = self._get_valid_module(source)
-        if astModule is None:
-            return model.Module()
+        """Analyze the source provided and create the proper structure.
+
+        The source is analyzed by top level blocks and only the blocks that
+        changed since the last analysis are parsed again, the models
+        (Clazz, Function...) of the others are reused."""
         self.content = source.split('\n')
+        blocks = self._analyze_blocks(self.content)
 
         module = model.Module()
+        for _, (_, symbols) in blocks:
+            for symbol_type, value in symbols:
+                if symbol_type is ast.Assign:
+                    module.add_attributes(value)
+                elif symbol_type is ast.Import:
+                    module.add_imports(value)
+                elif symbol_type is ast.ClassDef:
+                    module.add_class(value)
+                elif symbol_type is ast.FunctionDef:
+                    module.add_function(value)
+        self._blocks = dict(blocks)
+        if old_module is not None:
+            self._resolve_module(module, old_module)
+
+        self.content = None
+#        self._functions = {}
+        return module
+
+    def _analyze_blocks(self, lines):
+        """Return the (source, (first line, symbols)) of the top level
+        blocks of lines."""
+        spans = split_blocks(lines)
+        blocks = []
+        index = 0
+        while index < len(spans):
+            start, end = spans[index]
+            source = '\n'.join(lines[start:end])
+            following = index + 1
+            symbols = self._reuse_block(source, start)
+            if symbols is None:
+                astModule, incomplete = self._parse_block(source)
+                # Join the blocks split inside a string or brackets
+                joined = source
+                while (astModule is None and incomplete and
+                        following < len(spans) and not STATEMENT_START.match(
+                            lines[spans[following][0]])):
+                    joined = '\n'.join(lines[start:spans[following][1]])
+                    following += 1
+                    symbols = self._reuse_block(joined, start)
+                    if symbols is not None:
+                        break
+                    astModule, incomplete = self._parse_block(joined)
+                if symbols is not None or astModule is not None:
+                    source = joined
+                else:
+                    following = index + 1
+                    self._fixed_line = -1
+                    astModule = self._get_valid_module(source)
+                if symbols is None:
+                    symbols = self._process_block(astModule, start)
+            blocks.append((source, (start, symbols)))
+            index = following
+        return blocks
+
+    def _reuse_block(self, source, start):
+        """Return the symbols of the block source of the last analysis,
+        with their line numbers moved to start, or None."""
+        block = self._blocks.get(source)
+        if block is None:
+            return None
+        old_start, symbols = block
+        if old_start == start:
+            return symbols
+        delta = start - old_start
+        moved = []
+        moved_ids = set()
+        for symbol_type, value in symbols:
+            if symbol_type is ast.Assign:
+                # (name, lineno, data type, line content, operation)
+                value = [(data[0], data[1] + delta) + tuple(data[2:])
+                         for data in value]
+            elif symbol_type in (ast.ClassDef, ast.FunctionDef):
+                _move_lines(value, delta, moved_ids)
+            moved.append((symbol_type, value))
+        return moved
+
+    def _parse_block(self, source):
+        """Return (ast module or None, True if source ends in the middle of
+        a statement)."""
+        try:
+            return (ast.parse(source), False)
+        except SyntaxError:
+            # The messages of the parser differ between versions, the
+            # tokenizer tells if a string or brackets are left open
+            return (None, _logical_lines(source)[1] is not None)
+
+    def _process_block(self, astModule, start):
+        """Return the (type, model data) of the symbols of a block parsed
+        alone, starting at the line start of the module."""
+        symbols = []
+        if astModule is None:
+            return symbols
+        ast.increment_lineno(astModule, start)
         for symbol in astModule.body:
             if symbol.__class__ is ast.Assign:
                 assigns = self._process_assign(symbol)[0]
-                module.add_attributes(assigns)
+                symbols.append((ast.Assign, assigns))
             elif symbol.__class__ in (ast.Import, ast.ImportFrom):
-                module.add_imports(self._process_import(symbol))
+                symbols.append((ast.Import, self._process_import(symbol)))
             elif symbol.__class__ is ast.ClassDef:
-                module.add_class(self._process_class(symbol))
+                symbols.append((ast.ClassDef, self._process_class(symbol)))
             elif symbol.__class__ is ast.FunctionDef:
-                module.add_function(self._process_function(symbol))
+                symbols.append((ast.FunctionDef,
+                                self._process_function(symbol)))
 #            elif symbol.__class__ is ast.Expr:
 #                self._process_expression(symbol.value)
-        if old_module is not None:
-            self._resolve_module(module, old_module)
-
-        self.content = None
-#        self._functions = {}
-        return module
+        return symbols
 
     def _resolve_module(self, module, old_module):
         module.update_classes(old_module.classes)
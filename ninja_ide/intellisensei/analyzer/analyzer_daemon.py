@@ -15,13 +15,24 @@
 # You should have received a copy of the GNU General Public License
 # along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
 
+"""Resolution of the types of the modules in a separated process.
+
+The daemon process owns the analyzed modules: the editor sends the
+changes of the source of a module (the lines replaced since the last
+time, see source_delta) and the process analyzes and resolves it, then
+the editor asks for the types to complete (get_type) and only those
+results come back."""
+
 import os
 import time
-from threading import Thread, Lock
+from threading import Thread, Lock, Condition
 from multiprocessing import Process, Queue
 
+from ninja_ide.core.file_handling import project_walker
+from ninja_ide.tools import json_manager
 from ninja_ide.intellisensei.analyzer import model
-from ninja_ide.intellisense.analyzer import analyzer
+from ninja_ide.intellisensei.analyzer import analyzer
+from ninja_ide.intellisensei.completion import completer
 
 
 try:
@@ -31,9 +42,13 @@ except NameError:
     basestring = unicode = str  # lint:ok
 
 __completion_daemon_instance = None
-WAITING_BEFORE_START = 5
 PROJECTS = {}
 
+# Seconds to wait for the answer of the daemon process to a completion
+TYPE_TIMEOUT = 0.5
+
+NOT_FOUND = {'found': False, 'type': None}
+
 
 def CompletionDaemon():
     global __completion_daemon_instance
@@ -43,117 +58,107 @@ def CompletionDaemon():
     return __completion_daemon_instance
 
 
+def source_delta(old_lines, new_lines):
+    """Return (start, end, lines) such that replacing old_lines[start:end]
+    by lines gives new_lines."""
+    limit = min(len(old_lines), len(new_lines))
+    start = 0
+    while start < limit and old_lines[start] == new_lines[start]:
+        start += 1
+    end = 0
+    while (end < limit - start and
+           old_lines[-end - 1] == new_lines[-end - 1]):
+        end += 1
+    return (start, len(old_lines) - end, new_lines[start:len(new_lines) - end])
+
+
+def _plain_result(result):
+    """Return the result of Module.get_type without the model objects, to
+    send it to the editor."""
+    plain = {'found': result.get('found', False), 'type': result['type']}
+    if not isinstance(plain['type'], (basestring, dict, list, type(None))):
+        plain['type'] = None
+    if result.get('main_attr_replace', False):
+        plain['main_attr_replace'] = True
+    return plain
+
+
 class __CompletionDaemon(Thread):
+    """Client of the daemon process, the thread receives its answers."""
 
     def __init__(self):
         Thread.__init__(self)
-        self.analyzer = analyzer.Analyzer()
-        self.modules = {}
-        self.projects_modules = {}
-        self._relations = {}
-        self.reference_counter = 0
         self.keep_alive = True
         self.lock = Lock()
+        self._answered = Condition(self.lock)
+        # Lines of the source of each module sent to the process
+        self._sources = {}
+        self._request_id = 0
+        # Answers of the requests waiting for them, by request id
+        self._waiting = set()
+        self._answers = {}
         self.queue_receive = Queue()
         self.queue_send = Queue()
         self.daemon = _DaemonProcess(self.queue_send, self.queue_receive)
         self.daemon.start()
 
     def run(self):
-        global WAITING_BEFORE_START
-        time.sleep(WAITING_BEFORE_START)
         while self.keep_alive:
-            path_id, module, resolve = self.queue_receive.get()
-            if path_id is None:
+            request_id, answer = self.queue_receive.get()
+            if request_id is None:
                 continue
-            self.lock.acquire()
-            self.modules[path_id] = module
-            self.lock.release()
-            if resolve:
-                resolution = self._resolve_with_other_modules(resolve)
-                self._relations[path_id] = []
-                for package in resolution:
-                    self._relations[path_id].append(resolution[package])
-                self.queue_send.put((path_id, module, False, resolution))
-
-    def _resolve_with_other_modules(self, packages):
-        resolution = {}
-        for package in packages:
-            if package.find('(') != -1:
-                package = package[:package.index('(')]
-            if self.projects_modules.get(package, False):
-                folder = self.projects_modules[package]
-                filename = os.path.join(folder, '__init__.py')
-                if self._analyze_file(filename):
-                    resolution[package] = filename
-            elif self.projects_modules.get(package.rsplit('.', 1)[0], False):
-                name = package.rsplit('.', 1)
-                folder = self.projects_modules[name[0]]
-                filename = "%s.py" % os.path.join(folder, name[1])
-                if os.path.isfile(filename):
-                    if self._analyze_file(filename):
-                        resolution[package] = filename
-            elif self.projects_modules.get(package.rsplit('.', 2)[0], False):
-                name = package.rsplit('.', 2)
-                folder = self.projects_modules[name[0]]
-                filename = "%s.py" % os.path.join(folder, name[1])
-                if os.path.isfile(filename):
-                    if self._analyze_file(filename):
-                        resolution[package.rsplit('.', 1)[0]] = filename
-        return resolution
-
-    def _analyze_file(self, filename):
-        try:
-            if filename not in self.modules:
-                source = ''
-                with open(filename) as f:
-                    source = f.read()
-                module = self.analyzer.analyze(source)
-                self.inspect_module(filename, module, False)
-                return True
-        except Exception as reason:
-            print(reason)
-        return False
+            with self._answered:
+                if request_id in self._waiting:
+                    self._answers[request_id] = answer
+                    self._answered.notify_all()
+
+    def inspect_source(self, path_id, source):
+        """Send the changes of the source of path_id to be analyzed."""
+        lines = source.split('\n')
+        old_lines = self._sources.get(path_id)
+        if old_lines == lines:
+            return
+        start, end, new_lines = source_delta(old_lines or [], lines)
+        self._sources[path_id] = lines
+        self.queue_send.put(('update', path_id, start, end, new_lines))
+
+    def get_type(self, path_id, main_attr, child_attrs='', scope=None):
+        """Return (result of Module.get_type, imports of the module) from
+        the daemon process, not found if it doesn't answer in time."""
+        with self._answered:
+            self._request_id += 1
+            request_id = self._request_id
+            self._waiting.add(request_id)
+        self.queue_send.put(('type', request_id, path_id, main_attr,
+                             child_attrs, scope))
+        deadline = time.time() + TYPE_TIMEOUT
+        with self._answered:
+            while request_id not in self._answers:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._answered.wait(remaining)
+            self._waiting.discard(request_id)
+            answer = self._answers.pop(request_id, None)
+        if answer is None:
+            return (dict(NOT_FOUND), [])
+        return answer
 
     def unload_module(self, path_id):
-        relations = self._relations.pop(path_id, None)
-        if relations is not None:
-            relations.append(path_id)
-            for module in relations:
-                valid = False
-                for rel in self._relations:
-                    other_modules = self._relations[rel]
-                    if module in other_modules:
-                        valid = True
-                if not valid:
-                    self.modules.pop(module, None)
+        self._sources.pop(path_id, None)
+        self.queue_send.put(('unload', path_id))
 
     def process_path(self):
         for project in PROJECTS:
             if PROJECTS[project]:
                 continue
-            project = os.path.abspath(project)
-            package = os.path.basename(project)
-            self.projects_modules[package] = project
-            for root, dirs, files in os.walk(project, followlinks=True):
-                if '__init__.py' in files:
-                    package = root[len(project) + 1:].replace(
-                        os.path.sep, '.')
-                    self.projects_modules[package] = root
-
-    def inspect_module(self, path_id, module, recursive=True):
-        self.lock.acquire()
-        self.modules[path_id] = module
-        self.lock.release()
-        self.queue_send.put((path_id, module, recursive, None))
-
-    def get_module(self, path_id):
-        return self.modules.get(path_id, None)
+            PROJECTS[project] = True
+            self.queue_send.put(('project', os.path.abspath(project)))
 
     def _shutdown_process(self):
-        self.queue_send.put((None, None, None, None))
+        self.queue_send.put(('stop',))
         self.daemon.terminate()
-        self.queue_receive.put((None, None, None))
+        self.queue_receive.put((None, None))
 
     def force_stop(self):
         self.keep_alive = False
@@ -172,37 +177,145 @@ class _DaemonProcess(Process):
         self.queue_send = queue_send
         self.iteration = 0
         self.packages = []
+        # Modules analyzed, their sources and the analyzers of the sources
+        # sent by the editor (keeping the blocks of the last analysis)
+        self.modules = {}
+        self.sources = {}
+        self.analyzers = {}
+        self.projects_modules = {}
+        self._relations = {}
 
     def run(self):
+        model.MODULES = self.modules
         while True:
-            self.iteration = 0
-            path_id, module, recursive, resolution = self.queue_receive.get()
-            if path_id is None and module is None:
+            message = self.queue_receive.get()
+            action = message[0]
+            if action == 'stop':
                 break
-
             try:
-                if resolution is not None:
-                    self.packages = resolution
-                    self.iteration = 2
-                    self._resolve_module(module)
-                elif module.need_resolution():
-                    self._resolve_module(module)
-                    self.iteration = 1
-                    self._resolve_module(module)
-                else:
-                    continue
-                if self.packages and recursive:
-                    self.queue_send.put((path_id, module, self.packages))
-                else:
-                    self.queue_send.put((path_id, module, []))
+                if action == 'update':
+                    self._update_module(*message[1:])
+                elif action == 'type':
+                    self._answer_type(*message[1:])
+                elif action == 'unload':
+                    self._unload_module(message[1])
+                elif action == 'project':
+                    self._add_project(message[1])
             except Exception as reason:
                 # Try to not die whatever happend
-                message = 'Daemon Fail with: %r', reason
-                print(message)
-                raise
+                print('Daemon Fail with: %r' % reason)
+                if action == 'type':
+                    self.queue_send.put((message[1], (dict(NOT_FOUND), [])))
             finally:
                 self.packages = []
 
+    def _update_module(self, path_id, start, end, new_lines):
+        lines = self.sources.setdefault(path_id, [])
+        lines[start:end] = new_lines
+        module_analyzer = self.analyzers.get(path_id)
+        if module_analyzer is None:
+            module_analyzer = self.analyzers[path_id] = analyzer.Analyzer()
+        module = module_analyzer.analyze('\n'.join(lines),
+                                         self.modules.get(path_id))
+        self._inspect_module(path_id, module)
+
+    def _answer_type(self, request_id, path_id, main_attr, child_attrs,
+                     scope):
+        module = self.modules.get(path_id)
+        answer = (dict(NOT_FOUND), [])
+        if module is not None:
+            result = module.get_type(main_attr, child_attrs, scope)
+            answer = (_plain_result(result), module.get_imports())
+        self.queue_send.put((request_id, answer))
+
+    def _inspect_module(self, path_id, module, recursive=True):
+        """Resolve the types of module, with the project modules it uses
+        if recursive."""
+        self.modules[path_id] = module
+        self.packages = []
+        if not module.need_resolution():
+            return
+        self.iteration = 0
+        self._resolve_module(module)
+        self.iteration = 1
+        self._resolve_module(module)
+        packages, self.packages = self.packages, []
+        if not (packages and recursive):
+            return
+        resolution = self._resolve_with_other_modules(packages)
+        self._relations[path_id] = list(resolution.values())
+        if resolution:
+            self.packages = resolution
+            self.iteration = 2
+            self._resolve_module(module)
+
+    def _resolve_with_other_modules(self, packages):
+        resolution = {}
+        for package in packages:
+            if package.find('(') != -1:
+                package = package[:package.index('(')]
+            if self.projects_modules.get(package, False):
+                folder = self.projects_modules[package]
+                filename = os.path.join(folder, '__init__.py')
+                if self._analyze_file(filename):
+                    resolution[package] = filename
+            elif self.projects_modules.get(package.rsplit('.', 1)[0], False):
+                name = package.rsplit('.', 1)
+                folder = self.projects_modules[name[0]]
+                filename = "%s.py" % os.path.join(folder, name[1])
+                if os.path.isfile(filename):
+                    if self._analyze_file(filename):
+                        resolution[package] = filename
+            elif self.projects_modules.get(package.rsplit('.', 2)[0], False):
+                name = package.rsplit('.', 2)
+                folder = self.projects_modules[name[0]]
+                filename = "%s.py" % os.path.join(folder, name[1])
+                if os.path.isfile(filename):
+                    if self._analyze_file(filename):
+                        resolution[package.rsplit('.', 1)[0]] = filename
+        return resolution
+
+    def _analyze_file(self, filename):
+        try:
+            if filename not in self.modules:
+                source = ''
+                with open(filename) as f:
+                    source = f.read()
+                # A new analyzer, the models of the blocks of an analyzer
+                # are shared by the sources analyzed with it
+                module = analyzer.Analyzer().analyze(source)
+                self._inspect_module(filename, module, False)
+            return True
+        except Exception as reason:
+            print(reason)
+        return False
+
+    def _unload_module(self, path_id):
+        self.sources.pop(path_id, None)
+        self.analyzers.pop(path_id, None)
+        relations = self._relations.pop(path_id, [])
+        relations.append(path_id)
+        for module in relations:
+            valid = False
+            for rel in self._relations:
+                other_modules = self._relations[rel]
+                if module in other_modules:
+                    valid = True
+            if not valid:
+                self.modules.pop(module, None)
+
+    def _add_project(self, project):
+        package = os.path.basename(project)
+        self.projects_modules[package] = project
+        excludes = json_manager.read_ninja_project(project).get(
+            'excludes', [])
+        for root, dirs, files in project_walker.walk(
+                project, ['__init__.py'], excludes):
+            if '__init__.py' in files:
+                package = root[len(project) + 1:].replace(
+                    os.path.sep, '.')
+                self.projects_modules[package] = root
+
     def _resolve_module(self, module):
         self._resolve_attributes(module, module)
         self._resolve_functions(module, module)
@@ -29,10 +29,8 @@ except:
 
 from ninja_ide.core import settings
 from ninja_ide.gui.editor import helpers
-from ninja_ide.tools.completion import model
-from ninja_ide.tools.completion import analyzer
-from ninja_ide.tools.completion import completer
-from ninja_ide.tools.completion import completion_daemon
+from ninja_ide.intellisensei.completion import completer
+from ninja_ide.intellisensei.analyzer import analyzer_daemon
 
 
 #Because my python doesn't have it, and is not in the web docs either
@@ -43,10 +41,7 @@ _TOKEN_NL = 54
 class CodeCompletion(object):
 
     def __init__(self):
-        self.analyzer = analyzer.Analyzer()
-        self.cdaemon = completion_daemon.CompletionDaemon()
-        # Set modules reference to model
-        model.MODULES = self.cdaemon.modules
+        self.cdaemon = analyzer_daemon.CompletionDaemon()
         self.module_id = None
         self.patIndent = re.compile('^\s+')
         self.patClass = re.compile("class (\w+?)\(")
@@ -76,14 +71,11 @@ class CodeCompletion(object):
 
         self.module_id = path
         if not self.cdaemon.daemon.is_alive():
-            completion_daemon.shutdown_daemon()
+            analyzer_daemon.shutdown_daemon()
             del self.cdaemon
-            self.cdaemon = completion_daemon.CompletionDaemon()
-            # Set modules reference to model
-            model.MODULES = self.cdaemon.modules
-        module = self.cdaemon.get_module(self.module_id)
-        module = self.analyzer.analyze(source, module)
-        self.cdaemon.inspect_module(self.module_id, module)
+            self.cdaemon = analyzer_daemon.CompletionDaemon()
+        # The daemon analyzes the lines changed since the last analysis
+        self.cdaemon.inspect_source(self.module_id, source)
 
     def _tokenize_text(self, code):
         # TODO Optimization, only iterate until the previous line of a class??
@@ -213,14 +205,8 @@ class CodeCompletion(object):
             word = word.rsplit('.', 1)[0].strip()
             if final_word == word:
                 word = ''
-        self.cdaemon.lock.acquire()
-        module = self.cdaemon.get_module(self.module_id)
-        if module:
-            imports = module.get_imports()
-            result = module.get_type(attr_name, word, scopes)
-        else:
-            result = {'found': False, 'type': None}
-        self.cdaemon.lock.release()
+        result, imports = self.cdaemon.get_type(self.module_id, attr_name,
+                                                word, scopes)
         if result['found'] and result['type'] is not None:
             prefix = attr_name
             if result['type'] != attr_name:
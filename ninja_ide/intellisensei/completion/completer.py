@@ -18,8 +18,10 @@
 
 from __future__ import absolute_import
 
+import os
 import sys
 import types
+from collections import OrderedDict
 #import inspect
 try:
     import StringIO
@@ -32,9 +34,20 @@ logger = NinjaLogger('ninja_ide.tools.completion.completer')
 _HELPOUT = StringIO.StringIO
 _STDOUT = sys.stdout
 
+# Symbols whose completions are kept, the least recently used are dropped
+CACHE_SIZE = 256
+
+# Completions of the symbols by (symbol path, imports): (completions, file
+# of the symbol, mtime of the file)
+_cache = OrderedDict()
+# mtimes of the site-packages folders when the cache was filled
+_site_packages = None
+
 
 def get_completions_per_type(object_dir):
-    '''Return info about function parameters'''
+    '''Return info about function parameters
+
+    The symbols that can't be loaded are skipped.'''
 
     if not object_dir:
         return {}
@@ -52,7 +65,7 @@ def get_completions_per_type(object_dir):
             obj = _load_symbol(attr, globals(), locals())
         except Exception as ex:
             logger.error('Could not load symbol: %r', ex)
-            return {}
+            continue
 
         if type(obj) in (types.ClassType, types.TypeType):
             # Look for the highest __init__ in the class chain.
@@ -112,15 +125,86 @@ def _import_modules(imports, dglobals):
                 continue
 
 
+def clear_cache():
+    '''Forget the completions of the symbols'''
+    global _site_packages
+    _cache.clear()
+    _site_packages = None
+
+
+def _file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
+def _site_packages_state():
+    return tuple((path, _file_mtime(path)) for path in sys.path
+                 if os.path.basename(path) in ('site-packages',
+                                               'dist-packages'))
+
+
+def _symbol_file(sym):
+    '''Return the source file of the module defining sym, or None'''
+    module = sym
+    if not isinstance(sym, types.ModuleType):
+        module = sys.modules.get(getattr(sym, '__module__', None))
+    path = getattr(module, '__file__', None)
+    if path and path[-4:] in ('.pyc', '.pyo') and os.path.exists(path[:-1]):
+        path = path[:-1]
+    return path
+
+
+def _get_cached(key):
+    '''Return the completions of key if its module didn't change'''
+    global _site_packages
+    site_packages = _site_packages_state()
+    if site_packages != _site_packages:
+        # Packages installed or removed
+        _cache.clear()
+        _site_packages = site_packages
+        return None
+    entry = _cache.pop(key, None)
+    if entry is None:
+        return None
+    completions, path, mtime = entry
+    if path is not None and _file_mtime(path) != mtime:
+        return None
+    _cache[key] = entry
+    return completions
+
+
+def _set_cached(key, completions, sym):
+    path = _symbol_file(sym)
+    _cache[key] = (completions, path, _file_mtime(path))
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def _filter_completions(completions, prefix):
+    return dict((kind, [name for name in names if name.startswith(prefix)])
+                for kind, names in completions.items())
+
+
 def get_all_completions(s, imports=None):
-    '''Return contextual completion of s (string of >= zero chars)'''
+    '''Return contextual completion of s (string of >= zero chars)
+
+    The completions of every symbol are computed once and kept in a LRU
+    cache, until the file of its module or the site-packages change.'''
     dlocals = {}
     #FIXXXXXXXXXXXXXXXX
     #return {}
 
-    _import_modules(imports, globals())
-
     dots = s.rsplit('.', 1)
+    key = None
+    if len(dots) > 1:
+        key = (dots[0], tuple(imports or ()))
+        completions = _get_cached(key)
+        if completions is not None:
+            return _filter_completions(completions, dots[-1])
+
+    _import_modules(imports, globals())
 
     sym = None
     for i in range(1, len(dots)):
@@ -149,8 +233,10 @@ def get_all_completions(s, imports=None):
     if sym is not None:
         var = s
         s = dots[-1]
-        return get_completions_per_type(["%s.%s" % (var, k) for k in
-            dir(sym) if k.startswith(s)])
+        completions = get_completions_per_type(["%s.%s" % (var, k) for k in
+            dir(sym)])
+        _set_cached(key, completions, sym)
+        return _filter_completions(completions, s)
     return {}
 
 
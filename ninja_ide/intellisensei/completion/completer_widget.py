@@ -28,7 +28,7 @@ from PyQt4.QtCore import SIGNAL
 from PyQt4.QtGui import QListWidget
 
 from ninja_ide.core import settings
-from ninja_ide.tools.completion import code_completion
+from ninja_ide.intellisensei.completion import code_completion
 
 
 class CodeCompletionWidget(QFrame):
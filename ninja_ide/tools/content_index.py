@@ -0,0 +1,511 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Trigram index of the content of the files of a project.
+
+Every sequence of three bytes (a trigram) of a file, with the ASCII
+letters lowercased, is recorded in the postings of that trigram. The
+literals any match of a search must contain are split in trigrams and only
+the files in the postings of all of them can match, so a search scans
+those candidates instead of the whole project.
+
+Each project has its own sqlite database (see index_path):
+
+    content_files(id, path, mtime, size, grams)
+    content_postings(gram, ids)
+
+The trigrams of each file are kept to update the postings by difference
+when the file changes. Postings are stored as zlib compressed arrays of
+file ids, a gram can have several rows (appended by each indexing step)
+which are merged by compact().
+
+This module doesn't depend on Qt."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import re
+import zlib
+import array
+import sqlite3
+import hashlib
+
+from ninja_ide.core.file_handling import project_walker
+
+
+INDEX_VERSION = 1
+# Files indexed between commits while refreshing a project
+COMMIT_STEP = 1000
+# Postings intersected at most by a query (the smallest ones)
+MAX_QUERY_GRAMS = 16
+_ID_TYPE = str('I')
+_NEWLINE = 10
+# Inline flags of a regex, like (?i) or (?i:...)
+_INLINE_FLAGS = re.compile(r'\(\?([aiLmsux]+)[):]')
+# Characters taken by the escapes of characters that are not literal
+_ESCAPE_LENGTHS = {'x': 2, 'u': 4, 'U': 8}
+
+
+def index_path(folder, project_path):
+    """Return the path of the index database of project_path."""
+    key = hashlib.sha1(project_path.encode('utf-8')).hexdigest()
+    return os.path.join(folder, key + '.db')
+
+
+def _pack(numbers):
+    ids = array.array(_ID_TYPE, sorted(numbers))
+    if hasattr(ids, 'tobytes'):
+        data = ids.tobytes()
+    else:
+        # Python 2
+        data = ids.tostring()
+    return sqlite3.Binary(zlib.compress(data, 1))
+
+
+def _unpack(data):
+    ids = array.array(_ID_TYPE)
+    data = zlib.decompress(bytes(data))
+    if hasattr(ids, 'frombytes'):
+        ids.frombytes(data)
+    else:
+        # Python 2
+        ids.fromstring(data)
+    return ids
+
+
+def _trigrams(data, ascii_only=False):
+    """Return the trigrams (as integers) of data without line breaks,
+    ascii_only discards the ones with bytes of multibyte characters."""
+    data = bytearray(data.lower())
+    grams = set()
+    for first, second, third in set(zip(data, data[1:], data[2:])):
+        if _NEWLINE in (first, second, third):
+            continue
+        if ascii_only and (first | second | third) > 127:
+            continue
+        grams.add((first << 16) | (second << 8) | third)
+    return grams
+
+
+def file_trigrams(content):
+    """Return the trigrams indexed for content (bytes), binary content
+    (as the walker detects it) has none."""
+    if b'\0' in content[:project_walker.BINARY_CHECK_SIZE]:
+        return set()
+    return _trigrams(content)
+
+
+def _skip_class(pattern, index):
+    """Return the index after the character class starting at index."""
+    index += 1
+    if pattern[index:index + 1] == '^':
+        index += 1
+    if pattern[index:index + 1] == ']':
+        # A ] right at the start belongs to the class
+        index += 1
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 2
+            continue
+        index += 1
+        if char == ']':
+            break
+    return index
+
+
+def _skip_to(pattern, char, index):
+    """Return the index after the next char, or the end of pattern."""
+    end = pattern.find(char, index)
+    if end == -1:
+        return len(pattern)
+    return end + 1
+
+
+def regex_literals(pattern):
+    """Return the literal strings every match of the regex pattern has.
+
+    The pattern is read conservatively: with alternations nothing is
+    required, the content of groups and classes, escapes and quantified
+    characters are skipped and split the literals around them."""
+    literals = []
+    current = []
+    depth = 0
+    index = 0
+    length = len(pattern)
+    while index < length:
+        char = pattern[index]
+        literal = None
+        if char == '\\':
+            escaped = pattern[index + 1:index + 2]
+            index += 2
+            if escaped and not escaped.isalnum():
+                literal = escaped
+            elif escaped in _ESCAPE_LENGTHS:
+                index += _ESCAPE_LENGTHS[escaped]
+            elif escaped == 'N' and pattern[index:index + 1] == '{':
+                index = _skip_to(pattern, '}', index)
+            elif escaped.isdigit():
+                # Group references and octal escapes
+                while index < length and pattern[index].isdigit():
+                    index += 1
+        elif char == '[':
+            index = _skip_class(pattern, index)
+        elif char == '|' and depth == 0:
+            return []
+        elif char in '*?{':
+            # The previous character is optional
+            if current:
+                current.pop()
+            index += 1
+            if char == '{':
+                index = _skip_to(pattern, '}', index)
+        else:
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif char not in '.^$+':
+                literal = char
+            index += 1
+        if literal is not None and depth == 0:
+            current.append(literal)
+        elif current:
+            literals.append(''.join(current))
+            current = []
+    if current:
+        literals.append(''.join(current))
+    return literals
+
+
+def query_trigrams(pattern, case_sensitive=True, fixed_string=False,
+                   words=None):
+    """Return the trigrams of the literals required by a search (as
+    search_engine.FileScanner receives it), an empty set means the index
+    can't narrow the search."""
+    if words:
+        literals = words
+    elif fixed_string:
+        literals = [pattern]
+    else:
+        flags = ''.join(_INLINE_FLAGS.findall(pattern))
+        if 'x' in flags:
+            # In verbose patterns the spaces are not literal
+            return set()
+        if 'i' in flags:
+            case_sensitive = False
+        literals = regex_literals(pattern)
+    grams = set()
+    for literal in literals:
+        # The index only lowercases ASCII, other characters can't be
+        # matched ignoring their case
+        grams.update(_trigrams(literal.encode('utf-8'),
+                               ascii_only=not case_sensitive))
+    return grams
+
+
+class _PostingsChanges(object):
+    """Ids added to and removed from the postings, written by flush()."""
+
+    def __init__(self):
+        # gram -> set of file ids
+        self.added = {}
+        self.removed = {}
+
+    def add(self, file_id, grams):
+        for gram in grams:
+            self.added.setdefault(gram, set()).add(file_id)
+            if gram in self.removed:
+                self.removed[gram].discard(file_id)
+
+    def remove(self, file_id, grams):
+        for gram in grams:
+            self.removed.setdefault(gram, set()).add(file_id)
+            if gram in self.added:
+                self.added[gram].discard(file_id)
+
+    def flush(self, connection):
+        """Write the changes: the ids added are appended as a new row of
+        each gram, the grams with ids removed are rewritten."""
+        for gram, ids in self.removed.items():
+            if ids:
+                _rewrite_postings(connection, gram, ids,
+                                  self.added.pop(gram, ()))
+        connection.executemany(
+            "INSERT INTO content_postings VALUES (?, ?)",
+            [(gram, _pack(ids)) for gram, ids in self.added.items() if ids])
+        self.added = {}
+        self.removed = {}
+
+
+def _rewrite_postings(connection, gram, removed=(), added=()):
+    """Store the postings of gram in a single row, with the changes."""
+    current = set()
+    for row in connection.execute(
+            "SELECT ids FROM content_postings WHERE gram=?", (gram,)):
+        current.update(_unpack(row[0]))
+    current.difference_update(removed)
+    current.update(added)
+    connection.execute("DELETE FROM content_postings WHERE gram=?", (gram,))
+    if current:
+        connection.execute("INSERT INTO content_postings VALUES (?, ?)",
+                           (gram, _pack(current)))
+
+
+class ContentIndex(object):
+    """The trigram index of the project in root.
+
+    The files are the ones find in files would search (see
+    search_engine.walk_files) and the index is only trusted after refresh()
+    checked all of them in this session (ready), then update_paths() keeps
+    it current with the changes notified by the file system watcher. Every
+    method opens its own connection, so it can be used from any thread."""
+
+    def __init__(self, db_path, root, excludes=()):
+        self.db_path = db_path
+        self.root = root
+        self.excludes = excludes
+        self.rules = project_walker.IgnoreRules(root, excludes)
+        self.ready = False
+        self._initialize()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _initialize(self):
+        connection = self._connect()
+        try:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != INDEX_VERSION:
+                connection.execute("DROP TABLE IF EXISTS content_files")
+                connection.execute("DROP TABLE IF EXISTS content_postings")
+                connection.execute("PRAGMA user_version=%d" % INDEX_VERSION)
+            # Searches read while the index is updated
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Ids are never reused, the postings may still have removed ones
+            # until the changes are flushed
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS content_files("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, path text UNIQUE, "
+                "mtime real, size integer, grams blob)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS content_postings("
+                "gram integer, ids blob)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS content_postings_gram "
+                "ON content_postings(gram)")
+            connection.commit()
+        finally:
+            connection.close()
+
+    def is_indexed_path(self, path):
+        """Check if path is one of the files of the project the walker
+        would list (besides its size and content)."""
+        relative = os.path.relpath(path, self.root)
+        if relative.startswith(os.pardir) or os.path.isabs(relative):
+            return False
+        for name in relative.split(os.sep):
+            if name.startswith('.'):
+                return False
+        return not self.rules.is_excluded(path)
+
+    def refresh(self, cancelled=None):
+        """Index the files added or changed since the last time and remove
+        the ones that don't exist anymore. Return True if the whole
+        project was checked (the index is ready)."""
+        connection = self._connect()
+        try:
+            known = {}
+            for row in connection.execute(
+                    "SELECT path, id, mtime, size FROM content_files"):
+                known[row[0]] = row[1:]
+            changes = _PostingsChanges()
+            pending = 0
+            files = project_walker.iter_files(
+                self.root, excludes=self.excludes,
+                max_size=project_walker.MAX_FILE_SIZE, cancelled=cancelled,
+                rules=self.rules)
+            for file_path in files:
+                if self._update_file(connection, changes, file_path,
+                                     known.pop(file_path, None)):
+                    pending += 1
+                if pending >= COMMIT_STEP:
+                    changes.flush(connection)
+                    connection.commit()
+                    pending = 0
+            if cancelled is not None and cancelled():
+                changes.flush(connection)
+                connection.commit()
+                return False
+            for file_id, _, _ in known.values():
+                self._remove_file(connection, changes, file_id)
+            changes.flush(connection)
+            self.compact(connection)
+            connection.commit()
+        finally:
+            connection.close()
+        self.ready = True
+        return True
+
+    def update_paths(self, paths):
+        """Index again the files in paths (added, changed or removed) and
+        the ones inside the folders in paths."""
+        connection = self._connect()
+        try:
+            changes = _PostingsChanges()
+            for path in paths:
+                if os.path.isdir(path):
+                    if not self.is_indexed_path(path):
+                        continue
+                    # The rules of the project are checked for each file,
+                    # they are relative to its root
+                    for file_path in project_walker.iter_files(
+                            path, max_size=project_walker.MAX_FILE_SIZE):
+                        if self.is_indexed_path(file_path):
+                            self._update_file(connection, changes, file_path)
+                elif os.path.isfile(path) and self.is_indexed_path(path):
+                    self._update_file(connection, changes, path)
+                else:
+                    self._remove_path(connection, changes, path)
+            changes.flush(connection)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _update_file(self, connection, changes, file_path, row=False):
+        """Index file_path if it changed since row (id, mtime, size) was
+        stored, row is read when not given. Return True if it was indexed
+        again."""
+        if row is False:
+            row = connection.execute(
+                "SELECT id, mtime, size FROM content_files WHERE path=?",
+                (file_path,)).fetchone()
+        try:
+            stat = os.stat(file_path)
+            if row is not None and tuple(row[1:]) == (stat.st_mtime,
+                                                       stat.st_size):
+                return False
+            grams = None
+            if stat.st_size <= project_walker.MAX_FILE_SIZE:
+                with open(file_path, 'rb') as f:
+                    grams = file_trigrams(f.read())
+        except (IOError, OSError):
+            grams = None
+        if grams is None:
+            # Removed or too big to be searched
+            if row is not None:
+                self._remove_file(connection, changes, row[0])
+            return False
+        if row is None:
+            cursor = connection.execute(
+                "INSERT INTO content_files (path, mtime, size, grams) "
+                "VALUES (?, ?, ?, ?)",
+                (file_path, stat.st_mtime, stat.st_size, _pack(grams)))
+            changes.add(cursor.lastrowid, grams)
+            return True
+        file_id = row[0]
+        old_grams = self._file_grams(connection, file_id)
+        connection.execute(
+            "UPDATE content_files SET mtime=?, size=?, grams=? WHERE id=?",
+            (stat.st_mtime, stat.st_size, _pack(grams), file_id))
+        changes.remove(file_id, old_grams - grams)
+        changes.add(file_id, grams - old_grams)
+        return True
+
+    def _file_grams(self, connection, file_id):
+        row = connection.execute(
+            "SELECT grams FROM content_files WHERE id=?",
+            (file_id,)).fetchone()
+        if row is None:
+            return set()
+        return set(_unpack(row[0]))
+
+    def _remove_file(self, connection, changes, file_id):
+        changes.remove(file_id, self._file_grams(connection, file_id))
+        connection.execute("DELETE FROM content_files WHERE id=?",
+                           (file_id,))
+
+    def _remove_path(self, connection, changes, path):
+        """Remove path and, if it was a folder, the files inside it."""
+        start = os.path.join(path, '')
+        # The paths inside the folder sort between "path/" and "path0"
+        end = start[:-1] + chr(ord(start[-1]) + 1)
+        rows = connection.execute(
+            "SELECT id FROM content_files WHERE path=? OR "
+            "(path >= ? AND path < ?)", (path, start, end)).fetchall()
+        for row in rows:
+            self._remove_file(connection, changes, row[0])
+
+    def compact(self, connection=None):
+        """Merge the rows of the grams with postings in several rows."""
+        own_connection = connection is None
+        if own_connection:
+            connection = self._connect()
+        try:
+            grams = [row[0] for row in connection.execute(
+                "SELECT gram FROM content_postings GROUP BY gram "
+                "HAVING count(*) > 1")]
+            for gram in grams:
+                _rewrite_postings(connection, gram)
+            if own_connection:
+                connection.commit()
+        finally:
+            if own_connection:
+                connection.close()
+
+    def candidates(self, grams):
+        """Return the sorted paths of the files having all the grams, or
+        None if the index can't tell (not ready, or no grams)."""
+        if not self.ready or not grams:
+            return None
+        connection = self._connect()
+        try:
+            postings = []
+            for gram in grams:
+                rows = connection.execute(
+                    "SELECT ids FROM content_postings WHERE gram=?",
+                    (gram,)).fetchall()
+                if not rows:
+                    return []
+                postings.append([row[0] for row in rows])
+            # The smallest postings narrow the most, the compressed size
+            # is good enough to find them
+            postings.sort(key=lambda blobs: sum(len(blob) for blob in blobs))
+            ids = None
+            for blobs in postings[:MAX_QUERY_GRAMS]:
+                gram_ids = set()
+                for blob in blobs:
+                    gram_ids.update(_unpack(blob))
+                if ids is None:
+                    ids = gram_ids
+                else:
+                    ids.intersection_update(gram_ids)
+                if not ids:
+                    return []
+            ids = sorted(ids)
+            paths = []
+            # sqlite limits the variables of a statement
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                paths.extend(row[0] for row in connection.execute(
+                    "SELECT path FROM content_files WHERE id IN (%s)" %
+                    ', '.join('?' * len(chunk)), chunk))
+            return sorted(paths)
+        finally:
+            connection.close()
@@ -18,27 +18,27 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import os
-import sqlite3
-import pickle
-try:
-    import Queue
-except:
-    import queue as Queue  # lint:ok
+import time
+import fnmatch
+import multiprocessing
 
 from PyQt4.QtGui import QMessageBox
 from PyQt4.QtCore import QObject
 from PyQt4.QtCore import QThread
-from PyQt4.QtCore import QDir
-from PyQt4.QtCore import QFile
-from PyQt4.QtCore import QTextStream
 from PyQt4.QtCore import SIGNAL
 
 from ninja_ide import resources
 from ninja_ide import translations
-from ninja_ide.extensions import handlers
 from ninja_ide.gui.ide import IDE
 from ninja_ide.core.file_handling import file_manager
+from ninja_ide.core.file_handling import project_walker
+from ninja_ide.core.file_handling import project_snapshot
 from ninja_ide.core import settings
+from ninja_ide.tools.locator import symbols_db
+from ninja_ide.tools.locator import symbols_extractor
+from ninja_ide.tools.locator import symbols_records
+from ninja_ide.tools.locator.symbols_index import SymbolsIndex
+from ninja_ide.tools.locator.paths_index import PathsIndex
 
 from ninja_ide.tools.logger import NinjaLogger
 
@@ -47,44 +47,28 @@ logger = NinjaLogger('ninja_ide.tools.locator')
 
 mapping_symbols = {}
 files_paths = {}
+# Trigram index kept in sync with mapping_symbols
+symbols_index = SymbolsIndex()
+# Index of files_paths used by the quick file opener
+paths_index = PathsIndex()
 
 
-#@ FILES
-#< CLASSES
-#> FUNCTIONS
-#- MODULE ATTRIBUTES
-#! NO PYTHON FILES
-#. SYMBOLS IN THIS FILE
-#/ TABS OPENED
-#: LINE NUMBER
-FILTERS = {
-    'files': '@',
-    'classes': '<',
-    'functions': '>',
-    'attribs': '-',
-    'non-python': '!',
-    'this-file': '.',
-    'tabs': '/',
-    'lines': ':'}
+FILTERS = symbols_extractor.FILTERS
 
-
-db_path = os.path.join(resources.NINJA_KNOWLEDGE_PATH, 'locator.db')
-
-
-def _initialize_db():
-    locator_db = sqlite3.connect(db_path)
-    cur = locator_db.cursor()
-    cur.execute("create table if not exists "
-                "locator(path text PRIMARY KEY, stat integer, data blob)")
-    locator_db.commit()
-    locator_db.close()
+# Minimum amount of files to parse to use worker processes
+PARALLEL_THRESHOLD = 64
+# Seconds between the notifications of the partial results while indexing
+PUBLISH_INTERVAL = 0.5
 
 
-# Initialize Database and open connection
-_initialize_db()
+db_path = os.path.join(resources.NINJA_KNOWLEDGE_PATH, 'locator.db')
+# Snapshots of the projects, only their changed folders are listed again
+snapshots_path = os.path.join(resources.NINJA_KNOWLEDGE_PATH,
+                              'project_snapshots')
 
 
-#TODO: Clean non existent paths from the DB
+# Initialize Database
+symbols_db.initialize(db_path)
 
 
 class GoToDefinition(QObject):
@@ -125,12 +109,17 @@ class GoToDefinition(QObject):
 class ResultItem(object):
     """The Representation of each item found with the locator."""
 
-    def __init__(self, symbol_type='', name='', path='', lineno=-1):
+    __slots__ = ('type', 'name', 'path', 'lineno', 'comparison', 'line')
+
+    def __init__(self, symbol_type='', name='', path='', lineno=-1,
+                 line=''):
         if name:
             self.type = symbol_type  # Function, Class, etc
             self.name = name
             self.path = path
             self.lineno = lineno
+            # Source line where the symbol is defined
+            self.line = line
             self.comparison = self.name
             index = self.name.find('(')
             if index != -1:
@@ -144,13 +133,6 @@ class ResultItem(object):
     def __len__(self):
         return len(self.name)
 
-    def __iter__(self):
-        for i in self.name:
-            yield i
-
-    def __getitem__(self, index):
-        return self.name[index]
-
 
 class LocateSymbolsThread(QThread):
 
@@ -160,9 +142,13 @@ class LocateSymbolsThread(QThread):
         self._cancel = False
         self.locations = []
         self.execute = None
-        self.dirty = False
         self._search = None
         self._isVariable = None
+        # Files (or folders) changed since the last update
+        self._pending_paths = set()
+        self._last_publish = 0
+        # project path -> project_walker.IgnoreRules
+        self._project_rules = {}
 
         # Locator Knowledge
         self._locator_db = None
@@ -185,13 +171,21 @@ class LocateSymbolsThread(QThread):
             global files_paths
             mapping_symbols = {}
             files_paths = {}
+            symbols_index.clear()
+            paths_index.clear()
+            self._pending_paths.clear()
+            # Read the .gitignore files again
+            self._project_rules = {}
             self.execute = self.locate_code
             self.start()
 
     def find_file_code_location(self, path):
-        self._file_path = path
-        if not self._file_path:
+        """Queue path (added, modified, deleted or renamed) to update
+        only its symbols, if a full exploration is running the path is
+        processed when it ends."""
+        if not path:
             return
+        self._pending_paths.add(path)
         if not self.isRunning():
             self.execute = self.locate_file_code
             self.start()
@@ -200,6 +194,8 @@ class LocateSymbolsThread(QThread):
         self.results = []
         self.locations = []
         self.execute()
+        if self._pending_paths and not self._cancel:
+            self.locate_file_code()
         if self._cancel:
             self.results = []
             self.locations = []
@@ -207,127 +203,275 @@ class LocateSymbolsThread(QThread):
         self._search = None
         self._isVariable = None
         if self._locator_db is not None:
-            self._locator_db.commit()
             self._locator_db.close()
             self._locator_db = None
 
-    def _save_file_symbols(self, path, stat, data):
-        if self._locator_db is not None:
-            pdata = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
-            cur = self._locator_db.cursor()
-            cur.execute("INSERT OR REPLACE INTO locator values (?, ?, ?)",
-                        (path, stat, sqlite3.Binary(pdata)))
-            self._locator_db.commit()
-
-    def _get_file_symbols(self, path):
+    def _save_file_symbols(self, path, stat, content_hash, records):
         if self._locator_db is not None:
-            cur = self._locator_db.cursor()
-            cur.execute("SELECT * FROM locator WHERE path=:path",
-                        {'path': path})
-            return cur.fetchone()
+            mtime, size = stat
+            self._locator_db.save(path, mtime, size, content_hash,
+                                  symbols_records.encode(records))
+
+    def _publish_partial_results(self, force=False):
+        """Let the views know that more symbols are available, at most
+        once every PUBLISH_INTERVAL seconds unless forced."""
+        now = time.time()
+        if force or now - self._last_publish >= PUBLISH_INTERVAL:
+            self._last_publish = now
+            self.emit(SIGNAL("partialResults()"))
 
     def locate_code(self):
-        self._locator_db = sqlite3.connect(db_path)
+        """Index the symbols of the projects: the opened files first, then
+        the current project and then the rest. The symbols are published
+        as soon as they are found, partialResults() is emitted while
+        indexing for the views to refresh."""
+        global files_paths
+        self._locator_db = symbols_db.SymbolsDB(db_path)
         ide = IDE.get_service('ide')
         projects = ide.filesystem.get_projects()
         if not projects:
             return
-        projects = list(projects.values())
+        current_project = ide.get_current_project()
+        projects = sorted(projects.values(),
+                          key=lambda nproject: nproject is not current_project)
+        for nproject in projects:
+            files_paths[nproject.path] = list()
+            self._locator_db.prefetch(nproject.path)
+        indexed = self._locate_opened_files(ide)
+        self._publish_partial_results(force=True)
         for nproject in projects:
             if self._cancel:
                 break
-            current_dir = QDir(nproject.path)
             #Skip not readable dirs!
-            if not current_dir.isReadable():
+            if not os.access(nproject.path, os.R_OK):
                 continue
-
-            queue_folders = Queue.Queue()
-            queue_folders.put(current_dir)
-            files_paths[nproject.path] = list()
-            self.__locate_code_in_project(queue_folders, nproject)
-        self.dirty = True
+            self.__locate_code_in_project(nproject, indexed)
+            self._publish_partial_results(force=True)
+        if not self._cancel:
+            # Every file was visited, what is left belongs to removed files
+            self._locator_db.remove_stale()
+            self._locator_db.collect_garbage()
         self.get_locations()
 
-    def __locate_code_in_project(self, queue_folders, nproject):
-        file_filter = QDir.Files | QDir.NoDotAndDotDot | QDir.Readable
-        dir_filter = QDir.Dirs | QDir.NoDotAndDotDot | QDir.Readable
-        while not self._cancel and not queue_folders.empty():
-            current_dir = QDir(queue_folders.get())
-            #Skip not readable dirs!
-            if not current_dir.isReadable():
+    def _locate_opened_files(self, ide):
+        """Index the files opened in the editor that belong to a project,
+        returns the set of paths indexed."""
+        global files_paths
+        indexed = set()
+        for nfile in ide.opened_files:
+            path = nfile.file_path
+            if self._cancel:
+                break
+            if path is None or path in indexed or not os.path.isfile(path):
                 continue
-
-            #Collect all sub dirs!
-            current_sub_dirs = current_dir.entryInfoList(dir_filter)
-            for one_dir in current_sub_dirs:
-                queue_folders.put(one_dir.absoluteFilePath())
-
-            #all files in sub_dir first apply the filters
-            current_files = current_dir.entryInfoList(
-                ['*{0}'.format(x) for x in nproject.extensions], file_filter)
-            #process all files in current dir!
-            global files_paths
-            for one_file in current_files:
+            nproject = self._get_project_for_path(path)
+            if nproject is None or not self._is_project_file(nproject, path):
+                continue
+            try:
+                self._grep_file_symbols(path, file_manager.get_basename(path))
+                self._add_project_file(nproject, path)
+                indexed.add(path)
+            except Exception as reason:
+                logger.error('_locate_opened_files fail for file: %r, %r' %
+                             (path, reason))
+        return indexed
+
+    def __locate_code_in_project(self, nproject, indexed=()):
+        # Files without valid symbols in the locator db
+        files_to_parse = []
+        snapshot = project_snapshot.scan_project(
+            nproject.path, nproject.extensions, nproject.excludes,
+            project_snapshot.snapshot_path(snapshots_path, nproject.path),
+            self._is_cancelled)
+        if self._cancel:
+            return
+        files = snapshot.iter_files(max_size=project_walker.MAX_FILE_SIZE)
+        for file_path, stat in files:
+            if file_path in indexed:
+                continue
+            try:
+                if self._is_new_file(file_path):
+                    # Read and hashed only once, when it is parsed
+                    files_to_parse.append(file_path)
+                else:
+                    # The changed files to parse are read again, their
+                    # contents aren't kept meanwhile
+                    loaded, _ = self._load_file_symbols(
+                        file_path, file_manager.get_basename(file_path),
+                        stat)
+                    if not loaded:
+                        files_to_parse.append(file_path)
+                self._add_project_file(nproject, file_path)
+            except Exception as reason:
+                logger.error(
+                    '__locate_code_in_project, error: %r' % reason)
+                logger.error(
+                    '__locate_code_in_project fail for file: %r' %
+                    file_path)
+            self._publish_partial_results()
+        if self._cancel:
+            return
+        processes = settings.LOCATOR_PROCESSES or multiprocessing.cpu_count()
+        if processes > 1 and len(files_to_parse) >= PARALLEL_THRESHOLD:
+            self.__parse_files_in_pool(files_to_parse, processes)
+        else:
+            for file_path in files_to_parse:
+                if self._cancel:
+                    break
                 try:
-                    self._grep_file_symbols(one_file.absoluteFilePath(),
-                                            one_file.fileName())
-                    files_paths[nproject.path].append(
-                        one_file.absoluteFilePath())
+                    # The files in the cache were loaded while walking
+                    # the project
+                    self._extract_file_symbols(
+                        file_path, file_manager.get_basename(file_path))
                 except Exception as reason:
                     logger.error(
-                        '__locate_code_in_project, error: %r' % reason)
-                    logger.error(
-                        '__locate_code_in_project fail for file: %r' %
-                        one_file.absoluteFilePath())
+                        '__locate_code_in_project fail for file: %r, %r' %
+                        (file_path, reason))
+                self._publish_partial_results()
+
+    def __parse_files_in_pool(self, files_to_parse, processes):
+        """Extract the symbols of the files in worker processes and merge
+        the records received in the locator and its db."""
+        chunksize = max(1, len(files_to_parse) // (processes * 8))
+        pool = multiprocessing.Pool(processes,
+                                    symbols_extractor.init_worker)
+        try:
+            results = pool.imap_unordered(
+                symbols_extractor.extract_symbols_worker, files_to_parse,
+                chunksize)
+            for file_path, stat, content_hash, data, error in results:
+                if self._cancel:
+                    break
+                if error is not None:
+                    logger.error('__parse_files_in_pool fail for file: '
+                                 '%r, %s' % (file_path, error))
+                    continue
+                records = None
+                if data is not None:
+                    mtime, size = stat
+                    self._locator_db.save(file_path, mtime, size,
+                                          content_hash, data)
+                    records = symbols_records.decode(data)
+                self._add_file_symbols(
+                    file_path, file_manager.get_basename(file_path), records)
+                self._publish_partial_results()
+        finally:
+            pool.terminate()
+            pool.join()
 
     def locate_file_code(self):
-        self._locator_db = sqlite3.connect(db_path)
-        file_name = file_manager.get_basename(self._file_path)
-        try:
-            self._grep_file_symbols(self._file_path, file_name)
-            self.dirty = True
-        except Exception as reason:
-            logger.error('locate_file_code, error: %r' % reason)
+        if self._locator_db is None:
+            self._locator_db = symbols_db.SymbolsDB(db_path)
+        while self._pending_paths and not self._cancel:
+            path = self._pending_paths.pop()
+            try:
+                self._update_path_symbols(path)
+            except Exception as reason:
+                logger.error('locate_file_code, error: %r' % reason)
+
+    def _update_path_symbols(self, path):
+        """Apply the change of path to the symbols tables."""
+        global files_paths
+        nproject = self._get_project_for_path(path)
+        if os.path.isdir(path):
+            # A new (or moved) folder, queue the files inside it
+            if (nproject is not None and
+                    not self._get_project_rules(nproject).is_excluded(path)):
+                self._pending_paths.update(project_walker.iter_files(
+                    path, ['*{0}'.format(x) for x in nproject.extensions],
+                    max_size=project_walker.MAX_FILE_SIZE,
+                    rules=self._get_project_rules(nproject)))
+        elif os.path.isfile(path):
+            if nproject is None:
+                self._grep_file_symbols(path, file_manager.get_basename(path))
+            elif self._is_project_file(nproject, path):
+                self._grep_file_symbols(path, file_manager.get_basename(path))
+                if path not in files_paths.get(nproject.path, ()):
+                    self._add_project_file(nproject, path)
+        else:
+            self._remove_path_symbols(path)
+
+    def _remove_path_symbols(self, path):
+        """Remove the symbols of path, or of every file inside it."""
+        global mapping_symbols
+        global files_paths
+        prefix = os.path.join(path, '')
+        removed = [file_path for file_path in list(mapping_symbols.keys())
+                   if file_path == path or file_path.startswith(prefix)]
+        for file_path in removed:
+            mapping_symbols.pop(file_path, None)
+            symbols_index.remove_file(file_path)
+        paths_index.remove(removed)
+        if self._locator_db is not None:
+            self._locator_db.delete(removed or [path])
+        if removed:
+            removed = set(removed)
+            for project_path in files_paths:
+                files_paths[project_path] = [
+                    file_path for file_path in files_paths[project_path]
+                    if file_path not in removed]
+
+    def _add_project_file(self, nproject, path):
+        global files_paths
+        files_paths.setdefault(nproject.path, []).append(path)
+        paths_index.add(nproject.path, path)
+
+    def _get_project_for_path(self, path):
+        ide = IDE.get_service('ide')
+        if ide is None:
+            return None
+        for project_path, nproject in ide.filesystem.get_projects().items():
+            if file_manager.belongs_to_folder(project_path, path):
+                return nproject
+        return None
+
+    def _is_project_file(self, nproject, path):
+        file_name = file_manager.get_basename(path)
+        for extension in nproject.extensions:
+            if fnmatch.fnmatch(file_name, '*{0}'.format(extension)):
+                break
+        else:
+            return False
+        if os.path.getsize(path) > project_walker.MAX_FILE_SIZE:
+            return False
+        return not self._get_project_rules(nproject).is_excluded(path)
+
+    def _get_project_rules(self, nproject):
+        rules = self._project_rules.get(nproject.path)
+        if rules is None:
+            rules = project_walker.IgnoreRules(nproject.path,
+                                               nproject.excludes)
+            self._project_rules[nproject.path] = rules
+        return rules
+
+    def _is_cancelled(self):
+        return self._cancel
 
     def go_to_definition(self):
-        self.dirty = True
+        """Look up the definitions of the name searched in the symbols
+        index, the source lines were stored with the symbols so no file
+        is read here."""
         self.results = []
-        locations = self.get_locations()
         if self._isVariable:
-            preResults = [
-                [file_manager.get_basename(x.path), x.path, x.lineno, '']
-                for x in locations
-                if (x.type == FILTERS['attribs']) and (x.name == self._search)]
+            symbol_types = (FILTERS['attribs'],)
         else:
-            preResults = [
-                [file_manager.get_basename(x.path), x.path, x.lineno, '']
-                for x in locations
-                if ((x.type == FILTERS['functions']) or
-                    (x.type == FILTERS['classes'])) and
-                   (x.name.startswith(self._search))]
-        for data in preResults:
-            file_object = QFile(data[1])
-            if not file_object.open(QFile.ReadOnly):
-                return
-
-            stream = QTextStream(file_object)
-            line_index = 0
-            line = stream.readLine()
-            while not self._cancel and not stream.atEnd():
-                if line_index == data[2]:
-                    data[3] = line
-                    self.results.append(data)
-                    break
-                #take the next line!
-                line = stream.readLine()
-                line_index += 1
+            symbol_types = (FILTERS['functions'], FILTERS['classes'])
+        for item in symbols_index.definitions(self._search, symbol_types):
+            self.results.append([file_manager.get_basename(item.path),
+                                 item.path, item.lineno, item.line])
 
     def get_locations(self):
-        if self.dirty:
-            self.convert_map_to_array()
-            self.dirty = False
+        # The index only re-sorts when its content changed
+        self.convert_map_to_array()
         return self.locations
 
+    def search_locations(self, text, symbol_type=None, project_path=None,
+                         recent_paths=()):
+        """Return the locations fuzzy matching text ranked by relevance,
+        the results are sorted lazily as they are paged."""
+        return symbols_index.rank(text, symbol_type, project_path,
+                                  recent_paths)
+
     def get_this_file_symbols(self, path):
         global mapping_symbols
         symbols = mapping_symbols.get(path, ())
@@ -342,113 +486,109 @@ class LocateSymbolsThread(QThread):
         return symbols
 
     def convert_map_to_array(self):
-        global mapping_symbols
-        self.locations = [x for location in mapping_symbols
-                          for x in mapping_symbols[location]]
-        self.locations = sorted(self.locations, key=lambda item: item.name)
+        self.locations = symbols_index.get_locations()
+
+    def _is_new_file(self, file_path):
+        """Return True if file_path has symbols to extract and it isn't in
+        the locator db yet."""
+        file_ext = file_manager.get_file_extension(file_path)
+        return (self._locator_db is not None and
+                symbols_extractor.has_symbols_handler(file_ext) and
+                self._locator_db.get(file_path) is None)
+
+    def _load_file_symbols(self, file_path, file_name, stat=None):
+        """Publish the symbols of file_path stored in the locator db,
+        stat is its (mtime, size) if it is known.
+        Return (True if they were published, the (stat, content) of the
+        file if it was read, or None), the content read is given to
+        _extract_file_symbols when they have to be extracted.
+
+        When the stat of the file changed its content is hashed, the
+        symbols of that content may be known (from another path or the
+        same file before switching branches)."""
+        file_ext = file_manager.get_file_extension(file_path)
+        if not symbols_extractor.has_symbols_handler(file_ext):
+            # Nothing to extract, only the file is listed
+            self._add_file_symbols(file_path, file_name, None)
+            return (True, None)
+        if self._locator_db is None:
+            return (False, None)
+        if stat is None:
+            stat = symbols_extractor.file_stat(file_path)
+        row = self._locator_db.get(file_path)
+        changed = row is None or stat != (row[1], row[2])
+        read = None
+        if changed:
+            read = (stat, symbols_extractor.read_file(file_path))
+            content_hash = symbols_extractor.content_hash(read[1])
+        else:
+            content_hash = row[3]
+        data = self._locator_db.get_symbols(content_hash)
+        if data is None:
+            return (False, read)
+        try:
+            records = symbols_records.decode(data)
+        except ValueError:
+            # Written by an older version or corrupted
+            logger.debug("Symbols couldn't be loaded for: %r" % file_path)
+            return (False, read)
+        if changed:
+            mtime, size = stat
+            self._locator_db.save(file_path, mtime, size, content_hash)
+        self._add_file_symbols(file_path, file_name, records)
+        return (True, read)
 
     def _grep_file_symbols(self, file_path, file_name):
         #type - file_name - file_path
+        loaded, read = self._load_file_symbols(file_path, file_name)
+        if not loaded:
+            self._extract_file_symbols(file_path, file_name, read)
+
+    def _extract_file_symbols(self, file_path, file_name, read=None):
+        """Extract the symbols of file_path, read is its (stat, content)
+        if it was already read."""
+        if read is None:
+            stat = symbols_extractor.file_stat(file_path)
+            content = symbols_extractor.read_file(file_path)
+        else:
+            stat, content = read
+        file_ext = file_manager.get_file_extension(file_path)
+        records = symbols_extractor.extract_symbols(content, file_path,
+                                                    file_ext)
+        if records is not None:
+            self._save_file_symbols(file_path, stat,
+                                    symbols_extractor.content_hash(content),
+                                    records)
+        self._add_file_symbols(file_path, file_name, records)
+
+    def _add_file_symbols(self, file_path, file_name, records):
+        """Publish the file and its symbols records in the locator."""
         global mapping_symbols
         exts = settings.SYNTAX.get('python')['extension']
         file_ext = file_manager.get_file_extension(file_path)
         if file_ext not in exts:
-            mapping_symbols[file_path] = [
-                ResultItem(symbol_type=FILTERS['non-python'], name=file_name,
-                           path=file_path, lineno=-1)]
+            items = [ResultItem(symbol_type=FILTERS['non-python'],
+                                name=file_name, path=file_path, lineno=-1)]
         else:
-            mapping_symbols[file_path] = [
-                ResultItem(symbol_type=FILTERS['files'], name=file_name,
-                           path=file_path, lineno=-1)]
-        data = self._get_file_symbols(file_path)
-        #FIXME: stat not int
-        mtime = int(os.stat(file_path).st_mtime)
-        if data is not None and (mtime == int(data[1])):
-            try:
-                results = pickle.loads(str(data[2]))
-                mapping_symbols[file_path] += results
-                return
-            except:
-                print "ResultItem couldn't be loaded, let's analyze it again'"
-        #obtain a symbols handler for this file extension
-        symbols_handler = handlers.get_symbols_handler(file_ext)
-        if symbols_handler is None:
-            return
-        results = []
-        with open(file_path) as f:
-            content = f.read()
-            symbols = symbols_handler.obtain_symbols(
-                content,
-                filename=file_path)
-            self.__parse_symbols(symbols, results, file_path)
-
-        if results:
-            self._save_file_symbols(file_path, mtime, results)
-            mapping_symbols[file_path] += results
-
-    def __parse_symbols(self, symbols, results, file_path):
-        if "classes" in symbols:
-            self.__parse_class(symbols, results, file_path)
-        if 'attributes' in symbols:
-            self.__parse_attributes(symbols, results, file_path)
-        if 'functions' in symbols:
-            self.__parse_functions(symbols, results, file_path)
-
-    def __parse_class(self, symbols, results, file_path):
-        clazzes = symbols['classes']
-        for claz in clazzes:
-            line_number = clazzes[claz]['lineno'] - 1
-            members = clazzes[claz]['members']
-            results.append(ResultItem(symbol_type=FILTERS['classes'],
-                           name=claz, path=file_path,
-                           lineno=line_number))
-            if 'attributes' in members:
-                for attr in members['attributes']:
-                    line_number = members['attributes'][attr] - 1
-                    results.append(ResultItem(symbol_type=FILTERS['attribs'],
-                                   name=attr, path=file_path,
-                                   lineno=line_number))
-            if 'functions' in members:
-                for func in members['functions']:
-                    line_number = members['functions'][func]['lineno'] - 1
-                    results.append(ResultItem(
-                        symbol_type=FILTERS['functions'], name=func,
-                        path=file_path, lineno=line_number))
-                    self.__parse_symbols(
-                        members['functions'][func]['functions'],
-                        results, file_path)
-            if 'classes' in members:
-                self.__parse_class(members, results, file_path)
-
-    def __parse_attributes(self, symbols, results, file_path):
-        attributes = symbols['attributes']
-        for attr in attributes:
-            line_number = attributes[attr] - 1
-            results.append(ResultItem(symbol_type=FILTERS['attribs'],
-                           name=attr, path=file_path,
-                           lineno=line_number))
-
-    def __parse_functions(self, symbols, results, file_path):
-        functions = symbols['functions']
-        for func in functions:
-            line_number = functions[func]['lineno'] - 1
-            results.append(ResultItem(
-                symbol_type=FILTERS['functions'], name=func,
-                path=file_path, lineno=line_number))
-            self.__parse_symbols(functions[func]['functions'],
-                                 results, file_path)
+            items = [ResultItem(symbol_type=FILTERS['files'], name=file_name,
+                                path=file_path, lineno=-1)]
+        if records:
+            items += self.__records_to_items(records, file_path)
+        mapping_symbols[file_path] = items
+        symbols_index.update_file(file_path, items)
+
+    def __records_to_items(self, records, file_path):
+        return [ResultItem(symbol_type=symbol_type, name=name,
+                           path=file_path, lineno=lineno, line=line)
+                for (symbol_type, name, lineno), line in zip(records,
+                                                             records.lines)]
 
     def get_symbols_for_class(self, file_path, clazzName):
-        results = []
-        with open(file_path) as f:
-            content = f.read()
-            ext = file_manager.get_file_extension(file_path)
-            #obtain a symbols handler for this file extension
-            symbols_handler = handlers.get_symbols_handler(ext)
-            symbols = symbols_handler.obtain_symbols(content,
-                                                     filename=file_path)
-            self.__parse_symbols(symbols, results, file_path)
-        return results
+        ext = file_manager.get_file_extension(file_path)
+        records = symbols_extractor.extract_file_symbols(file_path, ext)
+        if not records:
+            return []
+        return self.__records_to_items(records, file_path)
 
     def cancel(self):
         self._cancel = True
\ No newline at end of file
@@ -28,6 +28,7 @@ from PyQt4.QtDeclarative import QDeclarativeView
 
 from ninja_ide.core import settings
 from ninja_ide.core.file_handling import file_manager
+from ninja_ide.core.file_handling import filesystem_notifications
 from ninja_ide.tools import ui_tools
 from ninja_ide.gui.ide import IDE
 from ninja_ide.tools.locator import locator
@@ -59,6 +60,12 @@ class LocatorWidget(QDialog):
         self.connect(self.locate_symbols, SIGNAL("finished()"), self._cleanup)
         self.connect(self.locate_symbols, SIGNAL("terminated()"),
                      self._cleanup)
+        self.connect(self.locate_symbols, SIGNAL("partialResults()"),
+                     self._partial_results)
+        # Keep the symbols of the projects updated file by file
+        self.connect(filesystem_notifications.NinjaFileSystemWatcher,
+                     SIGNAL("fileChanged(int, QString)"),
+                     self._file_changed)
 
         # Locator things
         self.filterPrefix = re.compile(r'(@|<|>|-|!|\.|/|:)')
@@ -127,6 +134,36 @@ class LocatorWidget(QDialog):
     def explore_file_code(self, path):
         self.locate_symbols.find_file_code_location(path)
 
+    def _file_changed(self, event, path):
+        self.explore_file_code(path)
+
+    def _partial_results(self):
+        """New symbols were indexed, refresh the results being shown."""
+        if self.isVisible():
+            self._refresh_results()
+        self.emit(SIGNAL("locatorUpdated()"))
+
+    def _refresh_results(self):
+        """Search again keeping the pages loaded, the current item and the
+        scroll position of the results being shown."""
+        current = self._root.currentItem()
+        index, content_y = self._root.viewState()
+        loaded = self.items_in_page
+        items = self.filter()
+        while (self.items_in_page < loaded and
+               self.items_in_page < len(self.tempLocations)):
+            items += self._create_list_items(self.tempLocations)
+        if current:
+            _, name, path, lineno = current
+            for position, item in enumerate(items):
+                if (item.name, item.path, item.lineno) == (name, path,
+                                                           lineno):
+                    index = position
+                    break
+        self._root.clear()
+        self._load_items(items)
+        self._root.restoreView(index, content_y)
+
     def set_prefix(self, prefix):
         """Set the prefix for the completer."""
         self.__prefix = prefix.lower()
@@ -181,9 +218,8 @@ class LocatorWidget(QDialog):
         if len(filterOptions) == 0:
             self.tempLocations = self.locate_symbols.get_locations()
         elif len(filterOptions) == 1:
-            self.tempLocations = [
-                x for x in self.locate_symbols.get_locations()
-                if x.comparison.lower().find(filterOptions[0].lower()) > -1]
+            self.tempLocations = self.locate_symbols.search_locations(
+                filterOptions[0], **self._search_context())
         else:
             index = 0
             if not self.tempLocations and (self.__pre_filters == filterOptions):
@@ -200,13 +236,32 @@ class LocatorWidget(QDialog):
                 self.__pre_results = self.tempLocations
         return self._create_list_items(self.tempLocations)
 
+    def _search_context(self):
+        """Return the current project and the recently opened files, used
+        to rank the results of a search."""
+        ninjaide = IDE.get_service('ide')
+        if ninjaide is None:
+            return {}
+        project = None
+        main_container = IDE.get_service('main_container')
+        if main_container:
+            editorWidget = main_container.get_current_editor()
+            if editorWidget:
+                project = ninjaide.get_project_for_file(
+                    editorWidget.file_path)
+        if project is None:
+            project = ninjaide.get_current_project()
+        recent_paths = set([nfile.file_path
+                            for nfile in ninjaide.opened_files])
+        recent_paths.update(settings.LAST_OPENED_FILES)
+        return {'project_path': project.path if project else None,
+                'recent_paths': recent_paths}
+
     def _filter_generic(self, filterOptions, index):
         at_start = (index == 0)
         if at_start:
-            self.tempLocations = [
-                x for x in self.locate_symbols.get_locations()
-                if x.type == filterOptions[0] and
-                x.comparison.lower().find(filterOptions[1].lower()) > -1]
+            self.tempLocations = self.locate_symbols.search_locations(
+                filterOptions[1], filterOptions[0], **self._search_context())
         else:
             currentItem = self._root.currentItem()
             if (filterOptions[index - 2] == locator.FILTERS['classes'] and
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import heapq
+import threading
+
+
+# Maximum amount of files returned by a search
+MAX_RESULTS = 100
+
+
+class PathEntry(object):
+    """A file of a project, with the forms used to match it precomputed."""
+
+    __slots__ = ('path', 'project', 'folder', 'name', 'lower', 'lower_name')
+
+    def __init__(self, path, project, folder, name):
+        self.path = path
+        self.project = project
+        # Folder relative to the parent of the project (shared by the
+        # files inside it) and the file name
+        self.folder = folder
+        self.name = name
+        self.lower = os.path.join(folder, name).lower()
+        self.lower_name = name.lower()
+
+    @property
+    def relative(self):
+        return os.path.join(self.folder, self.name)
+
+
+def _match(terms, text):
+    """Check if the terms appear in text in order (separated by at least
+    one character), as the regex 'term1.+term2' would."""
+    start = 0
+    for term in terms:
+        index = text.find(term, start)
+        if index == -1:
+            return False
+        start = index + len(term) + 1
+    return True
+
+
+class PathsIndex(object):
+    """Files of the projects explored by the locator, searched by the
+    quick file opener.
+
+    A query is a list of terms separated by spaces that must appear in
+    order in the path relative to the parent of the project. When a query
+    extends the previous one only the previous matches are checked."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # path -> PathEntry
+        self._entries = {}
+        # Interned folders and file names
+        self._components = {}
+        self._last_query = None
+        self._last_matches = []
+
+    def _intern(self, component):
+        return self._components.setdefault(component, component)
+
+    def _changed(self):
+        self._last_query = None
+        self._last_matches = []
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._components = {}
+            self._changed()
+
+    def add(self, project_path, file_path):
+        with self._lock:
+            if file_path in self._entries:
+                return
+            relative = os.path.join(os.path.basename(project_path),
+                                    os.path.relpath(file_path, project_path))
+            folder, name = os.path.split(relative)
+            self._entries[file_path] = PathEntry(
+                file_path, self._intern(project_path), self._intern(folder),
+                self._intern(name))
+            self._changed()
+
+    def remove(self, paths):
+        with self._lock:
+            for path in paths:
+                self._entries.pop(path, None)
+            self._changed()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Return the best limit entries matching query: the ones where
+        the last term matches the file name first (starting it first),
+        then the shortest paths."""
+        terms = query.lower().split()
+        if not terms:
+            return []
+        with self._lock:
+            last_query = self._last_query
+            if (last_query is not None and
+                    query.lower().startswith(last_query)):
+                candidates = self._last_matches
+            else:
+                candidates = self._entries.values()
+            matches = [entry for entry in candidates
+                       if _match(terms, entry.lower)]
+            self._last_query = query.lower()
+            self._last_matches = matches
+        last_term = terms[-1]
+
+        def sort_key(entry):
+            index = entry.lower_name.find(last_term)
+            if index == -1:
+                category = 2
+            elif index == 0:
+                category = 0
+            else:
+                category = 1
+            return (category, len(entry.lower), entry.lower)
+        return heapq.nsmallest(limit, matches, key=sort_key)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Storage of the symbols extracted by the locator.
+
+The symbols are stored by the hash of the file content, so the files with
+the same content (in other paths, projects or after switching branches)
+share them, and every path points to the hash of its content:
+
+    locator_files(path, mtime, size, hash)
+    locator_symbols(hash, data, used)
+
+The symbols that are not referenced by any path are kept for SYMBOLS_TTL
+seconds since they were last used."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import time
+import sqlite3
+
+try:
+    unichr
+except NameError:
+    # Python 3
+    unichr = chr  # lint:ok
+
+
+# Rows checked by each garbage collection step
+GC_STEP = 500
+# Seconds to keep the symbols of a content no file has anymore
+SYMBOLS_TTL = 30 * 24 * 60 * 60
+# Position of the garbage collection in the files table (rowid)
+_gc_position = 0
+
+
+def initialize(db_path):
+    """Create the locator tables, WAL journaling is persistent so it is
+    enabled here once."""
+    locator_db = sqlite3.connect(db_path)
+    locator_db.execute("PRAGMA journal_mode=WAL")
+    # Table used by previous versions (symbols keyed by path and mtime)
+    locator_db.execute("drop table if exists locator")
+    locator_db.execute("create table if not exists "
+                       "locator_files(path text PRIMARY KEY, mtime real, "
+                       "size integer, hash text)")
+    locator_db.execute("create index if not exists locator_files_hash "
+                       "on locator_files(hash)")
+    locator_db.execute("create table if not exists "
+                       "locator_symbols(hash text PRIMARY KEY, data blob, "
+                       "used integer)")
+    locator_db.commit()
+    locator_db.close()
+
+
+class SymbolsDB(object):
+    """Connection to locator.db used by an indexing pass.
+
+    Every write is part of a single transaction, committed by close(), and
+    the rows of a project can be loaded with one query before walking it.
+    The prefetched rows that are never requested belong to files that
+    don't exist anymore and are removed by remove_stale()."""
+
+    def __init__(self, db_path):
+        self._connection = sqlite3.connect(db_path)
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._prefetched = {}
+        self._prefetched_folders = []
+
+    def prefetch(self, folder):
+        """Load the rows of every file inside folder."""
+        start = os.path.join(folder, '')
+        # The paths inside folder sort between "folder/" and "folder0"
+        end = start[:-1] + unichr(ord(start[-1]) + 1)
+        cur = self._connection.execute(
+            "SELECT path, mtime, size, hash FROM locator_files "
+            "WHERE path >= ? AND path < ?", (start, end))
+        for row in cur:
+            self._prefetched[row[0]] = row
+        self._prefetched_folders.append(start)
+
+    def get(self, path):
+        """Return the (path, mtime, size, hash) row for path or None."""
+        row = self._prefetched.pop(path, None)
+        if row is None and not self._is_prefetched(path):
+            cur = self._connection.execute(
+                "SELECT path, mtime, size, hash FROM locator_files "
+                "WHERE path=?", (path,))
+            row = cur.fetchone()
+        return row
+
+    def _is_prefetched(self, path):
+        for folder in self._prefetched_folders:
+            if path.startswith(folder):
+                return True
+        return False
+
+    def get_symbols(self, content_hash):
+        """Return the symbols data stored for content_hash or None."""
+        cur = self._connection.execute(
+            "SELECT data FROM locator_symbols WHERE hash=?", (content_hash,))
+        row = cur.fetchone()
+        if row is not None:
+            return row[0]
+
+    def save(self, path, mtime, size, content_hash, data=None):
+        """Point path to content_hash, and store the symbols data of that
+        content if given (or mark the stored ones as used)."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO locator_files values (?, ?, ?, ?)",
+            (path, mtime, size, content_hash))
+        if data is None:
+            self._connection.execute(
+                "UPDATE locator_symbols SET used=? WHERE hash=?",
+                (int(time.time()), content_hash))
+        else:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO locator_symbols values (?, ?, ?)",
+                (content_hash, sqlite3.Binary(data), int(time.time())))
+
+    def delete(self, paths):
+        self._connection.executemany(
+            "DELETE FROM locator_files WHERE path=?",
+            [(path,) for path in paths])
+
+    def remove_stale(self):
+        """Delete the prefetched rows that weren't requested."""
+        self.delete(list(self._prefetched.keys()))
+        self._prefetched = {}
+        self._prefetched_folders = []
+
+    def collect_garbage(self, step=GC_STEP, now=None):
+        """Check the next rows of the files table (wrapping around) and
+        delete the ones whose file doesn't exist, this way the paths of
+        projects that are not opened anymore are cleaned a bit on each
+        pass. The symbols without files that weren't used for SYMBOLS_TTL
+        are deleted too."""
+        global _gc_position
+        cur = self._connection.execute(
+            "SELECT rowid, path FROM locator_files WHERE rowid > ? "
+            "ORDER BY rowid LIMIT ?", (_gc_position, step))
+        rows = cur.fetchall()
+        self.delete([path for _, path in rows if not os.path.exists(path)])
+        if len(rows) < step:
+            _gc_position = 0
+        else:
+            _gc_position = rows[-1][0]
+        if now is None:
+            now = time.time()
+        self._connection.execute(
+            "DELETE FROM locator_symbols WHERE used < ? AND hash NOT IN "
+            "(SELECT hash FROM locator_files)", (int(now - SYMBOLS_TTL),))
+
+    def close(self, commit=True):
+        self._prefetched = {}
+        self._prefetched_folders = []
+        if commit:
+            self._connection.commit()
+        self._connection.close()
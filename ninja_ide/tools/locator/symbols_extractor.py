@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Symbols extraction for the locator.
+
+This module doesn't depend on Qt so its functions can run inside the
+worker processes used to index big projects. The symbols of a file are
+flattened as (symbol type, name, line number) records and returned as
+symbols_records.SymbolRecords, they are cached by the hash of the file
+content."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import hashlib
+
+from ninja_ide.extensions import handlers
+from ninja_ide.tools.locator import symbols_records
+
+
+#@ FILES
+#< CLASSES
+#> FUNCTIONS
+#- MODULE ATTRIBUTES
+#! NO PYTHON FILES
+#. SYMBOLS IN THIS FILE
+#/ TABS OPENED
+#: LINE NUMBER
+FILTERS = {
+    'files': '@',
+    'classes': '<',
+    'functions': '>',
+    'attribs': '-',
+    'non-python': '!',
+    'this-file': '.',
+    'tabs': '/',
+    'lines': ':'}
+
+
+def parse_symbols(symbols, records=None):
+    """Flatten the symbols obtained by a symbols handler into records."""
+    if records is None:
+        records = []
+    if 'classes' in symbols:
+        _parse_class(symbols, records)
+    if 'attributes' in symbols:
+        _parse_attributes(symbols, records)
+    if 'functions' in symbols:
+        _parse_functions(symbols, records)
+    return records
+
+
+def _parse_class(symbols, records):
+    clazzes = symbols['classes']
+    for claz in clazzes:
+        line_number = clazzes[claz]['lineno'] - 1
+        members = clazzes[claz]['members']
+        records.append((FILTERS['classes'], claz, line_number))
+        if 'attributes' in members:
+            for attr in members['attributes']:
+                line_number = members['attributes'][attr] - 1
+                records.append((FILTERS['attribs'], attr, line_number))
+        if 'functions' in members:
+            for func in members['functions']:
+                line_number = members['functions'][func]['lineno'] - 1
+                records.append((FILTERS['functions'], func, line_number))
+                parse_symbols(members['functions'][func]['functions'],
+                              records)
+        if 'classes' in members:
+            _parse_class(members, records)
+
+
+def _parse_attributes(symbols, records):
+    attributes = symbols['attributes']
+    for attr in attributes:
+        records.append((FILTERS['attribs'], attr, attributes[attr] - 1))
+
+
+def _parse_functions(symbols, records):
+    functions = symbols['functions']
+    for func in functions:
+        line_number = functions[func]['lineno'] - 1
+        records.append((FILTERS['functions'], func, line_number))
+        parse_symbols(functions[func]['functions'], records)
+
+
+def has_symbols_handler(file_ext):
+    return handlers.get_symbols_handler(file_ext) is not None
+
+
+def file_stat(file_path):
+    """Return the (mtime, size) used to know if a file changed."""
+    stat = os.stat(file_path)
+    return (stat.st_mtime, stat.st_size)
+
+
+def read_file(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def content_hash(content):
+    """Return the key of the symbols of content in the cache."""
+    return hashlib.sha1(content).hexdigest()
+
+
+def extract_symbols(content, file_path, file_ext):
+    """Return the SymbolRecords for the symbols in content (with the
+    source line of each definition), or None if there is no symbols
+    handler for file_ext."""
+    #obtain a symbols handler for this file extension
+    symbols_handler = handlers.get_symbols_handler(file_ext)
+    if symbols_handler is None:
+        return None
+    if not isinstance(content, str):
+        # Python 3
+        content = content.decode('utf-8', 'replace')
+    symbols = symbols_handler.obtain_symbols(content, filename=file_path)
+    return symbols_records.SymbolRecords.from_tuples(
+        parse_symbols(symbols), content.splitlines())
+
+
+def extract_file_symbols(file_path, file_ext):
+    """Return the SymbolRecords for the symbols in file_path, or None if
+    there is no symbols handler for file_ext."""
+    if not has_symbols_handler(file_ext):
+        return None
+    return extract_symbols(read_file(file_path), file_path, file_ext)
+
+
+def init_worker():
+    """Initialize a worker process, on platforms without fork the symbols
+    handlers set by the IDE are not inherited."""
+    if handlers.get_symbols_handler('py') is None:
+        handlers.init_basic_handlers()
+
+
+def extract_symbols_worker(file_path):
+    """Entry point for the worker processes.
+
+    Returns (file_path, stat, content_hash, data, error) where data are
+    the encoded records (cheaper to send back than the objects) or None if
+    the file has no symbols handler. Errors are returned instead of raised
+    to not interrupt the results of the other files."""
+    try:
+        stat = file_stat(file_path)
+        file_ext = os.path.splitext(file_path.lower())[-1][1:]
+        content = read_file(file_path)
+        records = extract_symbols(content, file_path, file_ext)
+        data = None
+        if records is not None:
+            data = symbols_records.encode(records)
+        return (file_path, stat, content_hash(content), data, None)
+    except Exception as reason:
+        return (file_path, None, None, None, repr(reason))
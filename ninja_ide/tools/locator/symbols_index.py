@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import re
+import bisect
+import heapq
+import itertools
+import threading
+
+
+GRAM_SIZE = 3
+# Above this ratio of changed items the sorted locations are rebuilt
+# instead of patched item by item
+REBUILD_RATIO = 0.1
+
+# Weights used to rank the fuzzy matches
+SCORE_MATCH = 10
+SCORE_CONSECUTIVE = 15
+SCORE_BOUNDARY = 30
+SCORE_PREFIX = 50
+SCORE_SUBSTRING = 40
+SCORE_PROJECT = 25
+SCORE_RECENT = 35
+# Matches selected at least when a RankedCursor is read
+RANKED_PAGE = 50
+
+
+def trigrams(text):
+    """Return the set of trigrams contained in text."""
+    return set([text[i:i + GRAM_SIZE]
+                for i in range(len(text) - GRAM_SIZE + 1)])
+
+
+def _is_boundary(text, index):
+    """Check if index starts a word in text: the first character, the one
+    after a separator, a camel hump or a digit after a letter."""
+    if index == 0:
+        return True
+    current = text[index]
+    previous = text[index - 1]
+    if not previous.isalnum():
+        return current.isalnum()
+    if current.isupper() and not previous.isupper():
+        return True
+    return current.isdigit() and not previous.isdigit()
+
+
+def boundaries(text):
+    """Return the set of lowercased characters starting a word in text."""
+    return set([text[index].lower() for index in range(len(text))
+                if _is_boundary(text, index)])
+
+
+def _match_positions(query, text, lower, prefer_boundaries):
+    positions = []
+    start = 0
+    for char in query:
+        index = lower.find(char, start)
+        if index == -1:
+            return None
+        if prefer_boundaries and not _is_boundary(text, index):
+            # Jump to the next word starting with char if there is one
+            boundary = index
+            while boundary != -1 and not _is_boundary(text, boundary):
+                boundary = lower.find(char, boundary + 1)
+            if boundary != -1:
+                index = boundary
+        positions.append(index)
+        start = index + 1
+    return positions
+
+
+def fuzzy_score(query, text):
+    """Return how well the lowercased query matches text or None.
+
+    The characters of query must appear in order in text, the score
+    rewards contiguous substrings, prefixes, matches starting words
+    (word_boundary, camelHump) and shorter texts."""
+    lower = text.lower()
+    index = lower.find(query)
+    if index != -1:
+        score = SCORE_SUBSTRING + SCORE_MATCH * len(query)
+        score += SCORE_CONSECUTIVE * (len(query) - 1)
+        if index == 0:
+            score += SCORE_PREFIX
+        elif _is_boundary(text, index):
+            score += SCORE_BOUNDARY
+        return score - len(text)
+    best = None
+    for prefer_boundaries in (True, False):
+        positions = _match_positions(query, text, lower, prefer_boundaries)
+        if positions is None:
+            # Jumping to a word start can leave no room for the rest of
+            # the query, only the greedy match failing means no match
+            continue
+        score = SCORE_MATCH * len(positions)
+        previous = None
+        for position in positions:
+            if previous is not None and position == previous + 1:
+                score += SCORE_CONSECUTIVE
+            if _is_boundary(text, position):
+                score += SCORE_BOUNDARY
+            previous = position
+        if positions[0] == 0:
+            score += SCORE_PREFIX
+        score -= len(text)
+        if best is None or score > best:
+            best = score
+    return best
+
+
+class RankedCursor(object):
+    """Results ranked lazily: only the best matches for the pages requested
+    are selected (heapq.nsmallest, the selection doubling as the pages
+    grow), so the whole set of matches is never sorted."""
+
+    def __init__(self, entries):
+        self._entries = entries
+        self._ranked = []
+
+    def _rank_until(self, count):
+        if (count <= len(self._ranked) or
+                len(self._ranked) == len(self._entries)):
+            return
+        count = min(max(count, RANKED_PAGE, 2 * len(self._ranked)),
+                    len(self._entries))
+        self._ranked = [entry[-1]
+                        for entry in heapq.nsmallest(count, self._entries)]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.stop is None or index.stop < 0:
+                self._rank_until(len(self))
+            else:
+                self._rank_until(index.stop)
+        elif index < 0:
+            self._rank_until(len(self))
+        else:
+            self._rank_until(index + 1)
+        return self._ranked[index]
+
+    def __iter__(self):
+        index = 0
+        while True:
+            self._rank_until(index + 1)
+            if index >= len(self._ranked):
+                break
+            yield self._ranked[index]
+            index += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __bool__(self):
+        return len(self) > 0
+    __nonzero__ = __bool__
+
+
+class SymbolsIndex(object):
+    """In-memory trigram index over the symbols found by the locator.
+
+    Items are grouped by their symbol type (the values of locator.FILTERS)
+    and every group keeps a posting set per trigram of the lowercased
+    comparison text, so a query only checks the items sharing all of its
+    trigrams instead of every symbol in every project."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # path -> list of items
+        self._files = {}
+        # symbol type -> {trigram: set of items}
+        self._postings = {}
+        # symbol type -> set of items whose comparison is too short
+        # to produce a trigram
+        self._short = {}
+        # symbol type -> {character starting a word: set of items}
+        self._initials = {}
+        # comparison -> set of items, to find the definitions of a name
+        self._names = {}
+        # Sorted locations and their names, to bisect on them
+        self._locations = []
+        self._keys = []
+        # Changes not applied to the sorted locations yet
+        self._added = []
+        self._removed = []
+        self._rebuild = False
+
+    def clear(self):
+        with self._lock:
+            self._files = {}
+            self._postings = {}
+            self._short = {}
+            self._initials = {}
+            self._names = {}
+            self._locations = []
+            self._keys = []
+            self._added = []
+            self._removed = []
+            self._rebuild = False
+
+    def update_file(self, path, items):
+        """Replace the items indexed for path."""
+        with self._lock:
+            self._remove_items(self._files.pop(path, ()))
+            self._files[path] = items
+            for item in items:
+                grams = trigrams(item.comparison.lower())
+                if grams:
+                    postings = self._postings.setdefault(item.type, {})
+                    for gram in grams:
+                        postings.setdefault(gram, set()).add(item)
+                else:
+                    self._short.setdefault(item.type, set()).add(item)
+                initials = self._initials.setdefault(item.type, {})
+                for char in boundaries(item.comparison):
+                    initials.setdefault(char, set()).add(item)
+                self._names.setdefault(item.comparison, set()).add(item)
+            self._track_changes(self._added, items)
+
+    def remove_file(self, path):
+        with self._lock:
+            items = self._files.pop(path, None)
+            if items is not None:
+                self._remove_items(items)
+
+    def has_file(self, path):
+        return path in self._files
+
+    def _remove_items(self, items):
+        for item in items:
+            grams = trigrams(item.comparison.lower())
+            if grams:
+                postings = self._postings.get(item.type, {})
+                for gram in grams:
+                    posting = postings.get(gram)
+                    if posting is not None:
+                        posting.discard(item)
+                        if not posting:
+                            del postings[gram]
+            else:
+                self._short.get(item.type, set()).discard(item)
+            initials = self._initials.get(item.type, {})
+            for char in boundaries(item.comparison):
+                posting = initials.get(char)
+                if posting is not None:
+                    posting.discard(item)
+                    if not posting:
+                        del initials[char]
+            definitions = self._names.get(item.comparison)
+            if definitions is not None:
+                definitions.discard(item)
+                if not definitions:
+                    del self._names[item.comparison]
+        self._track_changes(self._removed, items)
+
+    def _track_changes(self, changes, items):
+        if self._rebuild:
+            return
+        changes.extend(items)
+        pending = len(self._added) + len(self._removed)
+        if pending > len(self._locations) * REBUILD_RATIO:
+            # Too many changes (ex: a whole project being indexed),
+            # sorting everything again is cheaper than patching
+            self._rebuild = True
+            self._added = []
+            self._removed = []
+
+    def get_locations(self):
+        """Return every indexed item sorted by name."""
+        with self._lock:
+            if self._rebuild:
+                self._locations = sorted(
+                    [item for items in self._files.values()
+                     for item in items],
+                    key=lambda item: item.name)
+                self._keys = [item.name for item in self._locations]
+                self._rebuild = False
+            elif self._added or self._removed:
+                self._apply_changes()
+            return self._locations
+
+    def _apply_changes(self):
+        # Copy on write, the list returned before may be in use
+        locations = list(self._locations)
+        keys = list(self._keys)
+        # Items added and removed again before being applied cancel out
+        removed = set(self._removed)
+        added = [item for item in self._added if item not in removed]
+        removed.difference_update(self._added)
+        for item in removed:
+            index = bisect.bisect_left(keys, item.name)
+            while index < len(keys) and keys[index] == item.name:
+                if locations[index] is item:
+                    del locations[index]
+                    del keys[index]
+                    break
+                index += 1
+        for item in added:
+            index = bisect.bisect_right(keys, item.name)
+            keys.insert(index, item.name)
+            locations.insert(index, item)
+        self._locations = locations
+        self._keys = keys
+        self._added = []
+        self._removed = []
+
+    def definitions(self, name, symbol_types=None):
+        """Return the items named name (ignoring the arguments after the
+        parenthesis) sorted by path and line number."""
+        with self._lock:
+            items = [item for item in self._names.get(name, ())
+                     if symbol_types is None or item.type in symbol_types]
+        return sorted(items, key=lambda item: (item.path, item.lineno))
+
+    def search(self, text, symbol_type=None):
+        """Return the items (sorted by name) whose comparison contains text.
+
+        If symbol_type is given, only items of that type are considered."""
+        text = text.lower()
+        if not text:
+            locations = self.get_locations()
+            if symbol_type is None:
+                return locations
+            return [item for item in locations if item.type == symbol_type]
+        with self._lock:
+            if symbol_type is None:
+                types = list(self._postings.keys())
+                types += [key for key in self._short if key not in types]
+            else:
+                types = [symbol_type]
+            candidates = set()
+            for each_type in types:
+                candidates.update(self._candidates(text, each_type))
+        results = [item for item in candidates
+                   if text in item.comparison.lower()]
+        return sorted(results, key=lambda item: item.name)
+
+    def rank(self, text, symbol_type=None, project_path=None,
+             recent_paths=()):
+        """Return a RankedCursor with the items fuzzy matching text.
+
+        Candidates are the items containing text (trigram index) and the
+        items with a word starting with its first character (for matches
+        like camel humps), items of the current project and recently
+        opened files get a bonus."""
+        text = text.lower()
+        if not text:
+            return self.search(text, symbol_type)
+        with self._lock:
+            if symbol_type is None:
+                types = set(self._postings.keys())
+                types.update(self._short.keys())
+            else:
+                types = [symbol_type]
+            candidates = set()
+            for each_type in types:
+                candidates.update(self._candidates(text, each_type))
+                candidates.update(
+                    self._initials.get(each_type, {}).get(text[0], ()))
+        # Discard most of the candidates with a regex before scoring them
+        pattern = re.compile('.*?'.join([re.escape(char) for char in text]))
+        if project_path:
+            project_path = os.path.join(project_path, '')
+        counter = itertools.count()
+        entries = []
+        for item in candidates:
+            if pattern.search(item.comparison.lower()) is None:
+                continue
+            score = fuzzy_score(text, item.comparison)
+            if score is None:
+                continue
+            if project_path and item.path.startswith(project_path):
+                score += SCORE_PROJECT
+            if item.path in recent_paths:
+                score += SCORE_RECENT
+            # The name (and then the order found) break the ties
+            entries.append((-score, item.name, next(counter), item))
+        return RankedCursor(entries)
+
+    def _candidates(self, text, symbol_type):
+        postings = self._postings.get(symbol_type, {})
+        grams = trigrams(text)
+        if grams:
+            # Intersect starting with the rarest trigram
+            sets = sorted([postings.get(gram, ()) for gram in grams], key=len)
+            if not sets[0]:
+                return set()
+            candidates = set(sets[0])
+            for posting in sets[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    break
+            return candidates
+        # Queries shorter than a trigram: every trigram key containing the
+        # text points to candidates, plus the items too short to index
+        candidates = set(self._short.get(symbol_type, ()))
+        for gram in postings:
+            if text in gram:
+                candidates.update(postings[gram])
+        return candidates
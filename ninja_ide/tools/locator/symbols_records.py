@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Compact representation of the symbols of a file.
+
+The symbols are kept in parallel arrays (types, names, line numbers and
+the source line where each one is defined) and stored in locator.db with a
+versioned binary encoding:
+
+    header: magic (3 bytes), version (1 byte), count (uint32)
+    line numbers: count int32 values
+    types: count ascii characters (the values of FILTERS)
+    names and lines: utf-8 text with the count names followed by the
+        count source lines, separated by NUL characters
+
+All the values are little endian."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import sys
+import array
+import struct
+
+
+MAGIC = b'NLS'
+VERSION = 2
+_HEADER = struct.Struct(str('<3sBI'))
+_LINENO_TYPE = str('i')
+_SEPARATOR = '\0'
+
+# Names shared by all the records, the same name is stored only once
+_interned_names = {}
+
+
+def intern_name(name):
+    return _interned_names.setdefault(name, name)
+
+
+class SymbolRecords(object):
+    """The symbols of a file as parallel arrays."""
+
+    __slots__ = ('types', 'names', 'linenos', 'lines')
+
+    def __init__(self, types='', names=(), linenos=None, lines=None):
+        # One FILTERS character per symbol
+        self.types = types
+        self.names = names
+        if linenos is None:
+            linenos = array.array(_LINENO_TYPE)
+        self.linenos = linenos
+        # The source line of each definition (shown by go to definition)
+        if lines is None:
+            lines = ('',) * len(names)
+        self.lines = lines
+
+    @classmethod
+    def from_tuples(cls, records, source_lines=()):
+        """Build it from (symbol type, name, line number) tuples, the
+        definition lines are taken from source_lines."""
+        lines = []
+        for record in records:
+            lineno = record[2]
+            line = ''
+            if 0 <= lineno < len(source_lines):
+                line = source_lines[lineno]
+                if isinstance(line, bytes):
+                    # Python 2 reads the files as str
+                    line = line.decode('utf-8', 'replace')
+                line = line.replace(_SEPARATOR, ' ')
+            lines.append(line)
+        return cls(''.join([record[0] for record in records]),
+                   tuple([intern_name(record[1]) for record in records]),
+                   array.array(_LINENO_TYPE,
+                               [record[2] for record in records]),
+                   tuple(lines))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        """Yield (symbol type, name, line number) for every symbol."""
+        for index in range(len(self.names)):
+            yield (self.types[index], self.names[index],
+                   self.linenos[index])
+
+
+def encode(records):
+    """Return the binary representation of records."""
+    linenos = array.array(_LINENO_TYPE, records.linenos)
+    if sys.byteorder != 'little':
+        linenos.byteswap()
+    if hasattr(linenos, 'tobytes'):
+        linenos_data = linenos.tobytes()
+    else:
+        # Python 2
+        linenos_data = linenos.tostring()
+    return b''.join([
+        _HEADER.pack(MAGIC, VERSION, len(records)),
+        linenos_data,
+        records.types.encode('ascii'),
+        _SEPARATOR.join(records.names + records.lines).encode('utf-8')])
+
+
+def decode(data):
+    """Build SymbolRecords from its binary representation, a ValueError
+    is raised if data wasn't encoded with the current version."""
+    data = bytes(data)
+    if len(data) < _HEADER.size:
+        raise ValueError("Symbols data is too short")
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Unknown symbols format")
+    start = _HEADER.size
+    end = start + count * 4
+    linenos = array.array(_LINENO_TYPE)
+    if hasattr(linenos, 'frombytes'):
+        linenos.frombytes(data[start:end])
+    else:
+        # Python 2
+        linenos.fromstring(data[start:end])
+    if sys.byteorder != 'little':
+        linenos.byteswap()
+    types = data[end:end + count].decode('ascii')
+    texts = data[end + count:].decode('utf-8').split(_SEPARATOR)
+    if not count:
+        texts = []
+    if (len(linenos) != count or len(types) != count or
+            len(texts) != count * 2):
+        raise ValueError("Corrupted symbols data")
+    names = tuple([intern_name(name) for name in texts[:count]])
+    return SymbolRecords(types, names, linenos, tuple(texts[count:]))
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Replace of a pattern in the files found by find in files.
+
+The edits are computed first (in worker processes, see
+replace_file_worker) without touching the files, so they can be reviewed
+as a diff, and then written as a transaction by apply_edits: the new
+contents are written to temporary files next to the originals and only
+when all of them were written they are renamed over the originals. If a
+rename fails, the files already replaced get their original content back.
+
+The pattern is replaced line by line, the same lines search_engine finds,
+keeping the line endings and the encoding of each file. The files opened
+in the editor are edited in their buffers by the caller instead.
+
+This module doesn't depend on Qt."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import re
+import codecs
+import difflib
+import shutil
+import tempfile
+
+from ninja_ide.tools import search_engine
+
+
+# Encoding declaration of a python file (PEP 263)
+CODING_LINE = re.compile(br'^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)')
+
+# Edit of the worker process, set by init_replace_worker
+_replace = None
+
+
+class ReplaceError(Exception):
+    """The files couldn't be replaced, failures has the (file path,
+    reason) of each file that failed."""
+
+    def __init__(self, message, failures=()):
+        super(ReplaceError, self).__init__(message)
+        self.failures = list(failures)
+
+
+class FileEdit(object):
+    """The new content of a file and the count of replacements."""
+
+    def __init__(self, path, content, count, stat=None, diff=''):
+        self.path = path
+        # Encoded content, or text for the buffers of the editor
+        self.content = content
+        self.count = count
+        # (mtime, size) of the file when the edit was computed
+        self.stat = stat
+        self.diff = diff
+
+
+def detect_encoding(data):
+    """Return the encoding of data: the one declared in its first two
+    lines (PEP 263), or UTF-8."""
+    if data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    for line in data.split(b'\n', 2)[:2]:
+        match = CODING_LINE.match(line)
+        if match:
+            encoding = match.group(1).decode('ascii')
+            # Raises LookupError for unknown encodings
+            codecs.lookup(encoding)
+            return encoding
+    return 'utf-8'
+
+
+def replace_content(content, regex, replacement, fixed_string=False):
+    """Return (new content, count) replacing the matches of regex in
+    every line of content, the line endings are kept."""
+    if fixed_string:
+        template = replacement
+
+        def replacement(match):
+            return template
+    lines = content.split('\n')
+    count = 0
+    for index, line in enumerate(lines):
+        body = line
+        end = ''
+        if body.endswith('\r'):
+            body = body[:-1]
+            end = '\r'
+        new_body, line_count = regex.subn(replacement, body)
+        if line_count:
+            lines[index] = new_body + end
+            count += line_count
+    return '\n'.join(lines), count
+
+
+def content_diff(path, old_content, new_content):
+    """Return the unified diff of the change of the content of path."""
+    return ''.join(difflib.unified_diff(
+        old_content.splitlines(True), new_content.splitlines(True),
+        path, path))
+
+
+def file_stat(file_path):
+    stat = os.stat(file_path)
+    return (stat.st_mtime, stat.st_size)
+
+
+def edit_file(file_path, regex, replacement, fixed_string=False,
+              with_diff=False):
+    """Return the FileEdit for file_path, or None if nothing changes."""
+    stat = file_stat(file_path)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    encoding = detect_encoding(data)
+    content = data.decode(encoding)
+    new_content, count = replace_content(content, regex, replacement,
+                                         fixed_string)
+    if not count or new_content == content:
+        return None
+    diff = ''
+    if with_diff:
+        diff = content_diff(file_path, content, new_content)
+    return FileEdit(file_path, new_content.encode(encoding), count, stat,
+                    diff)
+
+
+def init_replace_worker(pattern, case_sensitive, fixed_string, replacement,
+                        with_diff):
+    """Initialize a worker process with the replace to compute."""
+    global _replace
+    _replace = (search_engine.compile_pattern(pattern, case_sensitive,
+                                              fixed_string),
+                replacement, fixed_string, with_diff)
+
+
+def replace_file_worker(file_path):
+    """Entry point for the worker processes.
+
+    Returns (file_path, edit, error): edit is None if the file doesn't
+    change, errors are returned instead of raised to not interrupt the
+    results of the other files."""
+    regex, replacement, fixed_string, with_diff = _replace
+    try:
+        edit = edit_file(file_path, regex, replacement, fixed_string,
+                         with_diff)
+        return (file_path, edit, None)
+    except (IOError, OSError, UnicodeError, LookupError, re.error) as reason:
+        return (file_path, None, '%s' % reason)
+
+
+def _rename(source, target):
+    """Rename source to target replacing target atomically."""
+    if hasattr(os, 'replace'):
+        os.replace(source, target)
+        return
+    # Python 2, rename only replaces an existing file on POSIX
+    if os.name == 'nt' and os.path.exists(target):
+        os.remove(target)
+    os.rename(source, target)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_temporary(file_path, content):
+    """Write content to a new file next to file_path, with its mode."""
+    folder, name = os.path.split(file_path)
+    descriptor, temporary = tempfile.mkstemp(
+        prefix='.%s.' % name, suffix='.tmp', dir=folder)
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(file_path, temporary)
+    except Exception:
+        _remove(temporary)
+        raise
+    return temporary
+
+
+def _backup(file_path):
+    """Keep the current content of file_path (a hard link when possible)
+    to restore it if the transaction fails."""
+    folder, name = os.path.split(file_path)
+    descriptor, backup = tempfile.mkstemp(
+        prefix='.%s.' % name, suffix='.bak', dir=folder)
+    os.close(descriptor)
+    try:
+        os.remove(backup)
+        os.link(file_path, backup)
+    except (AttributeError, OSError):
+        # No hard links (Windows with Python 2, some file systems)
+        shutil.copy2(file_path, backup)
+    return backup
+
+
+def apply_edits(edits):
+    """Write the FileEdits to their files as a transaction, a ReplaceError
+    is raised (with no file changed) if any of them fails or changed
+    since its edit was computed."""
+    temporaries = []
+    try:
+        for edit in edits:
+            if edit.stat is not None and file_stat(edit.path) != edit.stat:
+                raise ReplaceError(
+                    "The file changed since the replace was computed",
+                    [(edit.path, "Modified")])
+            temporaries.append((edit.path,
+                                _write_temporary(edit.path, edit.content)))
+    except (IOError, OSError) as reason:
+        for _, temporary in temporaries:
+            _remove(temporary)
+        raise ReplaceError("The files couldn't be written",
+                           [(edit.path, '%s' % reason)])
+    except ReplaceError:
+        for _, temporary in temporaries:
+            _remove(temporary)
+        raise
+    replaced = []
+    try:
+        for file_path, temporary in temporaries:
+            backup = _backup(file_path)
+            replaced.append((file_path, backup))
+            _rename(temporary, file_path)
+    except (IOError, OSError) as reason:
+        failures = [(file_path, '%s' % reason)]
+        for file_path, backup in reversed(replaced):
+            try:
+                _rename(backup, file_path)
+            except (IOError, OSError) as restore_reason:
+                # The backup is kept, it has the original content
+                failures.append((file_path, '%s (original in %s)' % (
+                    restore_reason, backup)))
+                continue
+            # Renaming a hard link to the same file does nothing
+            _remove(backup)
+        for _, temporary in temporaries:
+            _remove(temporary)
+        raise ReplaceError("The files couldn't be replaced, the changes "
+                           "were rolled back", failures)
+    for _, backup in replaced:
+        _remove(backup)
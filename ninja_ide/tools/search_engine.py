@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+"""Search of a pattern in the files of a folder.
+
+This module doesn't depend on Qt so the files can be searched in worker
+processes: a walker yields the files to search in batches, the workers
+return the matching lines of each batch and the results are consumed as
+they arrive (see find_in_files.FindInFilesThread).
+
+Each file is memory mapped and scanned once by a compiled bytes regex,
+after a literal prefilter when the search has literals (fixed strings or
+words), and only the lines of the hits are counted and decoded."""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import re
+import mmap
+
+from ninja_ide.core.file_handling import project_walker
+
+
+# Files sent to a worker process at once
+BATCH_SIZE = 16
+# Minimum amount of files to search to use worker processes, starting
+# them costs more than searching a few files
+PARALLEL_THRESHOLD = 64
+
+# FileScanner of the worker process, set by init_search_worker
+_scanner = None
+
+
+def compile_pattern(pattern, case_sensitive=True, fixed_string=False):
+    if fixed_string:
+        pattern = re.escape(pattern)
+    flags = re.UNICODE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(pattern, flags)
+
+
+def grep_content(content, regex, words=None):
+    """Return the (line index, line) of the lines of content matching
+    regex. If words are given, the content has to contain all of them."""
+    if words:
+        if regex.flags & re.IGNORECASE:
+            lower_content = content.lower()
+            words = [word.lower() for word in words]
+        else:
+            lower_content = content
+        for word in words:
+            if lower_content.find(word) == -1:
+                return []
+    return [(line_index, line)
+            for line_index, line in enumerate(content.splitlines())
+            if regex.search(line)]
+
+
+def _is_ascii(text):
+    try:
+        text.encode('ascii')
+    except UnicodeError:
+        return False
+    return True
+
+
+# Escapes matching other characters in bytes than in unicode
+_CLASS_ESCAPES = 'wWbBsSdD'
+# ASCII letters matching not ASCII ones ignoring the case (K, ſ, İ)
+_FOLDING_LETTERS = 'iksIKS'
+_ESCAPE_TOKEN = re.compile(r'\\.|.', re.DOTALL)
+_NOT_ASCII = re.compile(b'[\x80-\xff]')
+
+
+def _folds_to_not_ascii(pattern, words, case_sensitive, fixed_string):
+    """Return True if the search ignoring the case has letters or ranges
+    matching not ASCII letters, a bytes regex finds the same lines only in
+    ASCII files."""
+    if case_sensitive:
+        return False
+    if not fixed_string and '[' in pattern:
+        return True
+    return any(letter in text for text in [pattern] + list(words)
+               for letter in _FOLDING_LETTERS)
+
+
+def _bytes_searchable(pattern, words, case_sensitive, fixed_string):
+    """Return True if a bytes regex finds the same lines as the unicode
+    regex of the search (in ASCII files, see _folds_to_not_ascii)."""
+    texts = [pattern] + list(words)
+    if not all(_is_ascii(text) for text in texts):
+        return False
+    if fixed_string:
+        return True
+    if '[^' in pattern:
+        # The negated classes match a byte and not a character
+        return False
+    for token in _ESCAPE_TOKEN.findall(pattern):
+        # $ doesn't match before \r\n and . matches a byte, not a char
+        if token in ('$', '.'):
+            return False
+        if len(token) == 2 and token[1] in _CLASS_ESCAPES:
+            return False
+    return True
+
+
+class FileScanner(object):
+    """Search a pattern in files.
+
+    The pattern is run over the whole mapped file as a bytes regex (with
+    MULTILINE, so ^ matches at the start of every line), a hit is checked
+    again inside its line to keep the semantics of a search line by line.
+    The patterns that can't be translated to bytes (not ASCII, using $
+    which doesn't match before \r\n, or parts matching other characters
+    in bytes, see _bytes_searchable) are searched decoding the file, as
+    the files with not ASCII characters when the search ignoring the case
+    has letters matching them (k matches the Kelvin sign)."""
+
+    def __init__(self, pattern, case_sensitive=True, fixed_string=False,
+                 words=None):
+        self.regex = compile_pattern(pattern, case_sensitive, fixed_string)
+        self.words = words
+        self._bytes_regex = None
+        self._ascii_files_only = _folds_to_not_ascii(
+            pattern, words or [], case_sensitive, fixed_string)
+        # Literals that must be in the file, and regexes for the words
+        # when the search is case insensitive
+        self._literals = []
+        self._words_regexes = []
+        words = words or []
+        if _bytes_searchable(pattern, words, case_sensitive, fixed_string):
+            flags = re.MULTILINE
+            if not case_sensitive:
+                flags |= re.IGNORECASE
+            source = pattern.encode('ascii')
+            if fixed_string:
+                source = re.escape(source)
+            self._bytes_regex = re.compile(source, flags)
+            words = [word.encode('ascii') for word in words]
+            if case_sensitive:
+                self._literals = words
+                if fixed_string and not words:
+                    self._literals = [pattern.encode('ascii')]
+            else:
+                self._words_regexes = [
+                    re.compile(re.escape(word), re.IGNORECASE)
+                    for word in words]
+
+    def scan(self, file_path):
+        """Return the (line index, line) of the lines matching."""
+        with open(file_path, 'rb') as f:
+            if self._bytes_regex is None:
+                return self._scan_content(f.read())
+            if not os.fstat(f.fileno()).st_size:
+                # Empty files can't be mapped
+                return []
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if self._ascii_files_only and _NOT_ASCII.search(buf):
+                    return self._scan_content(buf[:])
+                return self._scan_buffer(buf)
+            finally:
+                buf.close()
+
+    def _scan_content(self, content):
+        return grep_content(content.decode('utf-8', 'replace'), self.regex,
+                            self.words)
+
+    def _scan_buffer(self, buf):
+        for literal in self._literals:
+            if buf.find(literal) == -1:
+                return []
+        for word_regex in self._words_regexes:
+            if word_regex.search(buf) is None:
+                return []
+        regex = self._bytes_regex
+        lines = []
+        size = len(buf)
+        position = 0
+        # Lines counted until counted_position
+        line_index = 0
+        counted_position = 0
+        while position <= size:
+            match = regex.search(buf, position)
+            if match is None:
+                break
+            start = match.start()
+            line_start = buf.rfind(b'\n', 0, start) + 1
+            if line_start == size:
+                # An empty match after the last line break, not a line
+                break
+            line_end = buf.find(b'\n', start)
+            if line_end == -1:
+                line_end = size
+            text_end = line_end
+            if text_end > line_start and buf[text_end - 1:text_end] == b'\r':
+                text_end -= 1
+            if (match.end() <= text_end or
+                    regex.search(buf, line_start, text_end) is not None):
+                line_index += buf[counted_position:line_start].count(b'\n')
+                counted_position = line_start
+                lines.append((line_index,
+                              buf[line_start:text_end].decode('utf-8',
+                                                              'replace')))
+            position = line_end + 1
+        return lines
+
+
+def init_search_worker(pattern, case_sensitive, fixed_string, words):
+    """Initialize a worker process with the search to run."""
+    global _scanner
+    _scanner = FileScanner(pattern, case_sensitive, fixed_string, words)
+
+
+def search_files_worker(file_paths):
+    """Entry point for the worker processes.
+
+    Returns the (file_path, lines) of the files of the batch with lines
+    matching, the files that can't be read are skipped."""
+    results = []
+    for file_path in file_paths:
+        try:
+            lines = _scanner.scan(file_path)
+        except (IOError, OSError):
+            continue
+        if lines:
+            results.append((file_path, lines))
+    return results
+
+
+def walk_files(root_dir, filters, recursive=True, cancelled=None,
+               excludes=()):
+    """Yield the paths of the files inside root_dir whose name matches any
+    of filters (glob patterns, case insensitive). Hidden, ignored (see
+    project_walker), binary and too big files are skipped. The walk stops
+    when cancelled() returns True."""
+    return project_walker.iter_files(
+        root_dir, filters, excludes=excludes, recursive=recursive,
+        max_size=project_walker.MAX_FILE_SIZE, skip_binary=True,
+        cancelled=cancelled)
+
+
+def filter_files(file_paths, root_dir, filters, recursive=True):
+    """Yield the paths of file_paths walk_files would yield (the
+    candidates of a content_index.ContentIndex of root_dir)."""
+    filters = [name_filter.lower() for name_filter in (filters or ())
+               if name_filter]
+    for file_path in file_paths:
+        folder, name = os.path.split(file_path)
+        if not recursive and folder != root_dir:
+            continue
+        if project_walker.match_filters(name, filters):
+            yield file_path
+
+
+def batches(iterable, size=BATCH_SIZE):
+    """Group the items of iterable in lists of size items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
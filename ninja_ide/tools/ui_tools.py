@@ -61,6 +61,7 @@ from PyQt4.QtCore import QTimeLine
 from ninja_ide import resources
 from ninja_ide.core import settings
 from ninja_ide.core.file_handling import file_manager
+from ninja_ide.core.file_handling import project_snapshot
 from ninja_ide.core.file_handling.file_manager import NinjaIOException
 from ninja_ide.tools import json_manager
 
@@ -193,19 +194,23 @@ class ThreadProjectExplore(QThread):
     def run(self):
         self.execute()
 
+    def _snapshot_path(self):
+        """The structure of each project is kept between sessions, only
+        the folders changed are scanned again."""
+        folder = os.path.join(resources.NINJA_KNOWLEDGE_PATH,
+                              'project_snapshots')
+        return project_snapshot.snapshot_path(folder, self._folder_path)
+
     def _thread_refresh_project(self):
-        if self._extensions != settings.SUPPORTED_EXTENSIONS:
+        try:
+            project = json_manager.read_ninja_project(self._folder_path)
             folderStructure = file_manager.open_project_with_extensions(
-                self._folder_path, self._extensions)
-        else:
-            try:
-                folderStructure = file_manager.open_project(self._folder_path)
-            except NinjaIOException:
-                pass  # There is not much we can do at this point
-
-        if folderStructure and (folderStructure.get(self._folder_path,
-                                                [None, None])[1] is not None):
-            folderStructure[self._folder_path][1].sort()
+                self._folder_path, self._extensions, self._snapshot_path(),
+                project.get('excludes'))
+        except NinjaIOException:
+            return  # There is not much we can do at this point
+
+        if folderStructure.get(self._folder_path) is not None:
             values = (self._folder_path, self._item, folderStructure)
             self.emit(SIGNAL("folderDataRefreshed(PyQt_PyObject)"), values)
 
@@ -214,11 +219,9 @@ class ThreadProjectExplore(QThread):
             project = json_manager.read_ninja_project(self._folder_path)
             extensions = project.get('supported-extensions',
                 settings.SUPPORTED_EXTENSIONS)
-            if extensions != settings.SUPPORTED_EXTENSIONS:
-                structure = file_manager.open_project_with_extensions(
-                    self._folder_path, extensions)
-            else:
-                structure = file_manager.open_project(self._folder_path)
+            structure = file_manager.open_project_with_extensions(
+                self._folder_path, extensions, self._snapshot_path(),
+                project.get('excludes'))
 
             self.emit(SIGNAL("folderDataAcquired(PyQt_PyObject)"),
                 (self._folder_path, structure))
@@ -300,6 +300,21 @@ TR_ARE_YOU_SURE_WANT_TO_REPLACE = tr(
     "Are you sure you want to replace the content in "
     "this files?\n(The change is not reversible)")
 TR_REPLACE_FILES_CONTENTS = tr("NINJA-IDE", "Replace File Contents")
+TR_SHOW_MORE = tr("NINJA-IDE", "Show More")
+TR_RESULTS_HIDDEN = tr("NINJA-IDE", "%(count)s lines found are not shown")
+TR_REPLACE_OCCURRENCES = tr(
+    "NINJA-IDE",
+    "%(count)s occurrences will be replaced in %(files)s files.\n"
+    "(The files opened are changed in the editor, without saving them)")
+TR_REPLACE_NOTHING = tr("NINJA-IDE", "There is nothing to replace.")
+TR_REPLACE_FAILED = tr(
+    "NINJA-IDE", "The files could not be replaced, none of them changed.")
+TR_REPLACE_NOT_COMPUTED = tr("NINJA-IDE", "These files were skipped:")
+TR_LARGE_FILE_MODE = tr(
+    "NINJA-IDE",
+    "This file is large, it is shown read only and without highlighting, "
+    "folding, checkers or symbols.")
+TR_EDIT_ANYWAY = tr("NINJA-IDE", "Edit Anyway")
 TR_CONSOLE = tr("NINJA-IDE", "Console")
 TR_OUTPUT = tr("NINJA-IDE", "Output")
 TR_WEB_PREVIEW = tr("NINJA-IDE", "Web Preview")
@@ -42,6 +42,7 @@ class FakeNFile(QObject):
 
     def __init__(self, path=""):
         self.path = path
+        self.file_path = path
         super(FakeNFile, self).__init__()
 
 nfilesystem.NFile = FakeNFile
@@ -75,9 +76,8 @@ class NVirtualFileSystemTestCase(unittest.TestCase):
         project = FakeNProject(project_path)
         nvfs.get_file(project_path)
         nvfs.open_project(project)
-        nfile = nvfs._NVirtualFileSystem__tree[project_path]
-        self.assertEqual(project,
-                        nvfs._NVirtualFileSystem__reverse_project_map[nfile])
+        self.assertIn(project_path, nvfs._NVirtualFileSystem__tree)
+        self.assertEqual(project, nvfs.get_project_for_file(project_path))
 
     def test_close_file_is_handled(self):
         pass
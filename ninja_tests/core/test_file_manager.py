@@ -40,6 +40,15 @@ class FileManagerTestCase(unittest.TestCase):
                     "print 'ñandú testing'\n").encode('utf-8')
         self.assertEqual(content, expected)
 
+    def test_read_file_chunks(self):
+        filename = os.path.join(self.examples_dir, 'file_for_tests.py')
+        # Chunks splitting the characters of ñandú
+        chunks = list(file_manager.read_file_chunks(filename, 7))
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(''.join(chunks),
+                         "# -*- coding: utf-8 -*-\n\nprint 'testing'\n"
+                         "print 'ñandú testing'\n")
+
 
 if __name__ == '__main__':
     unittest.main()
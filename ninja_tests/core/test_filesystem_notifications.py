@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ninja_ide.core.file_handling.filesystem_notifications import base_watcher
+
+
+class CoalesceTestCase(unittest.TestCase):
+
+    def test_created_and_deleted_cancel(self):
+        self.assertIsNone(base_watcher.coalesce(base_watcher.ADDED,
+                                                base_watcher.DELETED))
+
+    def test_created_and_modified_is_created(self):
+        self.assertEqual(base_watcher.coalesce(base_watcher.ADDED,
+                                               base_watcher.MODIFIED),
+                         base_watcher.ADDED)
+
+    def test_replaced_is_modified(self):
+        self.assertEqual(base_watcher.coalesce(base_watcher.DELETED,
+                                               base_watcher.ADDED),
+                         base_watcher.MODIFIED)
+        self.assertEqual(base_watcher.coalesce(base_watcher.MODIFIED,
+                                               base_watcher.DELETED),
+                         base_watcher.DELETED)
+
+
+class SingleFileWatcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, 'watched.py')
+        self._write('a = 1\n')
+        self.events = []
+        self.watcher = base_watcher.SingleFileWatcher(
+            lambda event, path: self.events.append((event, path)))
+        self.watcher.add_watch(self.file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, content):
+        with open(self.file_path, 'w') as f:
+            f.write(content)
+
+    def test_modified(self):
+        self._write('a = 10\n')
+        self.watcher.tick()
+        self.watcher.tick()
+        self.assertEqual(self.events,
+                         [(base_watcher.MODIFIED, self.file_path)])
+
+    def test_deleted_and_created_again(self):
+        os.remove(self.file_path)
+        self.watcher.tick()
+        self._write('a = 1\n')
+        self.watcher.tick()
+        self.assertEqual(self.events,
+                         [(base_watcher.DELETED, self.file_path),
+                          (base_watcher.ADDED, self.file_path)])
+
+
+class SubscribersTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, 'pkg', 'watched.py')
+        self.events = []
+        self.watcher = base_watcher.BaseWatcher()
+
+    def tearDown(self):
+        self.watcher.shutdown_notification()
+        shutil.rmtree(self.folder)
+
+    def _subscriber(self, name):
+        return lambda event, path: self.events.append((name, event, path))
+
+    def _changed(self, *paths):
+        for path in paths:
+            self.watcher._emit_signal_on_change(base_watcher.MODIFIED, path)
+        self.watcher._emit_pending_events()
+
+    def test_only_subscribers_of_the_path(self):
+        callback = self._subscriber('file')
+        self.watcher.add_file_watch(self.file_path, callback)
+        self.watcher.add_watch(self.folder, self._subscriber('project'))
+        self._changed(self.file_path, os.path.join(self.folder, 'other.py'),
+                      os.path.join(self.folder + 'other', 'a.py'))
+        self.assertEqual(self.events, [
+            ('file', base_watcher.MODIFIED, self.file_path),
+            ('project', base_watcher.MODIFIED, self.file_path),
+            ('project', base_watcher.MODIFIED,
+             os.path.join(self.folder, 'other.py'))])
+        self.events = []
+        self.watcher.remove_file_watch(self.file_path, callback)
+        self._changed(self.file_path)
+        self.assertEqual(self.events, [
+            ('project', base_watcher.MODIFIED, self.file_path)])
+
+
+if __name__ == '__main__':
+    unittest.main()
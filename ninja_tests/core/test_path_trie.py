@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import unittest
+
+from ninja_ide.core.file_handling.path_trie import PathTrie
+
+
+def _path(*parts):
+    return os.path.join(os.sep, *parts)
+
+
+class PathTrieTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = PathTrie()
+        self.trie.add(_path('home', 'project'), 'project')
+        self.trie.add(_path('home', 'project', 'lib', 'nested'), 'nested')
+
+    def test_closest_is_the_deepest_container(self):
+        self.assertEqual(self.trie.closest(
+            _path('home', 'project', 'lib', 'module.py')), 'project')
+        self.assertEqual(self.trie.closest(
+            _path('home', 'project', 'lib', 'nested', 'module.py')), 'nested')
+        self.assertEqual(self.trie.closest(_path('home', 'project')),
+                         'project')
+
+    def test_closest_matches_whole_components(self):
+        self.assertIsNone(self.trie.closest(_path('home', 'projects', 'a')))
+        self.assertIsNone(self.trie.closest(_path('home')))
+
+    def test_trailing_separator_is_ignored(self):
+        self.assertIn(_path('home', 'project') + os.sep, self.trie)
+        self.assertEqual(self.trie.get(_path('home', 'project') + os.sep),
+                         'project')
+
+    def test_items_inside_a_path(self):
+        self.trie.add(_path('home', 'other', 'a.py'), 'a')
+        self.assertEqual(sorted(self.trie.items(_path('home', 'project'))),
+                         [(_path('home', 'project'), 'project'),
+                          (_path('home', 'project', 'lib', 'nested'),
+                           'nested')])
+        self.assertEqual(list(self.trie.items(_path('missing'))), [])
+
+    def test_remove(self):
+        self.assertEqual(self.trie.remove(
+            _path('home', 'project', 'lib', 'nested')), 'nested')
+        self.assertIsNone(self.trie.remove(_path('home', 'project', 'lib')))
+        self.assertEqual(len(self.trie), 1)
+        self.assertEqual(self.trie.closest(
+            _path('home', 'project', 'lib', 'nested', 'module.py')),
+            'project')
+        # The empty branch is pruned
+        self.assertEqual(list(self.trie._find(
+            _path('home', 'project')).children), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
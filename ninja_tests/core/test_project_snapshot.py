@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ninja_ide.core.file_handling import project_snapshot
+
+
+class ProjectSnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.project = os.path.join(self.folder, 'project')
+        self.package = os.path.join(self.project, 'package')
+        os.makedirs(os.path.join(self.package, 'sub'))
+        for name in ('a.py', 'b.py', 'c.txt', 'README'):
+            self._write(os.path.join(self.package, name))
+        self._write(os.path.join(self.project, 'setup.py'))
+        self.path = project_snapshot.snapshot_path(self.folder, self.project)
+        self._age(self.project, self.package,
+                  os.path.join(self.package, 'sub'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, path):
+        with open(path, 'w') as f:
+            f.write('x = 1\n')
+
+    def _age(self, *folders):
+        # Folders modified just now are always listed again
+        for folder in folders:
+            os.utime(folder, (1, 1))
+
+    def test_structure_keeps_every_file(self):
+        snapshot = project_snapshot.scan_project(self.project, ['.py', '*'])
+        self.assertEqual(snapshot.structure(), {
+            self.project: [['setup.py'], ['package']],
+            self.package: [['README', 'a.py', 'b.py'], ['sub']],
+            os.path.join(self.package, 'sub'): [[], []]})
+
+    def test_saved_snapshot_is_refreshed(self):
+        project_snapshot.scan_project(self.project, ['.py'], path=self.path)
+        self.assertTrue(os.path.exists(self.path))
+        # An unchanged folder isn't listed again
+        self._write(os.path.join(self.project, 'unnoticed.py'))
+        self._age(self.project)
+        self._write(os.path.join(self.package, 'new.py'))
+        snapshot = project_snapshot.scan_project(self.project, ['.py'],
+                                                 path=self.path)
+        structure = snapshot.structure()
+        self.assertEqual(structure[self.project][0], ['setup.py'])
+        self.assertEqual(structure[self.package][0],
+                         ['a.py', 'b.py', 'new.py'])
+
+    def test_other_extensions_scan_again(self):
+        project_snapshot.scan_project(self.project, ['.py'], path=self.path)
+        snapshot = project_snapshot.scan_project(self.project, ['.txt'],
+                                                 path=self.path)
+        self.assertEqual(snapshot.structure()[self.package][0], ['c.txt'])
+
+    def test_ignore_rules_changed(self):
+        project_snapshot.scan_project(self.project, ['.py'], path=self.path)
+        ignore_file = os.path.join(self.project, '.gitignore')
+        with open(ignore_file, 'w') as f:
+            f.write('b.py\n')
+        os.utime(ignore_file, (1, 1))
+        self._age(self.project)
+        snapshot = project_snapshot.scan_project(self.project, ['.py'],
+                                                 path=self.path)
+        self.assertEqual(snapshot.structure()[self.package][0], ['a.py'])
+        snapshot = project_snapshot.scan_project(
+            self.project, ['.py'], ['a.py'], path=self.path)
+        self.assertEqual(snapshot.structure()[self.package][0], [])
+
+    def test_files_written_in_place(self):
+        snapshot = project_snapshot.scan_project(self.project, ['.py'])
+        path = os.path.join(self.package, 'a.py')
+        with open(path, 'a') as f:
+            f.write('y = 2\n')
+        os.utime(path, (1, 1))
+        self._age(self.package)
+        self.assertTrue(snapshot.refresh())
+        self.assertIn((path, (1, 12)), list(snapshot.iter_files()))
+
+    def test_iter_files(self):
+        self._write(os.path.join(self.package, '.hidden.py'))
+        snapshot = project_snapshot.scan_project(self.project, ['.py'])
+        self.assertEqual([path for path, _ in snapshot.iter_files()],
+                         [os.path.join(self.project, 'setup.py'),
+                          os.path.join(self.package, 'a.py'),
+                          os.path.join(self.package, 'b.py')])
+        self.assertEqual(list(snapshot.iter_files(max_size=1)), [])
+
+    def test_removed_folder(self):
+        snapshot = project_snapshot.scan_project(self.project, ['.py'])
+        shutil.rmtree(os.path.join(self.package, 'sub'))
+        self.assertTrue(snapshot.refresh())
+        self.assertNotIn(os.path.join(self.package, 'sub'),
+                         snapshot.structure())
+        self.assertFalse(snapshot.refresh())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ninja_ide.core.file_handling import project_walker
+
+
+FILES = {
+    'main.py': b'print(1)\n',
+    'data.bin': b'\0\1\2',
+    'big.py': b'#' * 2048,
+    'notes.log': b'log',
+    '.hidden.py': b'',
+    '.gitignore': b'*.log\n/generated/\n!keep.log\n',
+    os.path.join('pkg', '__init__.py'): b'',
+    os.path.join('pkg', 'keep.log'): b'',
+    os.path.join('pkg', '.gitignore'): b'local_*.py\n',
+    os.path.join('pkg', 'local_settings.py'): b'',
+    os.path.join('pkg', 'generated', 'module.py'): b'',
+    os.path.join('generated', 'module.py'): b'',
+    os.path.join('node_modules', 'lib.js'): b'',
+    os.path.join('.git', 'HEAD'): b'',
+    os.path.join('env', 'pyvenv.cfg'): b'',
+    os.path.join('env', 'lib', 'site.py'): b'',
+    os.path.join('docs', 'index.rst'): b'',
+    os.path.join('build', 'lib.py'): b'',
+}
+
+
+class ProjectWalkerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for file_path, content in FILES.items():
+            file_path = os.path.join(self.folder, file_path)
+            if not os.path.isdir(os.path.dirname(file_path)):
+                os.makedirs(os.path.dirname(file_path))
+            with open(file_path, 'wb') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _files(self, **kwargs):
+        return sorted([os.path.relpath(file_path, self.folder)
+                       for file_path in project_walker.iter_files(
+                           self.folder, **kwargs)])
+
+    def test_ignore_rules(self):
+        self.assertEqual(self._files(), sorted([
+            'main.py', 'data.bin', 'big.py', os.path.join('docs', 'index.rst'),
+            os.path.join('build', 'lib.py'),
+            os.path.join('pkg', '__init__.py'),
+            os.path.join('pkg', 'keep.log'),
+            os.path.join('pkg', 'generated', 'module.py')]))
+
+    def test_filters_and_excludes(self):
+        self.assertEqual(self._files(filters=['*.PY'],
+                                     excludes=['docs/', 'big.py', 'build/']),
+                         sorted(['main.py', os.path.join('pkg', '__init__.py'),
+                                 os.path.join('pkg', 'generated',
+                                              'module.py')]))
+
+    def test_hidden_binary_and_size(self):
+        files = self._files(hidden=True, skip_binary=True, max_size=1024)
+        self.assertIn('.hidden.py', files)
+        self.assertNotIn('data.bin', files)
+        self.assertNotIn('big.py', files)
+        self.assertNotIn(os.path.join('.git', 'HEAD'), files)
+
+    def test_not_recursive(self):
+        self.assertEqual(self._files(recursive=False),
+                         ['big.py', 'data.bin', 'main.py'])
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), 'symlinks not supported')
+    def test_symlink_cycle(self):
+        os.symlink(self.folder, os.path.join(self.folder, 'docs', 'loop'))
+        files = self._files()
+        self.assertEqual(len(files), len(set(files)))
+        self.assertIn('main.py', files)
+
+    def test_walk_folder_with_project_rules(self):
+        rules = project_walker.IgnoreRules(self.folder, ['/pkg/generated/'])
+        files = project_walker.iter_files(os.path.join(self.folder, 'pkg'),
+                                          rules=rules)
+        self.assertEqual(
+            sorted(os.path.relpath(path, self.folder) for path in files),
+            [os.path.join('pkg', '__init__.py'),
+             os.path.join('pkg', 'keep.log')])
+
+    def test_folder_identity(self):
+        docs = os.path.join(self.folder, 'docs')
+        loop = os.path.join(self.folder, 'loop')
+        os.symlink(docs, loop)
+        identity = project_walker.folder_identity(docs)
+        self.assertEqual(project_walker.folder_identity(loop), identity)
+        self.assertNotEqual(project_walker.folder_identity(
+            os.path.join(self.folder, 'pkg')), identity)
+        # Without an inode the folder is still identified by its path
+        self.assertEqual(project_walker.folder_identity(
+            os.path.join(self.folder, 'missing')),
+            project_walker.folder_identity(
+                os.path.join(self.folder, 'pkg', '..', 'missing')))
+
+    def test_is_excluded(self):
+        rules = project_walker.IgnoreRules(self.folder)
+        self.assertTrue(rules.is_excluded(
+            os.path.join(self.folder, 'node_modules', 'lib.js')))
+        self.assertTrue(rules.is_excluded(
+            os.path.join(self.folder, 'env', 'lib', 'site.py')))
+        self.assertTrue(rules.is_excluded(
+            os.path.join(self.folder, 'pkg', 'local_settings.py')))
+        self.assertFalse(rules.is_excluded(
+            os.path.join(self.folder, 'pkg', '__init__.py')))
+
+    def test_translate(self):
+        rule = project_walker.IgnoreRule('docs/**/*.txt')
+        self.assertTrue(rule.matches('docs/a.txt', False))
+        self.assertTrue(rule.matches('docs/a/b/c.txt', False))
+        self.assertFalse(rule.matches('other/docs/a.txt', False))
+
+
+if __name__ == '__main__':
+    unittest.main()
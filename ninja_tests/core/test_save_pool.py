@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ninja_ide.core.file_handling import save_pool
+
+
+class SavePoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _path(self, name):
+        return os.path.join(self.folder, name)
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_encode_content(self):
+        self.assertEqual(save_pool.encode_content('a\nñ\n', 'latin-1',
+                                                  '\r\n'),
+                         'a\r\nñ\r\n'.encode('latin-1'))
+        self.assertEqual(save_pool.encode_content('ñ', 'unknown-encoding'),
+                         'ñ'.encode('utf-8'))
+
+    def test_write_files(self):
+        first = save_pool.SaveJob(self._path('first.py'), 'old\n')
+        second = save_pool.SaveJob(self._path('second.py'), 'second\n',
+                                   fsync=True)
+        last = save_pool.SaveJob(self._path('first.py'), 'new\n')
+        save_pool.write_files([first, second, last])
+        self.assertEqual(self._read(first.path), b'new\n')
+        self.assertEqual(self._read(second.path), b'second\n')
+        self.assertEqual(first.mtime, os.path.getmtime(first.path))
+        self.assertIsNone(first.error)
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ['first.py', 'second.py'])
+
+    def test_failed_write(self):
+        job = save_pool.SaveJob(self._path(os.path.join('missing', 'a.py')),
+                                'a\n')
+        save_pool.write_files([job])
+        self.assertTrue(job.error)
+        self.assertIsNone(job.mtime)
+
+    def test_pool(self):
+        written = []
+        pool = save_pool.SavePool(written.append)
+        with pool.batch():
+            for index in range(4):
+                pool.save(save_pool.SaveJob(self._path('%d.py' % index),
+                                            '%d\n' % index))
+            self.assertEqual(written, [])
+        pool.save(save_pool.SaveJob(self._path('0.py'), 'last\n'))
+        pool.stop()
+        self.assertEqual(len(written), 5)
+        self.assertEqual(self._read(self._path('0.py')), b'last\n')
+        self.assertEqual(self._read(self._path('3.py')), b'3\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+from __future__ import absolute_import
+
+import ast
+import unittest
+
+from ninja_ide.intellisensei.analyzer import analyzer
+
+
+SOURCE_BLOCKS = """import os
+
+@decorator
+def foo(a):
+    return a
+if os:
+    x = 1
+else:
+    x = 2
+try:
+    pass
+except:
+    pass
+values = [
+    1,
+]
+class Test(object):
+    def method(self):
+        self.value = 1
+"""
+
+
+class SplitBlocksTestCase(unittest.TestCase):
+
+    def _blocks(self, source):
+        lines = source.split('\n')
+        return [lines[start:end]
+                for start, end in analyzer.split_blocks(lines)]
+
+    def test_split_blocks(self):
+        blocks = self._blocks(SOURCE_BLOCKS)
+        self.assertEqual([block[0] for block in blocks],
+                         ['import os', '@decorator', 'if os:', 'try:',
+                          'values = [', 'class Test(object):'])
+        # Blank lines and comments stay in the block before them
+        self.assertEqual(blocks[0], ['import os', ''])
+
+    def test_decorators(self):
+        blocks = self._blocks('@first\n@second\ndef foo():\n    pass\n')
+        self.assertEqual(len(blocks), 1)
+
+    def test_continuations(self):
+        blocks = self._blocks(SOURCE_BLOCKS)
+        self.assertIn('else:', blocks[2])
+        self.assertIn('except:', blocks[3])
+        self.assertEqual(blocks[4], ['values = [', '    1,', ']'])
+        blocks = self._blocks('x = 1 + \\\n2\ny = 3')
+        self.assertEqual(blocks, [['x = 1 + \\', '2'], ['y = 3']])
+
+
+class RecoverSourceTestCase(unittest.TestCase):
+
+    def _recover(self, source):
+        recovered = analyzer.recover_source(source)
+        # The lines are kept
+        self.assertEqual(len(recovered.split('\n')),
+                         len(source.split('\n')))
+        ast.parse(recovered)
+        return recovered.split('\n')
+
+    def test_broken_statement(self):
+        lines = self._recover('x = 1\ny = = 2\nz = 3\n')
+        self.assertEqual(lines[:3], ['x = 1', 'pass', 'z = 3'])
+
+    def test_header_without_colon(self):
+        lines = self._recover('def foo(a)\n    return a\n')
+        self.assertEqual(lines[:2], ['def foo():', '    return a'])
+        lines = self._recover('if x\n    y = 1\n')
+        self.assertEqual(lines[:2], ['if True:', '    y = 1'])
+
+    def test_else_without_colon(self):
+        lines = self._recover('if x:\n    y = 1\nelse\n    y = 2\n')
+        self.assertEqual(lines[2:4], ['else:', '    y = 2'])
+
+    def test_unclosed_bracket(self):
+        lines = self._recover('def f(a, b\n    x = 1\n\ndef g():\n'
+                              '    pass\n')
+        self.assertEqual(lines[0], 'pass')
+        self.assertEqual(lines[3:5], ['def g():', '    pass'])
+        lines = self._recover('def f():\n    x = foo(1,\n    y = 2\n'
+                              'z = [\n')
+        self.assertEqual(lines[:4], ['def f():', '    pass', '    y = 2',
+                                     'pass'])
+
+    def test_unclosed_string(self):
+        lines = self._recover('x = """text\nmore text\n\ndef g(:\n'
+                              '    pass\ny = 1\n')
+        self.assertEqual(lines[0], 'pass')
+        self.assertEqual(lines[5], 'y = 1')
+
+
+class AnalyzeBlocksTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = analyzer.Analyzer()
+
+    def _symbols(self, source):
+        """Return the symbols of each block of the analysis of source."""
+        self.analyzer.analyze(source)
+        return dict(self.analyzer._blocks)
+
+    def test_reuse_unchanged_blocks(self):
+        source = 'def foo():\n    return 1\n\ndef bar():\n    return 2\n'
+        first = self._symbols(source)
+        second = self._symbols(source.replace('return 2', 'return 3'))
+        foo = 'def foo():\n    return 1\n'
+        self.assertIs(second[foo][1], first[foo][1])
+        self.assertNotIn('def bar():\n    return 2\n', second)
+        self.assertIn('def bar():\n    return 3\n', second)
+
+    def test_moved_blocks(self):
+        source = 'x = 1\n\ndef foo():\n    return 1\n'
+        module = self.analyzer.analyze(source)
+        self.assertEqual(
+            module.functions['foo'].return_type[0].lineno, 4)
+        module = self.analyzer.analyze('import os\n' + source)
+        self.assertEqual(
+            module.functions['foo'].return_type[0].lineno, 5)
+        self.assertEqual(module.attributes['x'].data[0].lineno, 2)
+
+    def test_join_block_split_in_string(self):
+        source = 'text = """first\nsecond\n"""\nvalue = 1\n'
+        module = self.analyzer.analyze(source)
+        self.assertEqual(sorted(module.attributes.keys()),
+                         ['text', 'value'])
+        blocks = self.analyzer._blocks
+        self.assertIn('text = """first\nsecond\n"""', blocks)
+        # The joined block is reused
+        module = self.analyzer.analyze(source.replace('1', '2'))
+        self.assertEqual(sorted(module.attributes.keys()),
+                         ['text', 'value'])
+
+    def test_join_block_split_in_brackets(self):
+        module = self.analyzer.analyze('values = [\n1,\n2]\nvalue = 1\n')
+        self.assertEqual(sorted(module.attributes.keys()),
+                         ['value', 'values'])
+
+
+if __name__ == '__main__':
+    unittest.main()
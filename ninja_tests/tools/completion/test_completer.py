@@ -14,3 +14,117 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+from __future__ import absolute_import
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from ninja_ide.intellisensei.completion import completer
+
+
+MODULE = """alpha = 1
+
+
+class Broken(object):
+
+    @property
+    def broken(self):
+        raise ValueError('broken')
+
+    def method(self):
+        pass
+
+
+instance = Broken()
+"""
+
+
+class CompleterCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        completer.clear_cache()
+        self.folder = tempfile.mkdtemp()
+        sys.path.insert(0, self.folder)
+        self.modules = []
+        self.cache_size = completer.CACHE_SIZE
+
+    def tearDown(self):
+        completer.CACHE_SIZE = self.cache_size
+        completer.clear_cache()
+        sys.path.remove(self.folder)
+        for name in self.modules:
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.folder)
+
+    def _module(self, name):
+        path = os.path.join(self.folder, name + '.py')
+        with open(path, 'w') as f:
+            f.write(MODULE)
+        self.modules.append(name)
+        return path
+
+    def _complete(self, name, text):
+        return completer.get_all_completions(
+            '%s.%s' % (name, text), ['import %s' % name])
+
+    def _key(self, name):
+        return (name, ('import %s' % name,))
+
+    def test_completions_cached(self):
+        self._module('cached_module')
+        completions = self._complete('cached_module', 'al')
+        self.assertEqual(completions['attributes'], ['alpha'])
+        self.assertIn(self._key('cached_module'), completer._cache)
+        # The other prefixes are filtered from the cached completions
+        completions = self._complete('cached_module', 'in')
+        self.assertEqual(completions['attributes'], ['instance'])
+
+    def test_least_recently_used_dropped(self):
+        completer.CACHE_SIZE = 2
+        for name in ('first_module', 'second_module', 'third_module'):
+            self._module(name)
+        self._complete('first_module', '')
+        self._complete('second_module', '')
+        self._complete('first_module', '')
+        self._complete('third_module', '')
+        self.assertEqual(list(completer._cache),
+                         [self._key('first_module'),
+                          self._key('third_module')])
+
+    def test_module_changed(self):
+        path = self._module('changed_module')
+        self._complete('changed_module', '')
+        self.assertIsNotNone(
+            completer._get_cached(self._key('changed_module')))
+        os.utime(path, (1, 1))
+        self.assertIsNone(completer._get_cached(self._key('changed_module')))
+
+    def test_site_packages_changed(self):
+        site_packages = os.path.join(self.folder, 'site-packages')
+        os.mkdir(site_packages)
+        sys.path.append(site_packages)
+        try:
+            self._module('site_module')
+            self._complete('site_module', '')
+            self.assertIsNotNone(
+                completer._get_cached(self._key('site_module')))
+            os.utime(site_packages, (1, 1))
+            self.assertIsNone(completer._get_cached(self._key('site_module')))
+            self.assertEqual(len(completer._cache), 0)
+        finally:
+            sys.path.remove(site_packages)
+
+    def test_symbols_not_loaded_skipped(self):
+        self._module('broken_module')
+        completions = self._complete('broken_module', 'instance.')
+        self.assertEqual(completions['functions'], ['method'])
+        self.assertNotIn('broken', completions['attributes'])
+        self.assertIn(('broken_module.instance', ('import broken_module',)),
+                      completer._cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
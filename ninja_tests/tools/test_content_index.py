@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from ninja_ide.tools import content_index
+
+
+class RegexLiteralsTestCase(unittest.TestCase):
+
+    def test_literals(self):
+        self.assertEqual(content_index.regex_literals(r'def \w+\(self'),
+                         ['def ', '(self'])
+
+    def test_optional_characters_split(self):
+        self.assertEqual(content_index.regex_literals('colou?r{1,2}s+x*y'),
+                         ['colo', 's', 'y'])
+
+    def test_groups_and_classes_are_skipped(self):
+        self.assertEqual(content_index.regex_literals('ab(cd)?ef[g-z]hi'),
+                         ['ab', 'ef', 'hi'])
+
+    def test_escapes_of_characters(self):
+        self.assertEqual(content_index.regex_literals(r'a\x41b\d{2}c\1d'),
+                         ['a', 'b', 'c', 'd'])
+
+    def test_alternation_requires_nothing(self):
+        self.assertEqual(content_index.regex_literals('import (os|sys)'),
+                         ['import '])
+        self.assertEqual(content_index.regex_literals('foo|bar'), [])
+
+    def test_query_trigrams(self):
+        grams = content_index.query_trigrams('ABcd', fixed_string=True)
+        self.assertEqual(grams, content_index._trigrams(b'abcd'))
+        self.assertEqual(content_index.query_trigrams('(?x)a b c'), set())
+        self.assertEqual(content_index.query_trigrams('a.b'), set())
+
+    def test_query_trigrams_ignoring_case_skips_non_ascii(self):
+        sensitive = content_index.query_trigrams('añob', fixed_string=True)
+        insensitive = content_index.query_trigrams(
+            'añob', case_sensitive=False, fixed_string=True)
+        self.assertEqual(len(sensitive), 3)
+        self.assertEqual(insensitive, set())
+
+
+class ContentIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.project = os.path.join(self.folder, 'project')
+        os.makedirs(os.path.join(self.project, 'package'))
+        self.first = self._write('first.py', 'import os\nvalue = 1\n')
+        self.second = self._write(os.path.join('package', 'second.py'),
+                                  'import sys\nVALUE = 2\n')
+        self._write('binary.py', 'import os\0')
+        self._write('.hidden.py', 'import os\n')
+        self.index = content_index.ContentIndex(
+            content_index.index_path(self.folder, self.project),
+            self.project)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, name, content):
+        path = os.path.join(self.project, name)
+        with open(path, 'wb') as f:
+            f.write(content.encode('utf-8'))
+        return path
+
+    def _candidates(self, text):
+        return self.index.candidates(
+            content_index.query_trigrams(text, fixed_string=True))
+
+    def test_not_ready_before_refresh(self):
+        self.assertIsNone(self._candidates('import'))
+        self.assertTrue(self.index.refresh())
+        self.assertIsNone(self.index.candidates(set()))
+
+    def test_candidates(self):
+        self.index.refresh()
+        self.assertEqual(self._candidates('import'),
+                         sorted([self.first, self.second]))
+        self.assertEqual(self._candidates('import os'), [self.first])
+        self.assertEqual(self._candidates('value ='),
+                         sorted([self.first, self.second]))
+        self.assertEqual(self._candidates('missing'), [])
+
+    def test_cancelled_refresh(self):
+        self.assertFalse(self.index.refresh(lambda: True))
+        self.assertFalse(self.index.ready)
+
+    def test_update_paths(self):
+        self.index.refresh()
+        self._write('first.py', 'import sys\n')
+        os.utime(self.first, (1, 1))
+        os.remove(self.second)
+        third = self._write('third.py', 'import os\n')
+        self.index.update_paths([self.first, self.second, third])
+        self.assertEqual(self._candidates('import os'), [third])
+        self.assertEqual(self._candidates('import sys'), [self.first])
+
+    def test_removed_folder(self):
+        self.index.refresh()
+        shutil.rmtree(os.path.join(self.project, 'package'))
+        self.index.update_paths([os.path.join(self.project, 'package')])
+        self.assertEqual(self._candidates('import'), [self.first])
+
+    def test_refresh_checks_changes_and_compacts(self):
+        self.index.refresh()
+        os.remove(self.first)
+        self._write('third.py', 'import os\n')
+        index = content_index.ContentIndex(self.index.db_path, self.project)
+        index.refresh()
+        self.assertEqual(
+            index.candidates(content_index.query_trigrams(
+                'import', fixed_string=True)),
+            sorted([self.second, os.path.join(self.project, 'third.py')]))
+        connection = sqlite3.connect(index.db_path)
+        rows = connection.execute(
+            "SELECT count(*) FROM content_postings GROUP BY gram "
+            "HAVING count(*) > 1").fetchall()
+        connection.close()
+        self.assertEqual(rows, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import unittest
+
+from ninja_ide.tools.locator import paths_index
+
+
+PROJECT = os.path.join(os.sep, 'home', 'ninja')
+FILES = [os.path.join('core', 'settings.py'),
+         os.path.join('gui', 'main_panel', 'files_handler.py'),
+         os.path.join('gui', 'ide.py'),
+         os.path.join('tools', 'locator', 'locator.py'),
+         os.path.join('tools', 'locator', 'paths_index.py')]
+
+
+class PathsIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.index = paths_index.PathsIndex()
+        for file_name in FILES:
+            self.index.add(PROJECT, os.path.join(PROJECT, file_name))
+
+    def _relatives(self, entries):
+        return [entry.relative for entry in entries]
+
+    def test_entry(self):
+        entry = self.index.search('settings')[0]
+        self.assertEqual(entry.name, 'settings.py')
+        self.assertEqual(entry.relative,
+                         os.path.join('ninja', 'core', 'settings.py'))
+        self.assertEqual(entry.project, PROJECT)
+        self.assertEqual(entry.path, os.path.join(PROJECT, FILES[0]))
+
+    def test_file_name_matches_first(self):
+        self.assertEqual(self._relatives(self.index.search('LOCATOR')), [
+            os.path.join('ninja', 'tools', 'locator', 'locator.py'),
+            os.path.join('ninja', 'tools', 'locator', 'paths_index.py')])
+
+    def test_terms_in_order(self):
+        self.assertEqual(self._relatives(self.index.search('gui py')), [
+            os.path.join('ninja', 'gui', 'ide.py'),
+            os.path.join('ninja', 'gui', 'main_panel', 'files_handler.py')])
+        self.assertEqual(self.index.search('py gui'), [])
+
+    def test_narrowed_search(self):
+        self.assertEqual(len(self.index.search('i')), 5)
+        self.assertEqual(len(self.index.search('id')), 1)
+        # Files added reset the previous matches
+        self.index.add(PROJECT, os.path.join(PROJECT, 'widget.py'))
+        self.assertEqual(len(self.index.search('idg')), 1)
+
+    def test_limit_and_remove(self):
+        self.assertEqual(len(self.index.search('py', limit=2)), 2)
+        self.index.remove([os.path.join(PROJECT, FILES[2])])
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.search('ide'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
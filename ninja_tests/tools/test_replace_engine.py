@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ninja_ide.tools import replace_engine
+from ninja_ide.tools import search_engine
+
+
+class ReplaceContentTestCase(unittest.TestCase):
+
+    def test_replace_by_line_keeping_line_endings(self):
+        regex = search_engine.compile_pattern(r'(\w+)$')
+        content, count = replace_engine.replace_content(
+            'a = one\r\nb = two\n', regex, r'<\1>')
+        self.assertEqual(content, 'a = <one>\r\nb = <two>\n')
+        self.assertEqual(count, 2)
+
+    def test_fixed_string_replacement_is_literal(self):
+        regex = search_engine.compile_pattern('a.b', fixed_string=True)
+        content, count = replace_engine.replace_content(
+            'a.b axb', regex, r'\1', fixed_string=True)
+        self.assertEqual(content, r'\1 axb')
+        self.assertEqual(count, 1)
+
+    def test_detect_encoding(self):
+        self.assertEqual(replace_engine.detect_encoding(b'x = 1\n'), 'utf-8')
+        self.assertEqual(replace_engine.detect_encoding(
+            b'#!/usr/bin/env python\n# -*- coding: latin-1 -*-\n'),
+            'latin-1')
+        self.assertRaises(LookupError, replace_engine.detect_encoding,
+                          b'# coding: unknown-encoding\n')
+
+
+class ApplyEditsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.first = self._write('first.py',
+                                 '# coding: latin-1\nname = "\xf1"\n')
+        self.second = self._write('second.py', 'name = 1\n')
+        replace_engine.init_replace_worker('name', True, True, 'value', True)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, name, content, encoding='latin-1'):
+        path = os.path.join(self.folder, name)
+        with open(path, 'wb') as f:
+            f.write(content.encode(encoding))
+        return path
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _edits(self):
+        edits = []
+        for path in (self.first, self.second):
+            _, edit, error = replace_engine.replace_file_worker(path)
+            self.assertIsNone(error)
+            edits.append(edit)
+        return edits
+
+    def test_worker_keeps_the_encoding(self):
+        _, edit, _ = replace_engine.replace_file_worker(self.first)
+        self.assertEqual(edit.content,
+                         '# coding: latin-1\nvalue = "\xf1"\n'.encode(
+                             'latin-1'))
+        self.assertEqual(edit.count, 1)
+        self.assertIn('+value = "\xf1"', edit.diff)
+
+    def test_worker_errors(self):
+        path = self._write('invalid.py', 'name = "\xf1"\n')
+        self.assertEqual(replace_engine.replace_file_worker(path)[1], None)
+        self.assertTrue(replace_engine.replace_file_worker(path)[2])
+        unchanged = self._write('unchanged.py', 'other\n')
+        self.assertEqual(replace_engine.replace_file_worker(unchanged),
+                         (unchanged, None, None))
+
+    def test_apply_edits(self):
+        replace_engine.apply_edits(self._edits())
+        self.assertEqual(self._read(self.second), b'value = 1\n')
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ['first.py', 'second.py'])
+
+    def test_modified_file_is_not_replaced(self):
+        edits = self._edits()
+        self._write('second.py', 'name = 22\n')
+        self.assertRaises(replace_engine.ReplaceError,
+                          replace_engine.apply_edits, edits)
+        self.assertEqual(self._read(self.first),
+                         '# coding: latin-1\nname = "\xf1"\n'.encode(
+                             'latin-1'))
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ['first.py', 'second.py'])
+
+    def test_rollback(self):
+        edits = self._edits()
+        rename = replace_engine._rename
+        renamed = []
+
+        def failing_rename(source, target):
+            if renamed and source.endswith('.tmp'):
+                raise OSError("Disk full")
+            renamed.append(target)
+            rename(source, target)
+        replace_engine._rename = failing_rename
+        try:
+            self.assertRaises(replace_engine.ReplaceError,
+                              replace_engine.apply_edits, edits)
+        finally:
+            replace_engine._rename = rename
+        self.assertEqual(self._read(self.first),
+                         '# coding: latin-1\nname = "\xf1"\n'.encode(
+                             'latin-1'))
+        self.assertEqual(self._read(self.second), b'name = 1\n')
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ['first.py', 'second.py'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ninja_ide.tools import search_engine
+
+
+CONTENT = """import os
+
+def foo():
+    return os.path
+"""
+
+
+class SearchEngineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for file_path in ('a.py', 'b.txt', '.hidden.py',
+                          os.path.join('pkg', 'c.PY'),
+                          os.path.join('.git', 'd.py')):
+            file_path = os.path.join(self.folder, file_path)
+            if not os.path.isdir(os.path.dirname(file_path)):
+                os.makedirs(os.path.dirname(file_path))
+            with open(file_path, 'w') as f:
+                f.write(CONTENT)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _relative(self, paths):
+        return [os.path.relpath(path, self.folder) for path in paths]
+
+    def test_walk_files(self):
+        self.assertEqual(
+            self._relative(search_engine.walk_files(self.folder, ['*.py'])),
+            ['a.py', os.path.join('pkg', 'c.PY')])
+        self.assertEqual(
+            self._relative(search_engine.walk_files(self.folder, ['*.py'],
+                                                    recursive=False)),
+            ['a.py'])
+        self.assertEqual(
+            list(search_engine.walk_files(self.folder, ['*'],
+                                          cancelled=lambda: True)), [])
+
+    def test_grep_content(self):
+        regex = search_engine.compile_pattern('OS.', case_sensitive=False,
+                                              fixed_string=True)
+        self.assertEqual(search_engine.grep_content(CONTENT, regex),
+                         [(3, '    return os.path')])
+        regex = search_engine.compile_pattern('foo|path')
+        self.assertEqual(len(search_engine.grep_content(CONTENT, regex)), 2)
+        self.assertEqual(
+            search_engine.grep_content(CONTENT, regex, ['foo', 'bar']), [])
+
+    def _scan(self, content, *args):
+        file_path = os.path.join(self.folder, 'scanned.py')
+        with open(file_path, 'wb') as f:
+            f.write(content)
+        return search_engine.FileScanner(*args).scan(file_path)
+
+    def test_scan(self):
+        content = CONTENT.encode('utf-8')
+        self.assertEqual(self._scan(content, 'OS.', False, True),
+                         [(3, '    return os.path')])
+        self.assertEqual(self._scan(content, 'foo|path', True, False,
+                                    ['foo', 'path']),
+                         [(2, 'def foo():'), (3, '    return os.path')])
+        self.assertEqual(self._scan(content, 'foo|path', True, False,
+                                    ['foo', 'bar']), [])
+        self.assertEqual(self._scan(b'', 'foo'), [])
+
+    def test_scan_line_by_line(self):
+        content = b'first\r\nsecond line\r\n\r\nthird'
+        self.assertEqual(self._scan(content, '^s.*e$'),
+                         [(1, 'second line')])
+        self.assertEqual(self._scan(content, 't\\s+s'), [])
+        self.assertEqual(self._scan(content, '^th'), [(3, 'third')])
+
+    def test_scan_not_ascii(self):
+        content = 'ñandú = 1\nÑANDÚ = 2\n'.encode('utf-8')
+        self.assertEqual(self._scan(content, 'ñandú', False, True),
+                         [(0, 'ñandú = 1'), (1, 'ÑANDÚ = 2')])
+        self.assertEqual(self._scan(content, '2', True, True),
+                         [(1, 'ÑANDÚ = 2')])
+
+    def test_scan_unicode_classes(self):
+        content = 'año = 1\n\u212aelvin = 2\nfoo bar\n'.encode('utf-8')
+        self.assertEqual(self._scan(content, 'a\\wo'), [(0, 'año = 1')])
+        self.assertEqual(self._scan(content, 'a.o'), [(0, 'año = 1')])
+        self.assertEqual(self._scan(content, 'a[^x]o'), [(0, 'año = 1')])
+        self.assertEqual(self._scan(content, 'kelvin', False),
+                         [(1, '\u212aelvin = 2')])
+        self.assertEqual(self._scan(content, '[j-l]elvin', False),
+                         [(1, '\u212aelvin = 2')])
+        self.assertEqual(self._scan(content, 'o b', True, True),
+                         [(2, 'foo bar')])
+        self.assertIsNotNone(
+            search_engine.FileScanner('foo|bar')._bytes_regex)
+        self.assertIsNotNone(
+            search_engine.FileScanner('fo\\.o', False)._bytes_regex)
+        self.assertIsNone(
+            search_engine.FileScanner('a\\bo')._bytes_regex)
+
+    def test_scan_folding_letters(self):
+        scanner = search_engine.FileScanner('kelvin', False)
+        self.assertIsNotNone(scanner._bytes_regex)
+        self.assertEqual(self._scan(b'KELVIN = 1\n', 'kelvin', False),
+                         [(0, 'KELVIN = 1')])
+        content = 'a = 1\n\u212aelvin = 2\n'.encode('utf-8')
+        self.assertEqual(self._scan(content, '[k]elvin', False),
+                         [(1, '\u212aelvin = 2')])
+
+    def test_scan_empty_match_at_the_end(self):
+        self.assertEqual(self._scan(b'a\n', '^'), [(0, 'a')])
+        self.assertEqual(self._scan(b'a\n\n', 'x*'), [(0, 'a'), (1, '')])
+
+    def test_search_files_worker(self):
+        search_engine.init_search_worker('def', True, True, None)
+        file_paths = list(search_engine.walk_files(self.folder, ['*']))
+        file_paths.append(os.path.join(self.folder, 'not_existing.py'))
+        results = search_engine.search_files_worker(file_paths)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][1], [(2, 'def foo():')])
+
+    def test_batches(self):
+        self.assertEqual(list(search_engine.batches(range(5), 2)),
+                         [[0, 1], [2, 3], [4]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from ninja_ide.tools.locator import symbols_db
+
+
+class SymbolsDBTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.folder, 'locator.db')
+        self.project = os.path.join(self.folder, 'project')
+        os.mkdir(self.project)
+        self.existing = os.path.join(self.project, 'existing.py')
+        open(self.existing, 'w').close()
+        symbols_db.initialize(self.db_path)
+        db = symbols_db.SymbolsDB(self.db_path)
+        db.save(self.existing, 1.5, 0, 'hash', b'data')
+        db.save(os.path.join(self.project, 'removed.py'), 1.5, 0, 'removed',
+                b'removed data')
+        db.save(os.path.join(self.folder, 'project0.py'), 1.5, 0, 'hash')
+        db.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _paths(self):
+        db = symbols_db.SymbolsDB(self.db_path)
+        db.prefetch(self.folder)
+        paths = sorted(db._prefetched.keys())
+        db.close()
+        return paths
+
+    def test_prefetch_only_loads_the_folder(self):
+        db = symbols_db.SymbolsDB(self.db_path)
+        db.prefetch(self.project)
+        self.assertEqual(sorted(db._prefetched.keys()), [
+            self.existing, os.path.join(self.project, 'removed.py')])
+        self.assertEqual(db.get(self.existing),
+                         (self.existing, 1.5, 0, 'hash'))
+        self.assertIsNone(db.get(os.path.join(self.project, 'new.py')))
+        db.close()
+
+    def test_remove_stale(self):
+        db = symbols_db.SymbolsDB(self.db_path)
+        db.prefetch(self.project)
+        db.get(self.existing)
+        db.remove_stale()
+        db.close()
+        self.assertEqual(self._paths(), [
+            self.existing, os.path.join(self.folder, 'project0.py')])
+
+    def test_collect_garbage(self):
+        db = symbols_db.SymbolsDB(self.db_path)
+        db.collect_garbage()
+        db.close()
+        self.assertEqual(self._paths(), [self.existing])
+
+    def test_symbols_are_shared_by_content(self):
+        db = symbols_db.SymbolsDB(self.db_path)
+        self.assertEqual(bytes(db.get_symbols('hash')), b'data')
+        self.assertIsNone(db.get_symbols('unknown'))
+        db.close()
+
+    def test_collect_unused_symbols(self):
+        db = symbols_db.SymbolsDB(self.db_path)
+        db.collect_garbage()
+        self.assertIsNotNone(db.get_symbols('removed'))
+        db.collect_garbage(now=time.time() + symbols_db.SYMBOLS_TTL + 1)
+        self.assertIsNone(db.get_symbols('removed'))
+        # Still used by existing.py
+        self.assertIsNotNone(db.get_symbols('hash'))
+        db.close()
+
+    def test_close_without_commit(self):
+        db = symbols_db.SymbolsDB(self.db_path)
+        db.delete([self.existing])
+        db.close(commit=False)
+        self.assertIn(self.existing, self._paths())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import unittest
+
+from ninja_ide.tools.locator import symbols_extractor
+
+
+CURRENT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+class SymbolsExtractorTestCase(unittest.TestCase):
+
+    def test_parse_symbols(self):
+        symbols = {
+            'attributes': {'CONSTANT': 1},
+            'functions': {'run()': {'lineno': 3, 'functions': {}}},
+            'classes': {
+                'Foo(object)': {
+                    'lineno': 6,
+                    'members': {
+                        'attributes': {'bar': 8},
+                        'functions': {
+                            '__init__()': {
+                                'lineno': 7,
+                                'functions': {
+                                    'functions': {
+                                        'inner()': {'lineno': 9,
+                                                    'functions': {}}}}}},
+                        'classes': {}}}}}
+        records = symbols_extractor.parse_symbols(symbols)
+        self.assertEqual(sorted(records), sorted([
+            ('-', 'CONSTANT', 0),
+            ('>', 'run()', 2),
+            ('<', 'Foo(object)', 5),
+            ('-', 'bar', 7),
+            ('>', '__init__()', 6),
+            ('>', 'inner()', 8)]))
+
+    def test_content_hash(self):
+        self.assertEqual(symbols_extractor.content_hash(b'a = 1'),
+                         symbols_extractor.content_hash(b'a = 1'))
+        self.assertNotEqual(symbols_extractor.content_hash(b'a = 1'),
+                            symbols_extractor.content_hash(b'a = 2'))
+
+    def test_worker_returns_errors(self):
+        path = os.path.join(CURRENT_DIR, 'not_existing_file.py')
+        file_path, stat, content_hash, records, error = \
+            symbols_extractor.extract_symbols_worker(path)
+        self.assertEqual(file_path, path)
+        self.assertIsNone(records)
+        self.assertIsNotNone(error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import unittest
+
+from ninja_ide.tools.locator import symbols_index
+
+
+class FakeItem(object):
+
+    def __init__(self, symbol_type, name, path='', lineno=-1):
+        self.type = symbol_type
+        self.name = name
+        self.path = path
+        self.lineno = lineno
+        self.comparison = name.split('(')[0]
+
+
+class SymbolsIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.index = symbols_index.SymbolsIndex()
+        self.index.update_file('/a.py', [
+            FakeItem('@', 'a.py', '/a.py'),
+            FakeItem('<', 'LocatorWidget(QDialog)', '/a.py', 10),
+            FakeItem('>', 'filter', '/a.py', 20),
+            FakeItem('>', 'fx', '/a.py', 30)])
+        self.index.update_file('/b.py', [
+            FakeItem('@', 'b.py', '/b.py'),
+            FakeItem('>', 'locate_code', '/b.py', 5)])
+
+    def _names(self, items):
+        return [item.name for item in items]
+
+    def test_trigrams(self):
+        self.assertEqual(symbols_index.trigrams('abcd'),
+                         set(['abc', 'bcd']))
+        self.assertEqual(symbols_index.trigrams('ab'), set())
+
+    def test_search_substring(self):
+        self.assertEqual(self._names(self.index.search('LOCAT')),
+                         ['LocatorWidget(QDialog)', 'locate_code'])
+
+    def test_search_ignores_text_after_parenthesis(self):
+        self.assertEqual(self.index.search('qdialog'), [])
+
+    def test_search_by_type(self):
+        self.assertEqual(self._names(self.index.search('loc', '>')),
+                         ['locate_code'])
+
+    def test_search_short_query(self):
+        self.assertEqual(self._names(self.index.search('f', '>')),
+                         ['filter', 'fx'])
+
+    def test_empty_query_returns_sorted_locations(self):
+        self.assertEqual(self._names(self.index.search('')),
+                         ['LocatorWidget(QDialog)', 'a.py', 'b.py',
+                          'filter', 'fx', 'locate_code'])
+
+    def test_update_file_replaces_items(self):
+        self.index.update_file('/b.py', [FakeItem('@', 'b.py', '/b.py')])
+        self.assertEqual(self.index.search('locate'), [])
+        self.assertEqual(len(self.index.get_locations()), 5)
+
+    def test_remove_file(self):
+        self.index.remove_file('/a.py')
+        self.assertEqual(self._names(self.index.search('py')),
+                         ['b.py'])
+
+    def test_locations_are_patched_with_file_changes(self):
+        for number in range(50):
+            path = '/module%d.py' % number
+            self.index.update_file(path, [FakeItem('@', path[1:], path)])
+        locations = self.index.get_locations()
+        self.index.update_file('/b.py', [
+            FakeItem('@', 'b.py', '/b.py'),
+            FakeItem('>', 'locate_file_code', '/b.py', 5)])
+        self.index.remove_file('/module7.py')
+        patched = self.index.get_locations()
+        self.assertIsNot(patched, locations)
+        self.assertEqual(len(patched), len(locations) - 1)
+        names = self._names(patched)
+        self.assertEqual(names, sorted(names))
+        self.assertIn('locate_file_code', names)
+        self.assertNotIn('locate_code', names)
+        self.assertNotIn('module7.py', names)
+
+    def test_items_added_and_removed_before_sorting(self):
+        self.index.get_locations()
+        self.index.update_file('/c.py', [FakeItem('@', 'c.py', '/c.py')])
+        self.index.remove_file('/c.py')
+        self.assertNotIn('c.py', self._names(self.index.get_locations()))
+
+    def test_definitions(self):
+        self.index.update_file('/c.py', [
+            FakeItem('<', 'filter(object)', '/c.py', 1)])
+        self.assertEqual(
+            [(item.path, item.lineno)
+             for item in self.index.definitions('filter')],
+            [('/a.py', 20), ('/c.py', 1)])
+        self.assertEqual(
+            self._names(self.index.definitions('filter', ('<',))),
+            ['filter(object)'])
+        self.index.remove_file('/c.py')
+        self.assertEqual(len(self.index.definitions('filter')), 1)
+        self.assertEqual(self.index.definitions('filt'), [])
+
+    def test_fuzzy_score_prefers_boundaries(self):
+        camel = symbols_index.fuzzy_score('lw', 'LocatorWidget')
+        middle = symbols_index.fuzzy_score('lw', 'allowed')
+        self.assertGreater(camel, middle)
+        self.assertIsNone(symbols_index.fuzzy_score('wl', 'LocatorWidget'))
+        # The word starts don't leave room for the query, the greedy match
+        self.assertIsNotNone(symbols_index.fuzzy_score('oft', 'offsetFrom'))
+
+    def test_fuzzy_score_prefers_prefix_substrings(self):
+        self.assertGreater(symbols_index.fuzzy_score('loc', 'locate_code'),
+                           symbols_index.fuzzy_score('loc', 'alloc'))
+
+    def test_rank_matches_camel_humps(self):
+        self.assertEqual(self._names(self.index.rank('lw')),
+                         ['LocatorWidget(QDialog)'])
+        self.assertEqual(self._names(self.index.rank('lc', '>')),
+                         ['locate_code'])
+
+    def test_rank_orders_by_score(self):
+        self.assertEqual(self._names(self.index.rank('f', '>')),
+                         ['fx', 'filter'])
+
+    def test_rank_context_bonus(self):
+        self.index.update_file('/project/c.py', [
+            FakeItem('>', 'locate_code', '/project/c.py', 3)])
+        ranked = self.index.rank('locate_code', project_path='/project')
+        self.assertEqual(ranked[0].path, '/project/c.py')
+        ranked = self.index.rank('locate_code', recent_paths=set(['/b.py']))
+        self.assertEqual(ranked[0].path, '/b.py')
+
+    def test_ranked_cursor_pages(self):
+        cursor = symbols_index.RankedCursor(
+            [(-score, str(score), score, score) for score in range(100)])
+        self.assertEqual(len(cursor), 100)
+        self.assertEqual(cursor[0:10], list(range(99, 89, -1)))
+        self.assertEqual(cursor[10:20], list(range(89, 79, -1)))
+        self.assertEqual(list(cursor)[-1], 0)
+        self.assertFalse(symbols_index.RankedCursor([]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of NINJA-IDE (http://ninja-ide.org).
+#
+# NINJA-IDE is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# NINJA-IDE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NINJA-IDE; If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pickle
+import unittest
+
+from ninja_ide.tools.locator import symbols_records
+
+
+RECORDS = [('<', 'Foo(object)', 5), ('>', 'ñandú()', 7), ('-', 'bar', 0)]
+
+
+class SymbolRecordsTestCase(unittest.TestCase):
+
+    def test_from_tuples(self):
+        records = symbols_records.SymbolRecords.from_tuples(RECORDS)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(list(records), RECORDS)
+        self.assertEqual(records.types, '<>-')
+
+    def test_names_are_interned(self):
+        first = symbols_records.SymbolRecords.from_tuples(RECORDS)
+        second = symbols_records.SymbolRecords.from_tuples(
+            [('-', ''.join(['b', 'a', 'r']), 1)])
+        self.assertIs(first.names[2], second.names[0])
+
+    def test_encode_decode(self):
+        records = symbols_records.SymbolRecords.from_tuples(RECORDS)
+        data = symbols_records.encode(records)
+        self.assertTrue(data.startswith(symbols_records.MAGIC))
+        self.assertEqual(list(symbols_records.decode(data)), RECORDS)
+
+    def test_definition_lines(self):
+        source_lines = ['CONSTANT = 1', '', 'def f():'] * 3
+        records = symbols_records.SymbolRecords.from_tuples(
+            RECORDS + [('>', 'g()', 40)], source_lines)
+        self.assertEqual(records.lines, ('def f():', '', 'CONSTANT = 1', ''))
+        decoded = symbols_records.decode(symbols_records.encode(records))
+        self.assertEqual(decoded.lines, records.lines)
+
+    def test_encode_decode_empty(self):
+        records = symbols_records.SymbolRecords()
+        data = symbols_records.encode(records)
+        self.assertEqual(list(symbols_records.decode(data)), [])
+
+    def test_decode_rejects_other_formats(self):
+        data = pickle.dumps(RECORDS, pickle.HIGHEST_PROTOCOL)
+        self.assertRaises(ValueError, symbols_records.decode, data)
+        data = symbols_records.encode(
+            symbols_records.SymbolRecords.from_tuples(RECORDS))
+        self.assertRaises(ValueError, symbols_records.decode, data[:12])
+
+
+if __name__ == '__main__':
+    unittest.main()